@@ -0,0 +1,2 @@
+# Microbenchmarks of car's internals; run `python -m benchmarks --help`
+# from the carbot folder
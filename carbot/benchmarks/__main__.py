@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import fnmatch
+import importlib
+import os
+import sys
+from loguru import logger
+
+import car
+from .harness import (
+    SIZES, Result, change, compare, load_baseline, registry, run_benchmark,
+    save_baseline
+)
+
+
+MODULES = ('bench_tokenizer', 'bench_command', 'bench_context',
+           'bench_converter', 'bench_db', 'bench_dispatch', 'bench_carpp')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=("Runs car's microbenchmarks and compares them to a "
+                     "baseline"))
+    parser.add_argument('-k', dest='pattern', default='*',
+                        help="only run benchmarks matching this glob "
+                             "(e.g. 'converter.*' or '*[large]')")
+    parser.add_argument('--sizes', default=','.join(SIZES),
+                        help="comma separated sizes to run "
+                             "(default: %(default)s)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help="baseline JSON file (default: %(default)s)")
+    parser.add_argument('--save', action='store_true',
+                        help="write the results to the baseline file "
+                             "(merged with its other entries)")
+    parser.add_argument('--threshold', type=float, default=10,
+                        help="fail if a benchmark is this many percent "
+                             "slower (or allocates this many percent more) "
+                             "than its baseline (default: %(default)s)")
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="seconds per timed batch (default: "
+                             "%(default)s)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="timed batches per benchmark, of which the "
+                             "best is kept (default: %(default)s)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    for module in MODULES:
+        importlib.import_module(f'{__package__}.{module}')
+
+    baseline: dict[str, Result] = {}
+    if os.path.exists(args.baseline):
+        baseline = load_baseline(args.baseline)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    sizes = args.sizes.split(',')
+
+    results: dict[str, Result] = {}
+    print(f"{'benchmark':<44} {'ops/s':>11} {'bytes/op':>10} "
+          f"{'kept/op':>8} {'change':>8}")
+    for bench in registry:
+        for size in bench.sizes:
+            key = bench.key(size)
+            if size not in sizes or not fnmatch.fnmatchcase(key,
+                                                            args.pattern):
+                continue
+
+            op = bench.factory(size, bench.rng(size))
+            res = run_benchmark(op, loop, min_time=args.min_time,
+                                repeat=args.repeat)
+            results[key] = res
+            print(f"{key:<44} {res.ops_per_sec:>11.5g} "
+                  f"{res.peak_bytes:>10.0f} {res.retained_blocks:>8.2f} "
+                  f"{change(res, baseline.get(key)):>8}", flush=True)
+
+    car.offloader.shutdown()
+    loop.close()
+
+    if args.save:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f"\nSaved {len(results)} results to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, threshold=args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) past "
+              f"{args.threshold:g}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import itertools
+import random
+
+import carpp
+from . import world
+from .bench_converter import _typo
+from .harness import benchmark
+
+
+def _names(size: str) -> list[str]:
+    return [m.name.lower() for m in world.guild(size).members]
+
+def _queries(names: list[str], rng: random.Random) -> list[str]:
+    return [_typo(name, rng) for name in rng.sample(names, 10)]
+
+
+# Matching a misspelt member name against every member's name, by scanning
+# them and through a FuzzyIndex built beforehand
+@benchmark('carpp.fuzzy_match_one')
+def fuzzy_match_one(size: str, rng: random.Random):
+    names = _names(size)
+    queries = itertools.cycle(_queries(names, rng))
+    return lambda: carpp.fuzzy_match_one(next(queries), names)
+
+@benchmark('carpp.FuzzyIndex.match_one')
+def index_match_one(size: str, rng: random.Random):
+    names = _names(size)
+    index = carpp.FuzzyIndex(names)
+    queries = itertools.cycle(_queries(names, rng))
+    return lambda: index.match_one(next(queries))
+
+@benchmark('carpp.fuzzy_match')
+def fuzzy_match(size: str, rng: random.Random):
+    names = _names(size)
+    queries = itertools.cycle(_queries(names, rng))
+    return lambda: carpp.fuzzy_match(next(queries), names, 10)
+
+@benchmark('carpp.FuzzyIndex.match')
+def index_match(size: str, rng: random.Random):
+    names = _names(size)
+    index = carpp.FuzzyIndex(names)
+    queries = itertools.cycle(_queries(names, rng))
+    return lambda: index.match(next(queries), 10)
+
+
+# a typing test excerpt of about `length` characters and an attempt at it
+# with a few mistakes, as Typing.wpm scores them
+def _excerpt(length: int, rng: random.Random) -> tuple[str, str]:
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(''.join(rng.choice('etaoinshrdlucmfw')
+                             for _ in range(rng.randint(2, 9))))
+    text = ' '.join(words)
+    typed = list(text)
+    for _ in range(length // 50):
+        i = rng.randrange(len(typed))
+        typed[i:i+1] = rng.choice(([], [typed[i], 'x'], ['x']))
+    return text, ''.join(typed)
+
+def _pairs(size: str, rng: random.Random) -> list[tuple[str, str]]:
+    if size == 'small':
+        names = _names('medium')
+        return [(rng.choice(names), rng.choice(names)) for _ in range(10)]
+    return [_excerpt(1000, rng) for _ in range(3)]
+
+# Unit-cost distance between pairs of member names (small) and between
+# 1000-character excerpts and attempts at them (large), with the kernels and
+# with the reference DP
+@benchmark('carpp.levenshtein', sizes=('small', 'large'))
+def levenshtein(size: str, rng: random.Random):
+    it = itertools.cycle(_pairs(size, rng))
+    return lambda: carpp.levenshtein(*next(it))
+
+@benchmark('carpp.levenshtein_dp', sizes=('small', 'large'))
+def levenshtein_dp(size: str, rng: random.Random):
+    it = itertools.cycle(_pairs(size, rng))
+    return lambda: carpp.levenshtein_dp(*next(it))
@@ -0,0 +1,71 @@
+import random
+from typing import Annotated as A, Optional
+import discord
+
+import car
+from .harness import benchmark
+
+
+# commands with a small, medium and large number of arguments; loaded into
+# the benchmark bot by bench_dispatch
+class BenchCog(car.Cog):
+    category = "Benchmarks"
+
+    @car.text_command(name='bench_small')
+    async def small(self, ctx: car.TextContext, count: int):
+        """Benchmark command with one argument"""
+        await ctx.respond(str(count))
+
+    @car.text_command(name='bench_medium')
+    async def medium(
+        self,
+        ctx: car.TextContext,
+        member: discord.Member,
+        count: A[int, "how many", car.ToInt() | car.InRange(1, 100)],
+        flag: bool,
+        reason: Optional[str] = None
+    ):
+        """Benchmark command with a few arguments"""
+        await ctx.respond(f"{member} {count} {flag} {reason}")
+
+    @car.text_command(name='bench_large', collect_last_arg=True)
+    async def large(
+        self,
+        ctx: car.TextContext,
+        member: discord.Member,
+        role: discord.Role,
+        channel: discord.TextChannel,
+        count: A[int, car.ToInt() | car.InRange(1, 1000)],
+        ratio: float,
+        duration: A[float, car.ToSeconds()],
+        mode: A[str, car.FromChoices({'fast': 'fast', 'slow': 'slow'})],
+        flag: bool,
+        url: A[str, car.ToURL()],
+        text: str
+    ):
+        """Benchmark command with many arguments"""
+        await ctx.respond(f"{member} {role} {channel} {count} {ratio} "
+                          f"{duration} {mode} {flag} {url} {text}")
+
+COMMANDS: dict[str, car.TextCommand] = {
+    'small': BenchCog.small, # type: ignore[dict-item]
+    'medium': BenchCog.medium, # type: ignore[dict-item]
+    'large': BenchCog.large, # type: ignore[dict-item]
+}
+
+
+@benchmark('command.outline')
+def outline(size: str, rng: random.Random):
+    cmd = COMMANDS[size]
+    highlight = list(cmd.args)[-1]
+    return lambda: cmd.outline(prefix="]", highlight=highlight)
+
+@benchmark('command.usage')
+def usage(size: str, rng: random.Random):
+    cmd = COMMANDS[size]
+    return lambda: cmd.usage(prefix="]")
+
+@benchmark('command.cached_usage')
+def cached_usage(size: str, rng: random.Random):
+    cmd = COMMANDS[size]
+    return lambda: car.render_cache.usage(cmd, "]")
@@ -0,0 +1,30 @@
+import itertools
+import random
+
+import car
+from . import world
+from .harness import benchmark
+
+
+# Creating the context for a message / interaction, as Bot does for every
+# one it handles; compare bytes/op to see what each context costs
+@benchmark('context.TextContext', sizes=('small',))
+def text_context(size: str, rng: random.Random):
+    g = world.guild(size)
+    msgs = itertools.cycle([
+        world.fake().message(g.text_channels[0], m, "]help")
+        for m in rng.sample(g.members, 10)
+    ])
+    bot = world.bot()
+    return lambda: car.TextContext.from_message(bot, next(msgs), "]")
+
+@benchmark('context.SlashContext', sizes=('small',))
+def slash_context(size: str, rng: random.Random):
+    g = world.guild(size)
+    interactions = itertools.cycle([
+        world.fake().interaction(g.text_channels[0], m, 'help')
+        for m in rng.sample(g.members, 10)
+    ])
+    bot = world.bot()
+    return lambda: car.SlashContext.from_interaction(bot,
+                                                     next(interactions))
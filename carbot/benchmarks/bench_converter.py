@@ -0,0 +1,86 @@
+import itertools
+import random
+from typing import Any, Callable
+
+import car
+from . import world
+from .harness import benchmark
+
+
+def _cycling(converter: car.Converter, ctx: car.Context, values: list[Any]
+             ) -> Callable:
+    it = itertools.cycle(values)
+    return lambda: converter.convert(ctx, next(it))
+
+# a name with a character dropped, so that it has to be fuzzy matched
+def _typo(name: str, rng: random.Random) -> str:
+    if len(name) < 3:
+        return name
+    i = rng.randrange(len(name))
+    return name[:i] + name[i+1:]
+
+
+# converters of plain values don't depend on guild size
+SCALAR_CONVERTERS: dict[str, tuple[car.Converter, list[str]]] = {
+    'ToInt': (car.ToInt(), ['1', '-42', '1234567']),
+    'ToFloat': (car.ToFloat(), ['1.5', '-3', '22/7']),
+    'ToString': (car.ToString(), ['hello', 'hello world']),
+    'ToSeconds': (car.ToSeconds(), ['90', '1:30', '1:02:03.5']),
+    'ToURL': (car.ToURL(), ['example.com',
+                            'https://www.youtube.com/watch?v=a']),
+    'ToBool': (car.ToBool(), ['yes', 'n', 'true', '0']),
+    'FromChoices': (car.FromChoices({'a': 1, 'b': 2, 'c': 3}),
+                    ['a', 'b', 'c']),
+    'InRange': (car.InRange(0, 100), [0, 50, 100]),
+}
+
+def _scalar(name: str):
+    converter, values = SCALAR_CONVERTERS[name]
+
+    def factory(size: str, rng: random.Random):
+        return _cycling(converter, world.text_context('small'), values)
+    return factory
+
+for _name in SCALAR_CONVERTERS:
+    benchmark(f'converter.{_name}', sizes=('small',))(_scalar(_name))
+
+
+@benchmark('converter.ToMember')
+def to_member(size: str, rng: random.Random):
+    members = world.guild(size).members
+    values = []
+    for m in rng.sample(members, 10):
+        values += [m.mention, m.name, _typo(m.display_name, rng)]
+    return _cycling(car.ToMember(), world.text_context(size), values)
+
+@benchmark('converter.ToRole')
+def to_role(size: str, rng: random.Random):
+    roles = world.guild(size).roles[1:]
+    values = []
+    for r in rng.sample(roles, 10):
+        values += [r.mention, r.name, _typo(r.name, rng)]
+    return _cycling(car.ToRole(), world.text_context(size), values)
+
+@benchmark('converter.ToTextChannel')
+def to_text_channel(size: str, rng: random.Random):
+    channels = world.guild(size).text_channels
+    values = []
+    for c in rng.sample(channels, 5):
+        values += [c.mention, c.name, _typo(c.name, rng)]
+    return _cycling(car.ToTextChannel(), world.text_context(size), values)
+
+@benchmark('converter.ToVoiceChannel')
+def to_voice_channel(size: str, rng: random.Random):
+    channels = world.guild(size).voice_channels
+    values = []
+    for c in rng.sample(channels, 5):
+        values += [str(c.id), c.name, _typo(c.name, rng)]
+    return _cycling(car.ToVoiceChannel(), world.text_context(size), values)
+
+@benchmark('converter.ToEmote')
+def to_emote(size: str, rng: random.Random):
+    emojis = world.guild(size).emojis
+    values = []
+    for e in rng.sample(emojis, 5):
+        values += [str(e), e.name, _typo(e.name, rng)]
+    return _cycling(car.ToEmote(), world.text_context(size), values)
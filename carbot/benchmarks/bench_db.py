@@ -0,0 +1,41 @@
+import itertools
+import random
+import sqlite3
+
+from car import DBColumn, DBTable
+from .harness import benchmark
+
+
+ROWS = {'small': 100, 'medium': 10000, 'large': 100000}
+
+
+# a table shaped like the bot's guild_settings, filled with `size` rows
+def _table(size: str) -> DBTable:
+    table = DBTable(sqlite3.connect(':memory:'), 'settings', (
+        DBColumn('guild_id', 0, is_primary=True),
+        DBColumn('prefix', "]"),
+        DBColumn('message_enabled', False),
+        DBColumn('message', ""),
+        DBColumn('channel', 0),
+        DBColumn('stars', 3),
+        DBColumn('roles', [])
+    ))
+    table.con.executemany(
+        f"INSERT INTO {table.name} VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((i, "]", 0, "", 0, 3, "[]") for i in range(ROWS[size])))
+    table.con.commit()
+    return table
+
+
+@benchmark('db.select')
+def select(size: str, rng: random.Random):
+    table = _table(size)
+    keys = itertools.cycle([rng.randrange(ROWS[size]) for _ in range(1000)])
+    return lambda: table.select('prefix', 'where guild_id=?', (next(keys),))
+
+@benchmark('db.insert')
+def insert(size: str, rng: random.Random):
+    table = _table(size)
+    keys = itertools.count(ROWS[size])
+    return lambda: table.insert(guild_id=next(keys), prefix="!",
+                                roles=[1, 2, 3])
@@ -0,0 +1,101 @@
+import itertools
+import random
+from typing import Callable
+
+import car
+from . import world
+from .bench_command import COMMANDS, BenchCog
+from .harness import benchmark
+
+
+def _content(size: str, rng: random.Random) -> str:
+    g = world.guild(size)
+    member = rng.choice(g.members)
+    if size == 'small':
+        return str(rng.randrange(1000))
+    if size == 'medium':
+        return f'{member.name} {rng.randint(1, 100)} yes -reason "no reason"'
+    role = rng.choice(g.roles[1:])
+    channel = rng.choice(g.text_channels)
+    return (f'{member.mention} "{role.name}" {channel.name} '
+            f'{rng.randint(1, 1000)} 0.5 1:30 fast n example.com '
+            f'the rest of the message "is collected"')
+
+
+# Runs a text command from its message content, through checks, argument
+# parsing and conversion to sending the response (to a FakeDiscord), at
+# the command's size in a guild of the same size
+@benchmark('cog_handler.run_command_text')
+def run_command_text(size: str, rng: random.Random):
+    bot = world.bot()
+    fake = world.fake()
+    if 'BenchCog' not in bot.cog_handler.cog_classes:
+        bot.cog_handler.add_cog_class(BenchCog)
+        bot.cog_handler.load_cog('BenchCog')
+    cmd = COMMANDS[size]
+    contents = itertools.cycle([_content(size, rng) for _ in range(10)])
+
+    async def op():
+        ctx = world.text_context(size)
+        await bot.cog_handler.run_command_text(ctx, cmd, next(contents))
+        fake.clear()
+    return op
+
+
+# ]help and /help for a command, in the small guild and in DMs (where the
+# render cache has no guild to key help by, and the listed commands' checks
+# have no member to check)
+@benchmark('meta.help', sizes=('small',))
+def help_guild(size: str, rng: random.Random):
+    return _help(lambda: world.text_context(size))
+
+@benchmark('meta.help_dm', sizes=('small',))
+def help_dm(size: str, rng: random.Random):
+    return _help(world.dm_context)
+
+@benchmark('meta.help_list_dm', sizes=('small',))
+def help_list_dm(size: str, rng: random.Random):
+    return _help(world.dm_context, "", "Text Command List")
+
+@benchmark('meta.slash_help_dm', sizes=('small',))
+def slash_help_dm(size: str, rng: random.Random):
+    bot = _meta_bot()
+    fake = world.fake()
+    user, channel = world.dm_user()
+    option = {'name': 'command', 'type': car.OptionType.STRING,
+              'value': 'ping'}
+
+    async def op():
+        interaction = fake.interaction(channel, user, 'help', [option])
+        ctx = car.SlashContext.from_interaction(bot, interaction)
+        await bot.cog_handler.run_command_slash(
+            ctx, interaction.data) # type: ignore[arg-type]
+        _check_help(fake.sent[-1], "Slash command: ping")
+        fake.clear()
+    return op
+
+# fails the benchmark if the command errored instead of responding
+def _check_help(body: dict, title: str) -> None:
+    assert body['embeds'][0].get('title') == title, body
+
+# Meta, and cogs with commands that check permissions and clearance
+def _meta_bot() -> car.Bot:
+    bot = world.bot()
+    for module_name, cog_name in (('cogs.meta', 'Meta'),
+                                  ('cogs.admin', 'Admin'),
+                                  ('cogs.guild', 'Guild')):
+        if cog_name not in bot.cog_handler.cog_classes:
+            bot.cog_handler.add_cog(module_name, cog_name)
+    return bot
+
+def _help(make_ctx: Callable[[], car.TextContext], content: str = "ping",
+          title: str = "Text command: ping"):
+    bot = _meta_bot()
+    fake = world.fake()
+    cmd = bot.cog_handler.text_commands['help']
+
+    async def op():
+        await bot.cog_handler.run_command_text(make_ctx(), cmd, content)
+        _check_help(fake.sent[-1], title)
+        fake.clear()
+    return op
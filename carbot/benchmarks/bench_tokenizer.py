@@ -0,0 +1,68 @@
+import random
+
+from car import ArgumentLexer, Tokenizer, filter_kwargs
+from .harness import benchmark
+
+
+TOKENS = {'small': 5, 'medium': 50, 'large': 500}
+
+WORDS = ('car', 'bot', 'typing', 'race', 'hello', 'world', '123', '4.5',
+         '<@153240776216805376>', 'https://example.com/a?b=c', 'yes')
+
+
+def _token(rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.6:
+        return rng.choice(WORDS)
+    if r < 0.85: # quoted phrase
+        return '"' + ' '.join(rng.choices(WORDS, k=rng.randint(2, 5))) + '"'
+    # escapes
+    return rng.choice(WORDS) + rng.choice(('\\"', '\\\\', '\\n', '\\x')) \
+        + rng.choice(WORDS)
+
+def text(size: str, rng: random.Random) -> str:
+    return ' '.join(_token(rng) for _ in range(TOKENS[size]))
+
+# text with about one in five tokens being a -name value pair
+def text_with_kwargs(size: str, rng: random.Random) -> str:
+    tokens = []
+    for i in range(TOKENS[size]):
+        if rng.random() < 0.2:
+            tokens.append(f"-kw{i} {_token(rng)}")
+        else:
+            tokens.append(_token(rng))
+    return ' '.join(tokens)
+
+
+@benchmark('tokenizer.next_token')
+def next_token(size: str, rng: random.Random):
+    content = text(size, rng)
+
+    def op():
+        tok = Tokenizer(content)
+        while not tok.is_eof():
+            tok.next_token()
+    return op
+
+@benchmark('tokenizer.tokens')
+def tokens(size: str, rng: random.Random):
+    content = text(size, rng)
+    return lambda: list(Tokenizer(content).tokens())
+
+@benchmark('tokenizer.filter_kwargs')
+def kwargs(size: str, rng: random.Random):
+    content = text_with_kwargs(size, rng)
+    return lambda: filter_kwargs(content)
+
+# what run_command_text does: split off kwargs, then read every positional
+# token with its position in the content
+@benchmark('tokenizer.ArgumentLexer')
+def lexer(size: str, rng: random.Random):
+    content = text_with_kwargs(size, rng)
+
+    def op():
+        lex = ArgumentLexer(content)
+        while not lex.is_eof():
+            start, end, _ = lex.next_span()
+            lex.source_span(start, end)
+    return op
@@ -0,0 +1,94 @@
+# Differential fuzzing of carpp's levenshtein kernels (bit-parallel, banded
+# and bounded) and the fuzzy matchers built on them against the reference
+# DP, carpp.levenshtein_dp:
+#   python -m benchmarks.fuzz_levenshtein [--cases N] [--seed S]
+import argparse
+import random
+import sys
+from typing import Any
+
+import carpp
+
+
+INF = 0x3f3f3f3f
+
+# bounds far beyond any distance, near where the kernels' arithmetic would
+# overflow
+LARGE_MAX_DISTS = (INF - 1, INF, INF + 1, 2**30, 2**31 - 2, 2**31 - 1)
+
+# equal weights, ones where substituting never pays off, and others
+WEIGHTS = ((1, 1, 1), (2, 2, 2), (9, 1, 10), (1, 1, 2), (1, 2, 4),
+           (2, 1, 1), (1, 3, 2))
+
+# mostly similar strings, of lengths around the 64-character blocks
+def random_pair(rng: random.Random) -> tuple[str, str]:
+    alphabet = 'ab' if rng.random() < 0.3 else 'abcdefgh'
+    n = rng.choice((rng.randint(0, 10), rng.randint(55, 140),
+                    rng.randint(0, 300)))
+    s1 = ''.join(rng.choices(alphabet, k=n))
+    s2 = list(s1)
+    for _ in range(rng.randint(0, max(1, n // 4))):
+        i = rng.randrange(len(s2) + 1)
+        s2[i:i+1] = rng.choice(([], [rng.choice(alphabet)],
+                                [rng.choice(alphabet)] + s2[i:i+1]))
+    if rng.random() < 0.5:
+        return s1, ''.join(s2)
+    return ''.join(s2), s1
+
+def reference_fuzzy_match(query: str, against: list[str], amount: int
+                          ) -> list[tuple[int, int]]:
+    dists = sorted((carpp.levenshtein_dp(query, s, 9, 1, 10), i)
+                   for i, s in enumerate(against))
+    return dists[:amount][::-1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compares carpp's levenshtein kernels against the "
+                    "reference DP on random inputs")
+    parser.add_argument('--cases', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failed = 0
+
+    def check(name: str, got: Any, expected: Any) -> None:
+        nonlocal failed
+        if got != expected:
+            failed += 1
+            print(f"{name}:\n  got      {got!r}\n  expected {expected!r}")
+
+    for _ in range(args.cases):
+        s1, s2 = random_pair(rng)
+        w = rng.choice(WEIGHTS)
+        expected = carpp.levenshtein_dp(s1, s2, *w)
+        check(f"levenshtein({s1!r}, {s2!r}, *{w})",
+              carpp.levenshtein(s1, s2, *w), expected)
+
+        max_dist = rng.choice((
+            max(0, expected + rng.randint(-3 * w[2], 3 * w[2])),
+            *LARGE_MAX_DISTS))
+        check(f"levenshtein({s1!r}, {s2!r}, *{w}, max_dist={max_dist})",
+              carpp.levenshtein(s1, s2, *w, max_dist=max_dist),
+              expected if expected <= max_dist else max_dist + 1)
+
+    for _ in range(args.cases // 100):
+        against = [random_pair(rng)[0][:20]
+                   for _ in range(rng.randint(0, 50))]
+        query = random_pair(rng)[0][:20]
+        amount = rng.randint(1, 10)
+        check(f"fuzzy_match({query!r}, {against!r}, {amount})",
+              carpp.fuzzy_match(query, against, amount),
+              reference_fuzzy_match(query, against, amount))
+        best = reference_fuzzy_match(query, against, 1)
+        check(f"fuzzy_match_one({query!r}, {against!r})",
+              carpp.fuzzy_match_one(query, against),
+              best[0] if best else (INF, -1))
+
+    print(f"{args.cases} cases, {failed} mismatches")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
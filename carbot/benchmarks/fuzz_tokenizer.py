@@ -0,0 +1,145 @@
+# Differential fuzzing of car.tokenizer against the original character by
+# character implementation, which is kept here as the reference:
+#   python -m benchmarks.fuzz_tokenizer [--cases N] [--seed S]
+import argparse
+import random
+import sys
+from typing import Any, Callable, Optional
+
+import car
+
+
+class ReferenceTokenizer:
+    def __init__(self, text: str):
+        self.text = text
+        self.index: int = 0
+        self.word: list[str] = []
+
+    def _add_char(self) -> None:
+        if self.text[self.index] == '\\' and self.index < len(self.text)-1:
+            match self.text[self.index + 1]:
+                case '\\' | '"' as escaped:
+                    self.word.append(escaped)
+                case 'n':
+                    self.word.append('\n')
+                case _ as escaped:
+                    self.word.append('\\' + escaped)
+            self.index += 1
+        else:
+            self.word.append(self.text[self.index])
+
+    def _skip_spaces(self) -> None:
+        while self.index < len(self.text) and self.text[self.index] == ' ':
+            self.index += 1
+
+    def next_token(self, index: Optional[int] = None) -> str:
+        if index is not None:
+            self.index = index
+        quoted: bool = False
+
+        self._skip_spaces()
+
+        while self.index < len(self.text) and \
+                (quoted or self.text[self.index] != ' '):
+
+            if self.text[self.index] == '"':
+                quoted = not quoted
+            else:
+                self._add_char()
+
+            self.index += 1
+
+        res = ''.join(self.word)
+        self.word = []
+
+        return res
+
+    def is_eof(self) -> bool:
+        self._skip_spaces()
+        return self.index >= len(self.text)
+
+    def get_remaining(self) -> str:
+        return self.text[self.index:].strip()
+
+
+def reference_filter_kwargs(content: str) -> tuple[str, dict[str, str]]:
+    spl = []
+    kwargs: dict[str, str] = {}
+    quoted = False
+    content = " " + content
+    tok = ReferenceTokenizer(content)
+
+    i = 0
+    while i < len(content):
+        if content[i] == '"':
+            quoted = not quoted
+
+        if (not quoted) and i < len(content)-3 and content[i:i+2] == ' -':
+            name = tok.next_token(i+2)
+            if tok.is_eof():
+                raise car.CheckError(
+                    f"You didn't give kwarg `-{name}` a value!")
+            kwargs[name] = tok.next_token()
+            i = tok.index
+        else:
+            spl.append(content[i])
+            i += 1
+
+    return (''.join(spl).strip(), kwargs)
+
+
+# inputs made mostly of the characters the tokenizer treats specially
+PIECES = (' ', ' ', '  ', '"', '\\', '\\"', '\\\\', '\\n', '\\x', '-', ' -',
+          'a', 'bc', 'word', 'é', '\n', '\t')
+
+def random_text(rng: random.Random) -> str:
+    return ''.join(rng.choices(PIECES, k=rng.randint(0, 30)))
+
+# the outcome of a tokenizer on text: every (token, index, is_eof) and the
+# remaining text after each token
+def tokenize(make: Callable[[str], Any], text: str) -> list[Any]:
+    tok = make(text)
+    out = []
+    while not tok.is_eof():
+        out.append((tok.next_token(), tok.index, tok.get_remaining()))
+    out.append(tok.index)
+    return out
+
+def outcome(func: Callable[[str], Any], text: str) -> Any:
+    try:
+        return func(text)
+    except car.CarException as e:
+        return (type(e), e.error_msg)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compares car.tokenizer against a reference "
+                    "implementation on random inputs")
+    parser.add_argument('--cases', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checks: dict[str, tuple[Callable[[str], Any], Callable[[str], Any]]] = {
+        'Tokenizer': (lambda t: tokenize(car.Tokenizer, t),
+                      lambda t: tokenize(ReferenceTokenizer, t)),
+        'filter_kwargs': (car.filter_kwargs, reference_filter_kwargs),
+    }
+
+    failed = 0
+    for _ in range(args.cases):
+        text = random_text(rng)
+        for name, (func, reference) in checks.items():
+            got, expected = outcome(func, text), outcome(reference, text)
+            if got != expected:
+                failed += 1
+                print(f"{name}({text!r}):\n  got      {got!r}\n"
+                      f"  expected {expected!r}")
+
+    print(f"{args.cases} cases, {failed} mismatches")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
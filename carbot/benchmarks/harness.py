@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+import gc
+import inspect
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Optional, Union
+
+
+__all__ = [
+    'SIZES',
+    'Benchmark',
+    'Result',
+    'benchmark',
+    'change',
+    'registry',
+    'run_benchmark',
+    'compare',
+    'load_baseline',
+    'save_baseline'
+]
+
+
+SIZES = ('small', 'medium', 'large')
+
+# builds the inputs for one size and returns the operation to time, which
+# may return an awaitable (and is then awaited)
+Op = Callable[[], Union[Any, Awaitable[Any]]]
+Factory = Callable[[str, random.Random], Op]
+
+
+class Benchmark:
+    def __init__(self, name: str, factory: Factory,
+                 sizes: tuple[str, ...] = SIZES):
+        self.name = name
+        self.factory = factory
+        self.sizes = sizes
+
+    def key(self, size: str) -> str:
+        return f"{self.name}[{size}]"
+
+    # inputs only depend on the benchmark's name and size
+    def rng(self, size: str) -> random.Random:
+        return random.Random(self.key(size))
+
+
+registry: list[Benchmark] = []
+
+def benchmark(name: str, *, sizes: tuple[str, ...] = SIZES):
+    def decorator(factory: Factory) -> Factory:
+        registry.append(Benchmark(name, factory, sizes))
+        return factory
+    return decorator
+
+
+class Result:
+    def __init__(self, ops_per_sec: float, peak_bytes: float,
+                 retained_blocks: float):
+        self.ops_per_sec = ops_per_sec
+        # the most memory one op had allocated at once, i.e. its transient
+        # allocations (averaged over a few ops)
+        self.peak_bytes = peak_bytes
+        # blocks still allocated after an op (caches, leaks), per op
+        self.retained_blocks = retained_blocks
+
+    def to_json(self) -> dict[str, float]:
+        return {'ops_per_sec': self.ops_per_sec,
+                'peak_bytes': self.peak_bytes,
+                'retained_blocks': self.retained_blocks}
+
+    @classmethod
+    def from_json(cls, data: dict[str, float]) -> 'Result':
+        return cls(data['ops_per_sec'], data['peak_bytes'],
+                   data['retained_blocks'])
+
+
+async def _run_async(op: Op, n: int) -> None:
+    for _ in range(n):
+        await op() # type: ignore[misc]
+
+def _run_sync(op: Op, n: int) -> None:
+    for _ in range(n):
+        op()
+
+
+class _Runner:
+    def __init__(self, op: Op, loop: asyncio.AbstractEventLoop):
+        self.op = op
+        self.loop = loop
+        first = op()
+        self.is_async = inspect.isawaitable(first)
+        if self.is_async:
+            loop.run_until_complete(first) # type: ignore[arg-type]
+
+    def run(self, n: int) -> float:
+        bef = time.perf_counter()
+        if self.is_async:
+            self.loop.run_until_complete(_run_async(self.op, n))
+        else:
+            _run_sync(self.op, n)
+        return time.perf_counter() - bef
+
+    def peak_bytes(self, samples: int) -> float:
+        total = 0
+        tracemalloc.start()
+        try:
+            for _ in range(samples):
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self.run(1)
+                _, peak = tracemalloc.get_traced_memory()
+                total += max(0, peak - current)
+        finally:
+            tracemalloc.stop()
+        return total / samples
+
+
+# Times an op in batches sized to take about min_time each and keeps the
+# best of `repeat` batches (the least disturbed by the rest of the system)
+def run_benchmark(op: Op, loop: asyncio.AbstractEventLoop, *,
+                  min_time: float = 0.2, repeat: int = 5,
+                  alloc_samples: int = 20) -> Result:
+    # converters and commands may print; that's part of their cost, but not
+    # of the output
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner = _Runner(op, loop)
+
+        n = 1
+        while (elapsed := runner.run(n)) < min_time / 10:
+            n *= 10
+        n = max(1, int(n * min_time / elapsed))
+
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        best = min(runner.run(n) for _ in range(repeat))
+        gc.collect()
+        retained = (sys.getallocatedblocks() - blocks) / (n*repeat)
+
+        peak = runner.peak_bytes(alloc_samples)
+
+    return Result(n / best, peak, retained)
+
+
+def load_baseline(path: str) -> dict[str, Result]:
+    with open(path) as f:
+        return {k: Result.from_json(v) for k, v in json.load(f).items()}
+
+def save_baseline(path: str, results: dict[str, Result]) -> None:
+    with open(path, 'w') as f:
+        json.dump({k: v.to_json() for k, v in sorted(results.items())}, f,
+                  indent=2)
+        f.write('\n')
+
+
+# Descriptions of results that are more than threshold percent slower, or
+# allocate more than threshold percent more, than their baselines.
+# Differences of less than min_bytes are ignored for allocations, since
+# small ones are mostly noise.
+def compare(results: dict[str, Result], baseline: dict[str, Result], *,
+            threshold: float, min_bytes: int = 256) -> list[str]:
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        slower = (base.ops_per_sec - res.ops_per_sec) / base.ops_per_sec*100
+        if slower > threshold:
+            regressions.append(
+                f"{key}: {res.ops_per_sec:.4g} ops/s is {slower:.1f}% "
+                f"slower than the baseline ({base.ops_per_sec:.4g} ops/s)")
+
+        grown = res.peak_bytes - base.peak_bytes
+        if grown > min_bytes and base.peak_bytes > 0 \
+                and grown / base.peak_bytes*100 > threshold:
+            regressions.append(
+                f"{key}: {res.peak_bytes:.0f} bytes/op is "
+                f"{grown / base.peak_bytes*100:.1f}% more than the baseline "
+                f"({base.peak_bytes:.0f} bytes/op)")
+    return regressions
+
+
+def change(res: Result, base: Optional[Result]) -> str:
+    if base is None:
+        return ""
+    pct = (res.ops_per_sec - base.ops_per_sec) / base.ops_per_sec*100
+    return f"{pct:+.1f}%"
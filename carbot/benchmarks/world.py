@@ -0,0 +1,67 @@
+from typing import Any
+import discord
+
+import car
+from car.testing import FakeDiscord
+
+
+__all__ = [
+    'GUILD_SIZES',
+    'bot',
+    'dm_context',
+    'dm_user',
+    'fake',
+    'guild',
+    'text_context'
+]
+
+
+GUILD_SIZES: dict[str, dict[str, Any]] = {
+    'small': dict(members=100, roles=10, text_channels=5,
+                  voice_channels=5, emojis=5),
+    'medium': dict(members=10000, roles=100, text_channels=50,
+                   voice_channels=20, emojis=50),
+    'large': dict(members=250000, roles=500, text_channels=200,
+                  voice_channels=50, emojis=200),
+}
+
+_bot: car.Bot | None = None
+_fake: FakeDiscord | None = None
+_guilds: dict[str, discord.Guild] = {}
+
+
+# One bot (with an in-memory database) for every benchmark, connected to
+# a FakeDiscord; guilds are generated the first time a size is used
+def bot() -> car.Bot:
+    global _bot, _fake
+    if _bot is None:
+        _bot = car.Bot(db_path=':memory:', edit_interval=0,
+                       send_queue_delay=0)
+        _fake = FakeDiscord(_bot, seed=0)
+    return _bot
+
+def fake() -> FakeDiscord:
+    bot()
+    assert _fake is not None
+    return _fake
+
+def guild(size: str) -> discord.Guild:
+    if size not in _guilds:
+        _guilds[size] = fake().guild(**GUILD_SIZES[size])
+    return _guilds[size]
+
+def text_context(size: str, content: str = "") -> car.TextContext:
+    g = guild(size)
+    # members[0] is the owner, who passes every permission check
+    msg = fake().message(g.text_channels[0], g.members[0], content)
+    return car.TextContext.from_message(bot(), msg, "]")
+
+# a guild member's user and their DM channel with the bot
+def dm_user() -> tuple[discord.User, discord.DMChannel]:
+    user = guild('small').members[1]._user
+    return user, fake().dm_channel(user)
+
+def dm_context(content: str = "") -> car.TextContext:
+    user, channel = dm_user()
+    msg = fake().message(channel, user, content)
+    return car.TextContext.from_message(bot(), msg, "]")
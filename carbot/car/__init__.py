@@ -5,12 +5,26 @@ from .cog import *
 from .cog_handler import *
 from .context import *
 from .command import *
+from .concurrency import *
 from .constants import *
 from .converter import *
 from .db import *
+from .edits import *
 from .enums import *
 from .exception import *
+from .http import *
 from .listener import *
+from .manifest import *
+from .member_index import *
+from .metric import *
+from .monitor import *
+from .offload import *
+from .ratelimit import *
+from .recorder import *
+from .send_queue import *
+from .registry_cache import *
+from .render_cache import *
+from .sharding import *
 from .tokenizer import *
 from .util import *
 
@@ -1,15 +1,23 @@
-from typing import Optional, Union, Any, Type, overload, get_args, get_origin
+from typing import (
+    Optional, Union, Any, Type, overload, get_args, get_origin, TYPE_CHECKING
+)
+import asyncio
 import inspect
 import discord
 from loguru import logger
 
 from .converter import Converter, default_converters
 from .enums import OptionType
+from .exception import ArgumentError
 from .util import join_last, without_md_formatting
+if TYPE_CHECKING:
+    from .context import Context
 
 
 __all__ = [
     'Argument',
+    'ConversionBatch',
+    'SlashArgumentPlan'
 ]
 
 
@@ -117,3 +125,96 @@ class Argument:
 
         return data
 
+
+# Converts the raw values of one invocation's arguments into ctx.args, in
+# order. Pure converters convert each raw value only once, and if more than
+# one of them offloads (see Converter), those start at the same time, so that
+# e.g. two members of a large guild are fuzzy matched side by side. Raises
+# the error of the first argument that fails to convert, with its name as
+# the highlight
+class ConversionBatch:
+    def __init__(self, ctx: 'Context', *, slash: bool = False):
+        self.ctx = ctx
+        self.slash = slash
+        self.items: list[tuple[str, Converter, Any]] = []
+
+    def add(self, name: str, converter: Converter, val: Any) -> None:
+        self.items.append((name, converter, val))
+
+    async def _convert(self, converter: Converter, val: Any) -> Any:
+        if self.slash:
+            return await converter.convert_slash(self.ctx, val)
+        return await converter.convert(self.ctx, val)
+
+    def _key(self, converter: Converter, val: Any
+             ) -> Optional[tuple[Converter, Any]]:
+        if not converter.pure:
+            return None
+        try:
+            hash(val)
+        except TypeError:
+            return None
+        return (converter, val)
+
+    async def run(self) -> None:
+        keys = [self._key(converter, val) for _, converter, val in self.items]
+        offloading = {key for key, (_, converter, _) in zip(keys, self.items)
+                      if key is not None and converter.offloads(self.ctx)}
+        tasks: dict[tuple[Converter, Any], asyncio.Task] = {}
+        if len(offloading) > 1:
+            tasks = {key: asyncio.create_task(self._convert(*key))
+                     for key in offloading}
+        memo: dict[tuple[Converter, Any], Any] = {}
+
+        try:
+            for key, (name, converter, val) in zip(keys, self.items):
+                self.ctx.args[name] = val
+                try:
+                    if key is None:
+                        converted = await self._convert(converter, val)
+                    elif key in tasks:
+                        converted = await tasks[key]
+                    elif key in memo:
+                        converted = memo[key]
+                    else:
+                        converted = memo[key] = await self._convert(
+                            converter, val)
+                except ArgumentError as e:
+                    e.highlight = name
+                    raise e
+                self.ctx.args[name] = converted
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception() # retrieved, so it isn't logged
+
+
+# Prebuilt from a SlashCommand's arguments; turns the 'options' list of an
+# interaction into ctx.args. Optional arguments that weren't given are left
+# out so the command's own defaults apply.
+class SlashArgumentPlan:
+    def __init__(self, args: dict[str, Argument]):
+        self.order = tuple(args)
+        self.required = frozenset(arg.name for arg in args.values()
+                                  if arg.required)
+        self.converters = {arg.name: arg.converter for arg in args.values()}
+
+    async def resolve(self, ctx: 'Context', options: list[dict[str, Any]]
+                      ) -> None:
+        values = {opt['name']: opt['value'] for opt in options
+                  if 'value' in opt}
+
+        if not self.required.issubset(values):
+            missing = next(name for name in self.order
+                           if name in self.required and name not in values)
+            raise ArgumentError("I am missing this argument!", missing)
+
+        batch = ConversionBatch(ctx, slash=True)
+        for name, val in values.items():
+            converter = self.converters.get(name)
+            if converter is None: # stale slash command list
+                continue
+            batch.add(name, converter, val)
+        await batch.run()
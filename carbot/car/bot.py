@@ -2,12 +2,22 @@ import discord
 import asyncio
 import json
 import sqlite3
+from typing import Any, Optional
 from loguru import logger
 
 from .cog_handler import CogHandler
 from .context import TextContext, SlashContext
 from .db import DBTable, DBColumn
+from .edits import EditScheduler
 from .enums import CommandType, ClearanceLevel
+from .http import HTTPClient
+from .member_index import MemberIndex
+from .monitor import LoopMonitor
+from .offload import offloader
+from .ratelimit import rate_limits
+from .recorder import EventRecorder
+from .send_queue import SendQueue
+from .sharding import ShardIPC
 
 
 __all__ = [
@@ -23,8 +33,44 @@ class Bot(discord.Client):
         self.debug: bool = kwargs.get('debug', False)
 
         self.cog_handler = CogHandler(self, debug=self.debug)
+        self.loop_monitor = LoopMonitor(
+            self.cog_handler,
+            threshold=kwargs.get('lag_threshold', 0.25)
+        )
 
-        self.con = sqlite3.connect('car.db')
+        rate_limits.install()
+        self.edit_scheduler = EditScheduler(
+            min_interval=kwargs.get('edit_interval', 1.0))
+        self.send_queue = SendQueue(
+            max_delay=kwargs.get('send_queue_delay', 1.0))
+        # members of every guild by name, for ToMember
+        self.member_index = MemberIndex()
+        self.member_index.install(self)
+        # for requests to anything other than discord (self.http is
+        # discord.py's client)
+        self.web = HTTPClient()
+
+        # set when running as one of several shard processes (see
+        # ShardSupervisor)
+        self.ipc: Optional[ShardIPC] = kwargs.get('ipc')
+        if self.ipc is not None:
+            self.ipc.add_handler('stats', lambda _: self.shard_stats())
+            self.ipc.add_handler('reload_cog', self._ipc_reload_cog)
+
+        # gateway events are written to this JSONL file for replaying
+        # (see car.testing.replay)
+        self.recorder: Optional[EventRecorder] = None
+        if kwargs.get('record_events') is not None:
+            self.recorder = EventRecorder(kwargs['record_events'],
+                                          prefix_of=self.guild_prefix)
+            self.recorder.install(self)
+
+        # shard processes share car.db; WAL lets readers run alongside a
+        # writer, and the timeout makes writers wait for each other instead
+        # of failing with 'database is locked'
+        self.con = sqlite3.connect(kwargs.get('db_path', 'car.db'),
+                                   timeout=30)
+        self.con.execute('PRAGMA journal_mode=WAL')
         self.guild_settings = DBTable(self.con, 'guild_settings', (
             DBColumn('guild_id', 0, is_primary=True),
             DBColumn('prefix', "]"),
@@ -49,6 +95,33 @@ class Bot(discord.Client):
         self.user_admin.insert(user_id=153240776216805376,
                                clearance=ClearanceLevel.ADMIN)
 
+        # last slash command list synced to each scope ('global' or
+        # 'guild:<id>'), as canonical JSON
+        self.slash_sync = DBTable(self.con, 'slash_sync', (
+            DBColumn('scope', "", is_primary=True),
+            DBColumn('hash', ""),
+            DBColumn('commands', "[]")
+        ))
+
+    # the text command prefix in a guild (or DMs, if guild_id is None)
+    def guild_prefix(self, guild_id: Optional[int]) -> str:
+        if guild_id is None or guild_id not in self.guild_settings:
+            return "]"
+        return self.guild_settings.select('prefix', 'where guild_id=?',
+                                          (guild_id,))
+
+    def shard_stats(self) -> dict[str, Any]:
+        return {
+            'shard_id': self.shard_id or 0,
+            'guilds': len(self.guilds),
+            'members': sum(g.member_count or 0 for g in self.guilds),
+            'latency': self.latency
+        }
+
+    def _ipc_reload_cog(self, cog_name: str) -> bool:
+        self.cog_handler.reload_cog(cog_name)
+        return True
+
     async def process_message(self, msg: discord.Message) -> None:
         if not isinstance(msg.channel, (discord.TextChannel,
                                         discord.DMChannel)):
@@ -82,9 +155,7 @@ class Bot(discord.Client):
             idx = len(msg.content)
         name = msg.content[len(prefix) : idx]
 
-        cmd = self.cog_handler.text_commands.get(
-            name, self.cog_handler.text_aliases.get(name)
-        )
+        cmd = self.cog_handler.get_text_command(name)
         if cmd is None:
             return
 
@@ -121,11 +192,27 @@ class Bot(discord.Client):
             return
         logger.success(f"Logged in as {self.user.name}#"
                        f"{self.user.discriminator} (id: {self.user.id})")
+        self.member_index.build(self.guilds)
 
     # called by discord.Client whenever an event occurs
     def dispatch(self, event, *args, **kwargs):
+        self.member_index.handle(event, args)
         super().dispatch(event, *args, **kwargs)
-        self.cog_handler.run_listeners('on_' + event, args, kwargs)
+        self.cog_handler.run_listeners(event, args, kwargs)
+
+    async def start(self, *args, **kwargs) -> None:
+        self.loop_monitor.start()
+        if self.ipc is not None:
+            self.ipc.start()
+        await super().start(*args, **kwargs)
+
+    async def close(self) -> None:
+        self.loop_monitor.stop()
+        offloader.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
+        await self.web.close()
+        await super().close()
 
     def run(self, *args, **kwargs) -> None:
         logger.info("Logging in...")
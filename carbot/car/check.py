@@ -1,6 +1,8 @@
 from abc import ABCMeta, abstractmethod
 from types import FunctionType
-from typing import Any, Awaitable, Callable, Optional, TYPE_CHECKING, Union
+from typing import (
+    Any, Awaitable, Callable, Hashable, Optional, TYPE_CHECKING, Union
+)
 import discord
 from loguru import logger
 
@@ -43,12 +45,21 @@ class Check(metaclass=ABCMeta):
     def modify_func(self, func: Callable[..., Awaitable[Any]]) -> None:
         pass
 
+    # The part of ctx that the outcome of every check of this class depends
+    # on (not just this instance's), so that results can be cached per
+    # caller; None if it can't be cached
+    def signature(self, ctx: 'Context') -> Optional[Hashable]:
+        return None
+
 
 class RequiresPermissions(Check):
     def __init__(self, permissions: dict[str, bool]):
         self.permissions = permissions
 
     def get_missing(self, ctx: 'Context') -> list[str]:
+        # there are no guild permissions to have outside of a guild
+        if ctx.is_dm():
+            return list(self.permissions)
         if isinstance(ctx.channel, discord.PartialMessageable):
             logger.error(
                 f"Non-guild-only command requires permissions ({ctx})")
@@ -75,6 +86,12 @@ class RequiresPermissions(Check):
                         for p in self.permissions)
         )
 
+    def signature(self, ctx: 'Context') -> Optional[Hashable]:
+        if ctx.is_dm() or isinstance(ctx.channel,
+                                     discord.PartialMessageable):
+            return None
+        return ctx.channel.permissions_for(ctx.author).value
+
 
 class GuildOnly(Check):
     def check(self, ctx: 'Context') -> None:
@@ -84,6 +101,9 @@ class GuildOnly(Check):
     def desc(self, ctx: 'Context') -> str:
         return f"{self.emote(not ctx.is_dm())} Must be used in a server"
 
+    def signature(self, ctx: 'Context') -> Optional[Hashable]:
+        return ctx.is_dm()
+
 
 class SpecificGuildOnly(Check):
     def __init__(self, guild_id: int):
@@ -101,6 +121,9 @@ class SpecificGuildOnly(Check):
         else:
             return f"{self.EMOTE_YES} Is available in this server"
 
+    def signature(self, ctx: 'Context') -> Optional[Hashable]:
+        return 0 if ctx.is_dm() else ctx.guild.id
+
     def modify_func(self, func: Callable[..., Awaitable[Any]]):
         func._car_guild_id = self.guild_id # type: ignore[attr-defined]
 
@@ -109,24 +132,24 @@ class RequiresClearance(Check):
     def __init__(self, level: int):
         self.level = level
 
-    def check(self, ctx: 'Context') -> None:
-        if ctx.author.id not in ctx.bot.user_admin:
-            ctx.bot.user_admin.insert(user_id=ctx.author.id)
+    def clearance(self, ctx: 'Context') -> int:
+        if ctx.author_user.id not in ctx.bot.user_admin:
+            ctx.bot.user_admin.insert(user_id=ctx.author_user.id)
 
-        if ctx.bot.user_admin.select('clearance', "where user_id=?",
-                                     (ctx.author.id,)) < self.level:
+        return ctx.bot.user_admin.select('clearance', "where user_id=?",
+                                         (ctx.author_user.id,))
+
+    def check(self, ctx: 'Context') -> None:
+        if self.clearance(ctx) < self.level:
             raise CheckError("You aren't allowed to use this command!")
 
     def desc(self, ctx: 'Context') -> str:
-        if ctx.author.id not in ctx.bot.user_admin:
-            ctx.bot.user_admin.insert(user_id=ctx.author.id)
-
-        emote = self.emote(
-            ctx.bot.user_admin.select('clearance', "where user_id=?",
-                                      (ctx.author.id,)) >= self.level)
-
+        emote = self.emote(self.clearance(ctx) >= self.level)
         return f"{emote} Requires special permissions"
 
+    def signature(self, ctx: 'Context') -> Optional[Hashable]:
+        return self.clearance(ctx)
+
 
 def add_check(check: Check) -> Callable:
     def decorator(func: Optional[Callable[..., Awaitable[Any]]] = None):
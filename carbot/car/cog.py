@@ -1,5 +1,5 @@
 import inspect
-from typing import Callable, Optional, Type, TYPE_CHECKING
+from typing import Any, Callable, Optional, Type, TYPE_CHECKING
 
 from .command import Command, TextCommand, SlashCommand, MixedCommandContainer
 from .listener import Listener
@@ -31,6 +31,15 @@ class Cog:
                 obj.parent = self
                 self.listeners.append(obj)
 
+    # Called on the old instance when the cog is hot reloaded; the result is
+    # passed to import_state of the new instance. Override these to carry
+    # live state (voice sessions, caches, ...) across reloads
+    def export_state(self) -> dict[str, Any]:
+        return {}
+
+    def import_state(self, state: dict[str, Any]) -> None:
+        pass
+
     def _add_command(self, cmd: Command):
         if cmd.category == "Uncategorized":
             cmd.category = self.category
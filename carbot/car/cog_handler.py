@@ -1,18 +1,29 @@
 import asyncio
-from typing import Any, Type, Union, TYPE_CHECKING
+import hashlib
+import importlib
+import sys
+import time
+from typing import Any, Optional, Type, Union, TYPE_CHECKING
 import json
-import requests
 import discord
 from loguru import logger
 
+from .argument import ConversionBatch
 from .cog import Cog
 from .command import Command, TextCommand, SlashCommand
 from .context import Context, SlashContext, TextContext
+from .enums import OptionType
 from .exception import (
     CogError, CheckError, CommandError, ArgumentError, CarException
 )
+from .http import HTTPError, HTTPResponse
 from .listener import Listener
-from .tokenizer import Tokenizer, filter_kwargs
+from .manifest import CogManifest, ManifestCommand
+from .metric import metrics
+from .registry_cache import registry_cache
+from .render_cache import render_cache
+from .tokenizer import ArgumentLexer
+from .util import rss_bytes
 if TYPE_CHECKING:
     from .bot import Bot
 
@@ -20,15 +31,39 @@ __all__ = [
     'CogHandler'
 ]
 
+API_BASE = "https://discord.com/api/v8"
+DEBUG_GUILD_ID = 495327409487478785
+
 
 class CogHandler:
     def __init__(self, bot: 'Bot', *, debug=False):
         self.cog_classes: dict[str, Type[Cog]] = {}
         self.cogs: dict[str, Cog] = {}
         self.slash_commands: dict[str, SlashCommand] = {}
+        # top-level slash commands by name; subcommands are routed through
+        # SlashCommand.subcommand_routes
+        self.slash_routes: dict[str, SlashCommand] = {}
         self.text_commands: dict[str, TextCommand] = {}
         self.text_aliases: dict[str, TextCommand] = {}
         self.listeners: dict[str, dict[str, Listener]] = {}
+        # gateway event name -> listeners; rebuilt on every (un)load
+        self.dispatch_table: dict[str, tuple[Listener, ...]] = {}
+
+        # cogs that are only imported once one of their commands or
+        # listeners is needed
+        self.lazy_cogs: dict[str, CogManifest] = {}
+        self.lazy_text_commands: dict[str, str] = {} # name/alias -> cog
+        self.lazy_slash_commands: dict[str, str] = {} # top-level name -> cog
+        self.lazy_events: dict[str, set[str]] = {} # event -> cogs
+        self.import_seconds: float = 0
+
+        # what help lists: the loaded commands, and the commands of lazy cogs
+        # as read from their manifests; updated in place whenever either
+        # changes
+        self.help_text_commands: dict[
+            str, Union[TextCommand, ManifestCommand]] = {}
+        self.help_slash_commands: dict[
+            str, Union[SlashCommand, ManifestCommand]] = {}
 
         self.bot = bot
         self.debug = debug
@@ -44,21 +79,116 @@ class CogHandler:
     def remove_cog_class(self, cog_name: str) -> None:
         del self.cog_classes[cog_name]
 
+    def add_cog(self, module_name: str, class_name: str, *,
+                lazy: bool = False) -> None:
+        if lazy:
+            self.add_lazy_cog(module_name, class_name)
+            return
+
+        bef = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.import_seconds += time.perf_counter() - bef
+
+        self.add_cog_class(getattr(module, class_name))
+        self.load_cog(class_name)
+
+    def add_lazy_cog(self, module_name: str, class_name: str) -> None:
+        if class_name in self.cog_classes or class_name in self.lazy_cogs:
+            raise CogError(f"Duplicate cog class name: {class_name}")
+
+        manifest = CogManifest.from_module(module_name, class_name)
+        self.lazy_cogs[class_name] = manifest
+
+        for name in manifest.text_names:
+            self.lazy_text_commands[name] = class_name
+        for name in manifest.slash_roots:
+            self.lazy_slash_commands[name] = class_name
+        for event in manifest.events:
+            self.lazy_events.setdefault(event, set()).add(class_name)
+
+        self._compile_help_listings()
+        render_cache.invalidate(f"deferred {class_name}")
+        logger.info(f"Deferring cog '{class_name}' until it is used")
+
+    def load_lazy_cog(self, cog_name: str) -> None:
+        manifest = self.lazy_cogs[cog_name]
+
+        rss_bef = rss_bytes()
+        bef = time.perf_counter()
+        try:
+            self.add_cog(manifest.module_name, cog_name)
+        except Exception:
+            # the cog stays deferred: its commands stay registered, and the
+            # next use tries again
+            self.cog_classes.pop(cog_name, None)
+            raise
+        elapsed = time.perf_counter() - bef
+        rss_delta = rss_bytes() - rss_bef
+
+        del self.lazy_cogs[cog_name]
+        for names in (self.lazy_text_commands, self.lazy_slash_commands):
+            for name in [n for n, c in names.items() if c == cog_name]:
+                del names[name]
+        for event in manifest.events:
+            self.lazy_events[event].discard(cog_name)
+            if not self.lazy_events[event]:
+                del self.lazy_events[event]
+        self._compile_help_listings()
+
+        metrics.gauge('cogs.deferred').set(len(self.lazy_cogs))
+        metrics.histogram('cogs.lazy_load_seconds').observe(elapsed)
+        logger.info(f"Lazily loaded cog '{cog_name}' in {elapsed:.3f}s "
+                    f"(+{rss_delta / 1024**2:.1f}MB RSS)")
+
+    def load_all_lazy_cogs(self) -> None:
+        for cog_name in list(self.lazy_cogs):
+            self.load_lazy_cog(cog_name)
+
+    def startup_report(self) -> None:
+        metrics.gauge('cogs.deferred').set(len(self.lazy_cogs))
+        deferred = ', '.join(self.lazy_cogs) or "none"
+        logger.info(f"Loaded {len(self.cogs)} cogs (imports took "
+                    f"{self.import_seconds:.3f}s, "
+                    f"{rss_bytes() / 1024**2:.1f}MB RSS); deferred: "
+                    f"{deferred}")
+
+    def get_text_command(self, name: str) -> Optional[TextCommand]:
+        cmd = self.text_commands.get(name, self.text_aliases.get(name))
+        if cmd is None and name in self.lazy_text_commands:
+            self.load_lazy_cog(self.lazy_text_commands[name])
+            cmd = self.text_commands.get(name, self.text_aliases.get(name))
+        return cmd
+
+    # name is the full name, including the names of its groups
+    def get_slash_command(self, name: str) -> Optional[SlashCommand]:
+        cmd = self.slash_commands.get(name)
+        root = name.split(' ', 1)[0]
+        if cmd is None and root in self.lazy_slash_commands:
+            self.load_lazy_cog(self.lazy_slash_commands[root])
+            cmd = self.slash_commands.get(name)
+        return cmd
+
     def load_cog(self, cog_name: str) -> None:
         logger.info(f"Loading cog '{cog_name}'")
         if cog_name in self.cogs:
             raise CogError(f"Cog {cog_name} is already loaded!")
 
-        self.cogs[cog_name] = self.cog_classes[cog_name](self.bot)
+        self._add_cog(cog_name, self.cog_classes[cog_name](self.bot))
 
-        for text_cmd in self.cogs[cog_name].text_commands:
+    def _add_cog(self, cog_name: str, cog: Cog) -> None:
+        self._check_conflicts(cog_name, cog)
+        self.cogs[cog_name] = cog
+
+        for text_cmd in cog.text_commands:
             self._load_text_command(text_cmd)
-        for slash_cmd in sorted(self.cogs[cog_name].slash_commands,
-                                key=lambda x: x.name):
+        for slash_cmd in sorted(cog.slash_commands, key=lambda x: x.name):
             self._load_slash_command(slash_cmd)
 
-        for listener in self.cogs[cog_name].listeners:
+        for listener in cog.listeners:
             self._load_listener(cog_name, listener)
+        self._compile_dispatch_table()
+        self._compile_help_listings()
+        render_cache.invalidate(f"loaded {cog_name}")
 
     def unload_cog(self, cog_name: str) -> None:
         for text_cmd in self.cogs[cog_name].text_commands:
@@ -69,10 +199,66 @@ class CogHandler:
         self._unload_listeners(cog_name)
 
         del self.cogs[cog_name]
-
-    def reload_cog(self, cog_name: str) -> None:
-        self.unload_cog(cog_name)
-        self.load_cog(cog_name)
+        self._compile_dispatch_table()
+        self._compile_help_listings()
+        render_cache.invalidate(f"unloaded {cog_name}")
+
+    def reload_cog(self, cog_name: str, *, reload_module: bool = True
+                   ) -> None:
+        logger.info(f"Reloading cog '{cog_name}'; {reload_module=}")
+        cog_cls = self.cog_classes[cog_name]
+
+        if reload_module:
+            module = importlib.reload(sys.modules[cog_cls.__module__])
+            cog_cls = getattr(module, cog_cls.__name__)
+
+        # if anything up to here fails, the old cog stays loaded
+        new_cog = cog_cls(self.bot)
+        self._check_conflicts(cog_name, new_cog)
+
+        # nothing below awaits, so no event or command can see a
+        # half-swapped cog
+        old_cog = self.cogs.get(cog_name)
+        if old_cog is not None:
+            new_cog.import_state(old_cog.export_state())
+            self.unload_cog(cog_name)
+
+        self.cog_classes[cog_name] = cog_cls
+        self._add_cog(cog_name, new_cog)
+
+    # raises CogError if cog can't be loaded alongside the other cogs
+    # (ignoring the currently loaded cog named cog_name, if any)
+    def _check_conflicts(self, cog_name: str, cog: Cog) -> None:
+        old_cog = self.cogs.get(cog_name)
+        replaced: set[int] = set()
+        if old_cog is not None:
+            replaced = {id(cmd) for cmd in (*old_cog.text_commands,
+                                            *old_cog.slash_commands)}
+
+        text_names: set[str] = set()
+        for text_cmd in cog.text_commands:
+            for name in (text_cmd.name, *text_cmd.aliases):
+                existing = self.text_commands.get(
+                    name, self.text_aliases.get(name))
+                if name in text_names or (existing is not None
+                                          and id(existing) not in replaced):
+                    raise CogError(f"Duplicate command name! {text_cmd}")
+                text_names.add(name)
+
+        slash_names = {slash_cmd.name for slash_cmd in cog.slash_commands}
+        for slash_cmd in cog.slash_commands:
+            existing_slash = self.slash_commands.get(slash_cmd.name)
+            if existing_slash is not None \
+                    and id(existing_slash) not in replaced:
+                raise CogError(f"Duplicate command name! {slash_cmd}")
+
+            if slash_cmd.has_parent() \
+                    and slash_cmd.parent_name not in slash_names:
+                parent = self.slash_commands.get(slash_cmd.parent_name)
+                if parent is None or id(parent) in replaced:
+                    raise CogError("Slash command group "
+                                   f"'{slash_cmd.parent_name}' doesn't exist! "
+                                   f"{slash_cmd}")
 
     def _load_text_command(self, cmd: TextCommand) -> None:
         logger.debug(f"Loading text command {cmd}")
@@ -87,7 +273,7 @@ class CogHandler:
             self.text_aliases[alias] = cmd 
 
     def _unload_text_command(self, cmd_name: str) -> None:
-        logger.debug(f"Loading text command {cmd}")
+        logger.debug(f"Unloading text command {cmd_name}")
         for alias in self.text_commands[cmd_name].aliases:
             del self.text_aliases[alias]
         del self.text_commands[cmd_name]
@@ -100,10 +286,22 @@ class CogHandler:
         self.slash_commands[cmd.name] = cmd
 
         if cmd.has_parent():
-            self.slash_commands[cmd.parent_name].subcommands.append(cmd)
+            parent = self.slash_commands[cmd.parent_name]
+            parent.subcommands.append(cmd)
+            parent.subcommand_routes[cmd.rightmost_name] = cmd
+        else:
+            self.slash_routes[cmd.name] = cmd
 
     def _unload_slash_command(self, cmd_name: str) -> None:
-        del self.slash_commands[cmd_name]
+        cmd = self.slash_commands.pop(cmd_name)
+
+        if cmd.has_parent():
+            parent = self.slash_commands.get(cmd.parent_name)
+            if parent is not None:
+                parent.subcommands.remove(cmd)
+                del parent.subcommand_routes[cmd.rightmost_name]
+        else:
+            del self.slash_routes[cmd_name]
 
     def _load_listener(self, cog_name: str, listener: Listener) -> None:
         if listener.event not in self.listeners:
@@ -115,7 +313,32 @@ class CogHandler:
             if cog_name in dct:
                 del dct[cog_name]
 
+    def _compile_dispatch_table(self) -> None:
+        table: dict[str, list[Listener]] = {}
+        for dct in self.listeners.values():
+            for listener in dct.values():
+                table.setdefault(listener.gateway_event, []).append(listener)
+
+        self.dispatch_table = {event: tuple(listeners)
+                               for event, listeners in table.items()}
+
+    def _compile_help_listings(self) -> None:
+        for listing, loaded, attr in (
+                (self.help_text_commands, self.text_commands,
+                 'text_commands'),
+                (self.help_slash_commands, self.slash_commands,
+                 'slash_commands')):
+            listing.clear()
+            for manifest in self.lazy_cogs.values():
+                listing.update(getattr(manifest, attr))
+            listing.update(loaded)
+
     def slash_commands_json(self) -> list[dict]:
+        modules = [type(cog).__module__ for cog in self.cogs.values()]
+        cached = registry_cache.get_slash_json(modules)
+        if cached is not None:
+            return cached
+
         cmd_list: list[dict] = []
 
         def recurse(cmd: SlashCommand, parent_options: list[dict]) -> None:
@@ -131,29 +354,93 @@ class CogHandler:
                 recurse(cmd, cmd_list)
 
         logger.debug(json.dumps(cmd_list, indent=4))
+        registry_cache.put_slash_json(modules, cmd_list)
         return cmd_list
 
-    def put_slash_commands(self, app_id: str, token: str) -> None:
-        cmd_list = self.slash_commands_json()
-        GUILD_ID = 495327409487478785
-
+    # error bodies (e.g. from a proxy) aren't necessarily JSON
+    @staticmethod
+    def _format_body(r: HTTPResponse) -> str:
+        try:
+            return json.dumps(r.json(), indent=4)
+        except ValueError:
+            return r.text()
+
+    @staticmethod
+    def _canonical_json(cmd_list: list[dict]) -> str:
+        return json.dumps(sorted(cmd_list, key=lambda c: c['name']),
+                          sort_keys=True, separators=(',', ':'),
+                          ensure_ascii=False)
+
+    @staticmethod
+    def _slash_diff(old: list[dict], new: list[dict]) -> list[str]:
+        old_cmds = {c['name']: c for c in old}
+        new_cmds = {c['name']: c for c in new}
+
+        diff = []
+        for name in sorted(old_cmds.keys() | new_cmds.keys()):
+            if name not in new_cmds:
+                diff.append(f"- {name}")
+            elif name not in old_cmds:
+                diff.append(f"+ {name}")
+            elif old_cmds[name] != new_cmds[name]:
+                diff.append(f"~ {name}")
+        return diff
+
+    # Uploads the slash command list only if it has changed since the last
+    # sync to the same scope. Returns whether the stored list is up to date.
+    async def sync_slash_commands(self, app_id: str, token: str, *,
+                                  dry_run: bool = False, force: bool = False,
+                                  max_attempts: int = 5) -> bool:
         if self.debug:
-            url = ("https://discord.com/api/v8/applications/"
-                   f"{app_id}/guilds/{GUILD_ID}/commands")
+            scope = f"guild:{DEBUG_GUILD_ID}"
+            url = (f"{API_BASE}/applications/{app_id}/guilds/"
+                   f"{DEBUG_GUILD_ID}/commands")
         else:
-            url = f"https://discord.com/api/v8/applications/{app_id}/commands"
-
-        headers = {"Authorization": f"Bot {token}"}
+            scope = "global"
+            url = f"{API_BASE}/applications/{app_id}/commands"
+
+        payload = self._canonical_json(self.slash_commands_json())
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+
+        synced = self.bot.slash_sync
+        prev_payload = "[]"
+        if scope in synced:
+            prev = synced.select('hash, commands', 'WHERE scope=?', (scope,))
+            if prev['hash'] == digest and not force:
+                logger.info(f"Slash commands unchanged ({scope}, "
+                            f"{digest[:12]}); skipping sync")
+                return True
+            prev_payload = prev['commands']
+
+        diff = self._slash_diff(json.loads(prev_payload), json.loads(payload))
+        logger.info(f"Slash command changes ({scope}):\n"
+                    + ('\n'.join(diff) or "(none; forced)"))
+        if dry_run:
+            return False
+
+        headers = {"Authorization": f"Bot {token}",
+                   "Content-Type": "application/json"}
 
         logger.info("Sending slash command list to discord...")
-        r = requests.put(url, headers=headers, json=cmd_list)
-
-        if r.status_code != 200:
-            logger.error(f"Slash command registration failed (Status code "
-                         f"{r.status_code}): {json.dumps(r.json(), indent=4)}")
-        else:
-            logger.success("Slash commands registered!")
-            logger.debug(json.dumps(r.json(), indent=4))
+        try:
+            r = await self.bot.web.put(url, headers=headers, data=payload,
+                                       max_attempts=max_attempts,
+                                       raise_for_status=False)
+        except HTTPError as e:
+            logger.error(f"Slash command sync gave up: {e}")
+            return False
+
+        if r.status != 200:
+            logger.error("Slash command registration failed (Status code "
+                         f"{r.status}): {self._format_body(r)}")
+            return False
+
+        synced.insert(scope=scope)
+        synced.update(scope, hash=digest, commands=payload)
+        logger.success(f"Slash commands registered! ({scope}, "
+                       f"{digest[:12]})")
+        logger.debug(self._format_body(r))
+        return True
 
     async def handle_error(self, ctx: Context, cmd: Command, e: CarException
                            ) -> None:
@@ -162,9 +449,10 @@ class CogHandler:
 
         elif isinstance(e, ArgumentError):
             outline = cmd.outline(ctx_args=ctx.args, prefix=ctx.prefix,
-                                  highlight=e.highlight)
+                                  highlight=e.highlight, source=e.source,
+                                  span=e.span)
             desc = f":x: {outline}\n\n{e.error_msg}\n\nCorrect usage:\n" \
-                    + cmd.usage(prefix=ctx.prefix)
+                    + render_cache.usage(cmd, ctx.prefix)
 
         else:
             desc = f":x: An unknown error occured!"
@@ -182,28 +470,25 @@ class CogHandler:
 
     async def run_command_slash(self, ctx: SlashContext, data: dict[str, Any]
                                 ) -> None:
+        if data['name'] in self.lazy_slash_commands:
+            self.load_lazy_cog(self.lazy_slash_commands[data['name']])
 
-        names: list[str] = []
-        options: list[dict] = []
-
-        while data['type'] == 1 or data['type'] == 2:
-            names.append(data['name'])
-            if 'options' not in data:
-                break
-            options = data['options']
+        cmd = self.slash_routes.get(data['name'])
+        options: list[dict] = data.get('options', [])
 
-            if len(options) == 0:
-                break
-            data = options[0]
+        while cmd is not None and options and options[0]['type'] in (
+                OptionType.SUB_COMMAND, OptionType.SUB_COMMAND_GROUP):
+            cmd = cmd.subcommand_routes.get(options[0]['name'])
+            options = options[0].get('options', [])
 
-        name = ' '.join(names)
-        cmd = self.slash_commands.get(name)
         if cmd is None:
-            logger.error(f"Slash command '{name}' not recognized (probably "
-                         "because discord hasn't updated the command list yet")
+            logger.error(f"Slash command '{data['name']}' not recognized "
+                         "(probably because discord hasn't updated the "
+                         "command list yet")
             return
 
-        logger.debug(f"Slash command run; {cmd=}, {ctx=}")
+        # formatted by loguru only if debug logs are emitted
+        logger.debug("Slash command run; cmd={!r}, ctx={!r}", cmd, ctx)
 
         try:
             cmd.run_checks(ctx)
@@ -211,41 +496,16 @@ class CogHandler:
             await self.handle_error(ctx, cmd, e)
             return
 
-        args: dict[str, Any] = {opt['name']: opt['value'] for opt in options
-                                if 'value' in opt}
         try:
-            for arg in cmd.args.values():
-                if arg.name not in args:
-                    if arg.required:
-                        raise ArgumentError("I am missing this argument!",
-                                            arg.name)
-                        break
-                    else:
-                        continue
-                # try:
-                ctx.args[arg.name] = args[arg.name]
-                # if not isinstance(ctx.args[arg.name], arg.arg_type):
-                # ctx.args[arg.name] = await arg.converter.convert(
-                                                        # ctx, args[arg.name])
-                try:
-                    ctx.args[arg.name] = await arg.converter.convert_slash(
-                                                ctx, ctx.args[arg.name])
-                except ArgumentError as e:
-                    e.highlight = arg.name
-                    raise e
-                # except ArgumentError as e:
-                    # logger.error(f"Slash command {cmd} ({ctx}) has invalid "
-                                 # "arguments (probably because discord hasn't"
-                                 # "updated the command list yet)")
-                    # return
-
+            await cmd.arg_plan.resolve(ctx, options)
             await cmd.run(ctx)
         except CarException as e:
             await self.handle_error(ctx, cmd, e)
 
     async def run_command_text(self, ctx: TextContext, cmd: TextCommand,
                                content: str) -> None:
-        logger.debug(f"Text command run; {cmd=}, {ctx=}")
+        # formatted by loguru only if debug logs are emitted
+        logger.debug("Text command run; cmd={!r}, ctx={!r}", cmd, ctx)
 
         try:
             cmd.run_checks(ctx)
@@ -254,39 +514,59 @@ class CogHandler:
             return
 
         try:
-            content, kwargs = filter_kwargs(content)
-            tok = Tokenizer(content)
+            lexer = ArgumentLexer(content)
+            batch = ConversionBatch(ctx)
+            # where each argument was written, for highlighting errors
+            spans: dict[str, tuple[int, int]] = {}
+            missing: Optional[str] = None
 
             for i, arg in enumerate(cmd.args.values()):
-                if arg.name in kwargs:
-                    ctx.args[arg.name] = kwargs[arg.name]
+                if arg.name in lexer.kwargs:
+                    val = lexer.kwargs[arg.name]
+                    spans[arg.name] = lexer.kwarg_spans[arg.name]
                 else:
-                    if tok.is_eof():
+                    if lexer.is_eof():
                         if arg.required:
-                            raise ArgumentError("I am missing this argument!",
-                                                arg.name)
+                            missing = arg.name
+                            break
                         else:
                             continue
 
                     if cmd.collect_last_arg and i == len(cmd.args)-1:
-                        ctx.args[arg.name] = tok.get_remaining()
+                        spans[arg.name] = lexer.remaining_span()
+                        val = lexer.get_remaining()
                     else:
-                        ctx.args[arg.name] = tok.next_token()
-                try:
-                    ctx.args[arg.name] = await arg.converter.convert(
-                                                ctx, ctx.args[arg.name])
-                except ArgumentError as e:
-                    e.highlight = arg.name
-                    raise e
+                        start, end, val = lexer.next_span()
+                        spans[arg.name] = lexer.source_span(start, end)
+                batch.add(arg.name, arg.converter, val)
+
+            try:
+                await batch.run()
+            except ArgumentError as e:
+                e.source = content
+                e.span = spans.get(e.highlight) # type: ignore[arg-type]
+                raise e
+
+            # arguments before the missing one are converted first, so that
+            # their errors come first
+            if missing is not None:
+                raise ArgumentError("I am missing this argument!", missing)
 
             await cmd.run(ctx)
         except CarException as e:
             await self.handle_error(ctx, cmd, e)
 
+    # event is the gateway event name (without the 'on_' prefix)
     def run_listeners(self, event: str, args: tuple[Any, ...],
                       kwargs: dict[str, Any]):
-        if event not in self.listeners:
+        if event in self.lazy_events:
+            for cog_name in list(self.lazy_events[event]):
+                self.load_lazy_cog(cog_name)
+
+        listeners = self.dispatch_table.get(event)
+        if listeners is None:
             return
-        for listener in self.listeners[event].values():
-            asyncio.create_task(listener.run(args, kwargs))
+        for listener in listeners:
+            if listener.accepts(args):
+                asyncio.create_task(listener.run(args, kwargs))
 
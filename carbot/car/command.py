@@ -3,13 +3,16 @@ from typing import (
 )
 import inspect
 import asyncio
+import contextlib
 from enum import Enum
 
 # import config
-from .argument import Argument
+from .argument import Argument, SlashArgumentPlan
 from .check import Check, RequiresPermissions, GuildOnly, SpecificGuildOnly
+from .concurrency import ConcurrencyLimit
 from .enums import CommandType, OptionType
-from .exception import CommandError, CogError, CarException
+from .exception import CogError
+from .registry_cache import registry_cache
 from .util import generate_repr
 if TYPE_CHECKING:
     from .cog import Cog
@@ -51,24 +54,47 @@ class Command:
         if hasattr(func, '_car_checks'):
             self.checks = func._car_checks # type: ignore[attr-defined]
 
+        # from @car.max_concurrency; max_concurrency=n is shorthand for a
+        # global limit that rejects instead of waiting
+        self.concurrency_limits: list[ConcurrencyLimit] = list(
+            getattr(func, '_car_concurrency_limits', ()))
+        if max_concurrency is not None:
+            self.concurrency_limits.append(ConcurrencyLimit(max_concurrency))
+        # limits that reject go first, so that a rejected invocation never
+        # sits in another limit's queue
+        self.concurrency_limits.sort(key=lambda l: l.max_wait is not None)
+
         self.parent_cog: Optional['Cog'] = None # set by Cog
-        self.concurrency: int = 0
 
-        self.args: dict[str, Argument] = {}
-        hints = get_type_hints(self.func, include_extras=True)
+        cached_args = registry_cache.get_args(func)
+        if cached_args is not None:
+            self.args: dict[str, Argument] = cached_args
+        else:
+            self.args = {}
+            hints = get_type_hints(self.func, include_extras=True)
+
+            for name, param in inspect.signature(func).parameters.items():
+                if name == 'self' or name == 'ctx':
+                    continue
+                self.args[name] = Argument.from_hint(hints[name], name=name,
+                                                     default=param.default)
 
-        for name, param in inspect.signature(func).parameters.items():
-            if name == 'self' or name == 'ctx':
-                continue
-            self.args[name] = Argument.from_hint(hints[name], name=name,
-                                                 default=param.default)
+            registry_cache.put_args(func, self.args)
 
+    # source[span[0]:span[1]] is shown for the highlighted argument instead
+    # of its value, if given
     def outline(self, *, ctx_args: dict[str, Any] = {}, prefix: str = "/",
-                    highlight: Optional[str] = None) -> str:
+                highlight: Optional[str] = None,
+                source: Optional[str] = None,
+                span: Optional[tuple[int, int]] = None) -> str:
         outline = ["``", prefix, self.name]
 
         for i, arg in enumerate(self.args.values()):
-            label = str(ctx_args.get(arg.name, arg.label))
+            if arg.name == highlight and source is not None \
+                    and span is not None:
+                label = source[span[0]:span[1]]
+            else:
+                label = str(ctx_args.get(arg.name, arg.label))
             if label == "":
                 label = " "
 
@@ -114,26 +140,26 @@ class Command:
             # print(e)
 
     async def run(self, ctx: 'Context'):
-        if self.max_concurrency is not None and \
-                self.concurrency >= self.max_concurrency:
-            raise CommandError("Maximum concurrency reached!")
-
         if self.parent_cog is None:
             raise CogError("This command has not been initialized properly!")
 
-        if ctx.guild is not None:
+        if not ctx.is_dm():
             if ctx.guild.id not in ctx.bot.guild_settings:
                 ctx.bot.guild_settings.insert(guild_id=ctx.guild.id)
 
-        self.concurrency += 1
-
-        try:
+        if not self.concurrency_limits:
+            if ctx.has_args():
+                await self.func(self.parent_cog, ctx, **ctx.args)
+            else:
+                await self.func(self.parent_cog, ctx)
+            return
+
+        # slots are released however the command exits
+        async with contextlib.AsyncExitStack() as stack:
+            for limit in self.concurrency_limits:
+                await stack.enter_async_context(limit.hold(
+                    ctx, f'concurrency.{self.name}.{limit.per.name.lower()}'))
             await self.func(self.parent_cog, ctx, **ctx.args)
-        except CarException as e:
-            self.concurrency -= 1
-            raise e
-
-        self.concurrency -= 1
 
 
 class SlashCommand(Command):
@@ -151,6 +177,9 @@ class SlashCommand(Command):
                          max_concurrency=max_concurrency, hidden=hidden)
         self.parent_cog: 'Cog' # = None # set by CogHandler
         self.subcommands: list[SlashCommand] = [] # also set by CogHandler
+        # rightmost name -> subcommand; also set by CogHandler
+        self.subcommand_routes: dict[str, SlashCommand] = {}
+        self.arg_plan = SlashArgumentPlan(self.args)
 
     def __repr__(self) -> str:
         return generate_repr("SlashCommand", (
@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import math
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, \
+    TYPE_CHECKING
+
+from .enums import ConcurrencyScope
+from .exception import CommandError
+from .metric import metrics
+if TYPE_CHECKING:
+    from .context import Context
+
+
+__all__ = [
+    'ConcurrencyLimit',
+    'max_concurrency'
+]
+
+
+class _Slot:
+    def __init__(self, limit: int):
+        self.sem = asyncio.Semaphore(limit)
+        self.users = 0 # holding or waiting
+
+
+# Limits how many invocations of a command may run at once in each scope
+# (everywhere, per guild, per channel or per user). Invocations over the
+# limit are rejected, or if max_wait is set, wait up to max_wait seconds
+# (math.inf to wait indefinitely) for a slot to free up.
+class ConcurrencyLimit:
+    def __init__(self, limit: int, *,
+                 per: ConcurrencyScope = ConcurrencyScope.GLOBAL,
+                 max_wait: Optional[float] = None):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.per = per
+        self.max_wait = max_wait
+
+        self._slots: dict[Optional[int], _Slot] = {}
+
+    def __repr__(self) -> str:
+        return (f"<ConcurrencyLimit limit={self.limit} per={self.per.name} "
+                f"max_wait={self.max_wait}>")
+
+    def key(self, ctx: 'Context') -> Optional[int]:
+        match self.per:
+            case ConcurrencyScope.GLOBAL:
+                return None
+            case ConcurrencyScope.GUILD:
+                return ctx.guild_id
+            case ConcurrencyScope.CHANNEL:
+                return ctx.channel.id
+            case ConcurrencyScope.USER:
+                return ctx.author_user.id
+
+    def _full_message(self) -> str:
+        where = {
+            ConcurrencyScope.GLOBAL: "",
+            ConcurrencyScope.GUILD: " in this server",
+            ConcurrencyScope.CHANNEL: " in this channel",
+            ConcurrencyScope.USER: " for you"
+        }[self.per]
+        if self.max_wait is None:
+            return (f"This command is already running the maximum number of "
+                    f"times{where}! Please try again later.")
+        return (f"This command is still busy{where} after waiting "
+                f"{self.max_wait:g}s! Please try again later.")
+
+    @contextlib.asynccontextmanager
+    async def hold(self, ctx: 'Context', metric_name: str
+                   ) -> AsyncIterator[None]:
+        key = self.key(ctx)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = _Slot(self.limit)
+            self._slots[key] = slot
+
+        slot.users += 1
+        try:
+            bef = time.perf_counter()
+            if self.max_wait is None:
+                if slot.sem.locked():
+                    metrics.counter(f'{metric_name}.rejected').inc()
+                    raise CommandError(self._full_message())
+                await slot.sem.acquire()
+            else:
+                timeout = None if math.isinf(self.max_wait) else self.max_wait
+                try:
+                    await asyncio.wait_for(slot.sem.acquire(), timeout)
+                except asyncio.TimeoutError:
+                    metrics.counter(f'{metric_name}.rejected').inc()
+                    raise CommandError(self._full_message())
+
+            acquired = time.perf_counter()
+            metrics.histogram(f'{metric_name}.wait_seconds').observe(
+                acquired - bef)
+            try:
+                yield
+            finally:
+                slot.sem.release()
+                metrics.histogram(f'{metric_name}.hold_seconds').observe(
+                    time.perf_counter() - acquired)
+        finally:
+            slot.users -= 1
+            # idle guild/user slots would otherwise accumulate forever
+            if slot.users == 0 and self._slots.get(key) is slot:
+                del self._slots[key]
+
+
+def max_concurrency(limit: int, *,
+                    per: ConcurrencyScope = ConcurrencyScope.GLOBAL,
+                    max_wait: Optional[float] = None) -> Callable:
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        if not hasattr(func, '_car_concurrency_limits'):
+            func._car_concurrency_limits = [] # type: ignore[attr-defined]
+        func._car_concurrency_limits.append( # type: ignore[attr-defined]
+            ConcurrencyLimit(limit, per=per, max_wait=max_wait))
+        return func
+    return decorator
@@ -1,10 +1,12 @@
 from abc import ABCMeta, abstractmethod
+from asyncio import Future
 from typing import Any, Optional, Union, TYPE_CHECKING
 import discord
 from loguru import logger
 from discord import (
-    AllowedMentions, Message, TextChannel, Guild, PartialMessageable, Thread,
-    Member, User, Embed, Interaction, WebhookMessage, Attachment
+    AllowedMentions, Message, TextChannel, DMChannel, Guild,
+    PartialMessageable, Thread, Member, User, Embed, Interaction,
+    WebhookMessage, Attachment
 )
 
 from .exception import ContextError, CommandError
@@ -19,11 +21,16 @@ __all__ = [
     'TextContext'
 ]
 
+# A context is created for every message and interaction that is handled, so
+# contexts have no __dict__ and args is only created once it's needed
 class Context(metaclass=ABCMeta):
+    __slots__ = ('channel', '_guild', 'author_user', 'bot', 'prefix',
+                 '_args')
+
     def __init__(
         self,
         *,
-        channel: Union[TextChannel, PartialMessageable, Thread],
+        channel: Union[TextChannel, DMChannel, PartialMessageable, Thread],
         guild: Optional[Guild],
         author_user: Union[Member, User],
         bot: 'Bot',
@@ -35,13 +42,27 @@ class Context(metaclass=ABCMeta):
         self.bot = bot
         self.prefix = prefix
 
-        self.args: dict[str, Any] = {} # filled by cog_handler
+        self._args: Optional[dict[str, Any]] = None
+
+    # filled by cog_handler
+    @property
+    def args(self) -> dict[str, Any]:
+        if self._args is None:
+            self._args = {}
+        return self._args
+
+    @args.setter
+    def args(self, args: dict[str, Any]) -> None:
+        self._args = args
+
+    def has_args(self) -> bool:
+        return bool(self._args)
 
     def __repr__(self) -> str:
         return generate_repr("Context", (
             ('channel', self.channel),
             ('guild', self._guild),
-            ('author', self.author),
+            ('author', self.author_user),
             ('prefix', self.prefix)
         ))
 
@@ -60,6 +81,10 @@ class Context(metaclass=ABCMeta):
             raise ContextError("This command should be set to guild-only!")
         return self._guild
 
+    @property
+    def guild_id(self) -> Optional[int]:
+        return None if self._guild is None else self._guild.id
+
     @property
     def upload_limit_bytes(self) -> int:
         if self._guild is None:
@@ -79,10 +104,15 @@ class Context(metaclass=ABCMeta):
     async def respond(self, content: Optional[str] = None, **kwargs) -> None:
         pass
 
+    # Edits go through bot.edit_scheduler; schedule_edit doesn't wait for
+    # the edit to be sent, and may be superseded by a later one
     @abstractmethod
-    async def edit_response(self, **kwargs) -> None:
+    def schedule_edit(self, **kwargs) -> Future:
         pass
 
+    async def edit_response(self, **kwargs) -> None:
+        await self.schedule_edit(**kwargs)
+
     @abstractmethod
     async def delete_response(self) -> None:
         pass
@@ -100,10 +130,12 @@ class Context(metaclass=ABCMeta):
 
 
 class SlashContext(Context):
+    __slots__ = ('interaction', 'deferred')
+
     def __init__(
         self,
         *,
-        channel: Union[TextChannel, PartialMessageable, Thread],
+        channel: Union[TextChannel, DMChannel, PartialMessageable, Thread],
         guild: Optional[Guild],
         author_user: Union[Member, User],
         bot: 'Bot',
@@ -119,7 +151,7 @@ class SlashContext(Context):
         return generate_repr("SlashContext", (
             ('channel', self.channel),
             ('guild', self._guild),
-            ('author', self.author),
+            ('author', self.author_user),
             ('prefix', self.prefix),
             ('interaction', self.interaction)
         ))
@@ -145,18 +177,21 @@ class SlashContext(Context):
         else:
             await self.interaction.response.send_message(content, **kwargs)
 
-    async def edit_response(self, **kwargs) -> None:
-        await self.interaction.edit_original_message(**kwargs)
+    def schedule_edit(self, **kwargs) -> Future:
+        return self.bot.edit_scheduler.edit_original_message(
+            self.interaction, **kwargs)
 
     async def delete_response(self) -> None:
         await self.interaction.delete_original_message()
 
 
 class TextContext(Context):
+    __slots__ = ('message', '_response')
+
     def __init__(
         self,
         *,
-        channel: Union[TextChannel, PartialMessageable, Thread],
+        channel: Union[TextChannel, DMChannel, PartialMessageable, Thread],
         guild: Optional[Guild],
         author_user: Union[Member, User],
         bot: 'Bot',
@@ -173,14 +208,14 @@ class TextContext(Context):
             ('message', self.message),
             ('channel', self.channel),
             ('guild', self._guild),
-            ('author', self.author),
+            ('author', self.author_user),
             ('prefix', self.prefix),
         ))
 
     @classmethod
     def from_message(cls, bot: 'Bot', message: Message, prefix: str = ''):
-        if not isinstance(message.channel, (TextChannel, PartialMessageable,
-                                            Thread)):
+        if not isinstance(message.channel, (TextChannel, DMChannel,
+                                            PartialMessageable, Thread)):
             raise ContextError("Invalid message")
 
         return cls(message=message, channel=message.channel,
@@ -196,10 +231,10 @@ class TextContext(Context):
             content, **kwargs, reference=self.message.to_reference()
         )
 
-    async def edit_response(self, **kwargs) -> None:
+    def schedule_edit(self, **kwargs) -> Future:
         if self._response is None:
             raise ContextError("Command has not been responded to yet")
-        await self._response.edit(**kwargs)
+        return self.bot.edit_scheduler.edit_message(self._response, **kwargs)
 
     async def delete_response(self) -> None:
         if self._response is None:
@@ -10,6 +10,8 @@ from carpp import fuzzy_match_one
 from .context import Context
 from .enums import OptionType, ChannelType
 from .exception import ArgumentError, CheckError
+from .member_index import fold
+from .offload import offloader
 from .util import join_last
 
 
@@ -32,11 +34,20 @@ __all__ = [
     'default_converters'
 ]
 
+# guilds with fewer members are fuzzy matched inline; offloading only pays
+# for itself on large member lists
+OFFLOAD_MIN_MEMBERS = 5000
+
 # class CanConvert(Protocol):
     # async def convert(self, ctx: Context, val: str)  ->  Any:
         # ...
 
 class Converter(ABC):
+    # whether convert's result only depends on ctx and the value, without
+    # side effects; pure conversions may run in any order (or at the same
+    # time), and each value is only converted once per invocation
+    pure: bool = False
+
     def __or__(self, other: 'Converter'):
         return JoinedConverter() | self | other
 
@@ -47,6 +58,11 @@ class Converter(ABC):
     async def convert_slash(self, ctx: Context, val: Any) -> Any:
         return await self.convert(ctx, val)
 
+    # whether converting in ctx waits on work done elsewhere (see offloader),
+    # so that it's worth converting alongside other arguments
+    def offloads(self, ctx: Context) -> bool:
+        return False
+
     @abstractmethod
     def modify_slash_data(self, data: dict[str, Any]) -> None:
         pass
@@ -69,11 +85,18 @@ class JoinedConverter(Converter):
         self.converters.append(other)
         return self
 
+    @property # type: ignore[override]
+    def pure(self) -> bool:
+        return all(converter.pure for converter in self.converters)
+
     async def convert(self, ctx: Context, val: str) -> Any:
         for converter in self.converters:
             val = await converter.convert(ctx, val)
         return val
 
+    def offloads(self, ctx: Context) -> bool:
+        return any(converter.offloads(ctx) for converter in self.converters)
+
     def modify_slash_data(self, data: dict[str, Any]) -> None:
         for converter in self.converters:
             converter.modify_slash_data(data)
@@ -84,6 +107,8 @@ class JoinedConverter(Converter):
 
 
 class FromChoices(Converter):
+    pure = True
+
     def __init__(
         self,
         choices: dict[str, int] | dict[str, float] | dict[str, str],
@@ -123,6 +148,8 @@ class FromChoices(Converter):
 
 
 class InRange(Converter):
+    pure = True
+
     def __init__(
         self,
         lower: Optional[int | float] = None,
@@ -161,6 +188,8 @@ class InRange(Converter):
 
 
 class ToInt(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> int:
         try:
             return int(val)
@@ -176,6 +205,8 @@ class ToInt(Converter):
 
 
 class ToFloat(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> float:
         try:
             return float(val)
@@ -202,6 +233,8 @@ class ToFloat(Converter):
 
 
 class ToString(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> str:
         return val
 
@@ -214,6 +247,8 @@ class ToString(Converter):
 
 
 class ToSeconds(Converter):
+    pure = True
+
     def __init__(self, allow_negative: bool = False):
         self.allow_negative = allow_negative
 
@@ -251,6 +286,8 @@ class ToSeconds(Converter):
 
 
 class ToURL(Converter):
+    pure = True
+
     def __init__(self, allowed_sites: Optional[set[str]]=None):
         self.allowed_sites = allowed_sites
 
@@ -286,6 +323,8 @@ class ToURL(Converter):
 
 
 class ToBool(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> bool:
         true_vals = ('true', '1')
         false_vals = ('false', '0')
@@ -312,6 +351,8 @@ class ToBool(Converter):
 
 
 class ToMember(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> discord.Member:
         if ctx.guild is None:
             logger.warning("Non-DM Argument found in non-guild-only command!")
@@ -328,32 +369,47 @@ class ToMember(Converter):
             except ValueError:
                 pass
         if member_id is not None:
-            m = discord.utils.get(ctx.guild.members, id=int(member_id))
+            m = ctx.guild.get_member(member_id)
             if m is not None:
                 return m
 
-        discrim = None
-        if len(val) > 5 and val[-5] == '#':
-            try:
-                int(val[-4:])
-                discrim = val[-4:]
-            except ValueError:
-                pass
+        index = await ctx.bot.member_index.get(ctx.guild)
 
-        if discrim is None:
-            members = ctx.guild.members
-        else:
-            members = [m for m in ctx.guild.members
-                       if m.discriminator == discrim]
+        if len(val) > 5 and val[-5] == '#' and val[-4:].isdigit():
+            name, discrim = val[:-5], val[-4:]
+            m = index.get_by_tag(name, discrim)
+            if m is not None:
+                return m
 
-        dist1, idx1 = fuzzy_match_one(val, [m.name for m in members])
+            # the few members with the discriminator are matched in python
+            members = index.with_discrim(discrim)
+            if members:
+                members_nick = [m for m in members if m.nick is not None]
+                dist1, idx1 = fuzzy_match_one(
+                    fold(name), [fold(m.name) for m in members])
+                dist2, idx2 = fuzzy_match_one(
+                    fold(name), [fold(m.nick) for m in members_nick
+                                 if m.nick is not None]) # for mypy
+                return members[idx1] if dist1 <= dist2 \
+                    else members_nick[idx2]
+
+        if len(index) < OFFLOAD_MIN_MEMBERS:
+            _, member_id = index.match(val)
+        else:
+            # carpp releases the GIL, so large guilds are matched in a
+            # thread instead of blocking the loop
+            _, member_id = await offloader.run(
+                index.match, val, guild_id=ctx.guild.id, threads=True)
 
-        members_nick = [m for m in members if m.nick is not None]
-        dist2, idx2 = fuzzy_match_one(val.lower(),
-                                      [m.nick.lower() for m in members_nick
-                                       if m.nick is not None]) # for mypy
+        m = ctx.guild.get_member(member_id)
+        if m is None: # left while being matched
+            raise ArgumentError("I couldn't find this member!")
+        return m
 
-        return members[idx1] if dist1 <= dist2 else members_nick[idx2]
+    def offloads(self, ctx: Context) -> bool:
+        # the guild's member cache, since its index may not be filled yet
+        return not ctx.is_dm() \
+            and len(ctx.guild._members) >= OFFLOAD_MIN_MEMBERS
 
     def modify_slash_data(self, data: dict[str, Any]) -> None:
         data['type'] = OptionType.USER
@@ -364,6 +420,8 @@ class ToMember(Converter):
 
 
 class ToRole(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> discord.Role:
         if ctx.guild is None:
             logger.warning("Non-DM Argument found in non-guild-only command!")
@@ -396,6 +454,8 @@ class ToRole(Converter):
 
 
 class ToTextChannel(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> discord.TextChannel:
         if ctx.guild is None:
             logger.warning("Non-DM Argument found in non-guild-only command!")
@@ -429,6 +489,8 @@ class ToTextChannel(Converter):
 
 
 class ToVoiceChannel(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> discord.VoiceChannel:
         if ctx.guild is None:
             logger.warning("Non-DM Argument found in non-guild-only command!")
@@ -462,6 +524,8 @@ class ToVoiceChannel(Converter):
 
 
 class ToEmote(Converter):
+    pure = True
+
     async def convert(self, ctx: Context, val: str) -> discord.Emoji:
         if val.startswith('<:') and val.endswith('>'):
             try:
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import discord
+from loguru import logger
+
+from .metric import metrics
+from .ratelimit import rate_limits
+
+
+__all__ = [
+    'EditScheduler'
+]
+
+
+class _PendingEdit:
+    def __init__(self, route: Optional[tuple[str, ...]]):
+        self.route = route
+        self.send: Optional[Callable[[], Awaitable[Any]]] = None
+        self.futures: list[asyncio.Future] = []
+
+
+def _retrieve(fut: asyncio.Future) -> None:
+    # failures are logged by the scheduler; this stops asyncio from also
+    # warning about futures that nobody awaited
+    if not fut.cancelled():
+        fut.exception()
+
+
+# Funnels edits of the same message through one task that sends at most one
+# edit per min_interval (or later, if the route's rate limit bucket is
+# exhausted; route is None for requests car.rate_limits can't see). Edits
+# scheduled while one is waiting replace it, so only the latest payload is
+# sent; every future resolves with the result of the edit that ended up
+# carrying its payload.
+class EditScheduler:
+    def __init__(self, *, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._pending: dict[Hashable, _PendingEdit] = {}
+
+        self.pending = metrics.gauge('edits.pending')
+        self.scheduled = metrics.counter('edits.scheduled')
+        self.sent = metrics.counter('edits.sent')
+        self.coalesced = metrics.counter('edits.coalesced')
+        self.failed = metrics.counter('edits.failed')
+
+    def schedule(self, key: Hashable, route: Optional[tuple[str, ...]],
+                 send: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_retrieve)
+        self.scheduled.inc()
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _PendingEdit(route)
+            self._pending[key] = pending
+            self.pending.inc()
+            asyncio.create_task(self._flush(key, pending))
+        elif pending.send is not None:
+            self.coalesced.inc()
+
+        pending.send = send
+        pending.futures.append(fut)
+        return fut
+
+    def edit_message(self, msg: discord.Message, **kwargs) -> asyncio.Future:
+        return self.schedule(
+            ('message', msg.id), ('channels', str(msg.channel.id)),
+            lambda: msg.edit(**kwargs)
+        )
+
+    def edit_original_message(self, interaction: discord.Interaction,
+                              **kwargs) -> asyncio.Future:
+        # interaction responses are sent through discord.py's webhook
+        # adapter, which handles their rate limits itself
+        return self.schedule(
+            ('interaction', interaction.id), None,
+            lambda: interaction.edit_original_message(**kwargs)
+        )
+
+    async def _flush(self, key: Hashable, pending: _PendingEdit) -> None:
+        try:
+            while pending.send is not None:
+                delay = (rate_limits.delay(pending.route)
+                         if pending.route is not None else 0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                send, futures = pending.send, pending.futures
+                pending.send, pending.futures = None, []
+
+                try:
+                    result = await send()
+                except Exception as e:
+                    self.failed.inc()
+                    logger.warning(f"Scheduled edit of {key} failed: {e!r}")
+                    for fut in futures:
+                        if not fut.done():
+                            fut.set_exception(e)
+                else:
+                    self.sent.inc()
+                    for fut in futures:
+                        if not fut.done():
+                            fut.set_result(result)
+
+                # hold the key for min_interval so that edits made right
+                # after this one are coalesced
+                await asyncio.sleep(self.min_interval)
+        finally:
+            del self._pending[key]
+            self.pending.dec()
+            for fut in pending.futures:
+                fut.cancel()
@@ -5,7 +5,8 @@ __all__ = [
     'ChannelType',
     'CommandType',
     'OptionType',
-    'ClearanceLevel'
+    'ClearanceLevel',
+    'ConcurrencyScope'
 ]
 
 class ChannelType(int, Enum):
@@ -44,3 +45,8 @@ class ClearanceLevel(int, Enum):
     TRUSTED = 2
     ADMIN = 3
 
+class ConcurrencyScope(int, Enum):
+    GLOBAL = 0
+    GUILD = 1
+    CHANNEL = 2
+    USER = 3
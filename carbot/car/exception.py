@@ -35,4 +35,8 @@ class ArgumentError(UserError):
     def __init__(self, error_msg: str, highlight: Optional[str] = None):
         super().__init__(error_msg)
         self.highlight = highlight
+        # where the highlighted argument was written, if it was: (start, end)
+        # in source, the text the arguments were parsed from
+        self.source: Optional[str] = None
+        self.span: Optional[tuple[int, int]] = None
 
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+from typing import Any, Optional
+import aiohttp
+from loguru import logger
+from yarl import URL
+
+from .metric import metrics
+
+
+__all__ = [
+    'HTTPClient',
+    'HTTPResponse',
+    'HTTPError'
+]
+
+
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+
+class HTTPError(Exception):
+    def __init__(self, status: Optional[int], msg: str):
+        super().__init__(msg)
+        self.status = status
+
+
+class HTTPResponse:
+    def __init__(self, status: int, headers: Any, body: bytes, url: URL):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+# One pooled aiohttp session for all outgoing (non-discord) requests, with
+# cached DNS, a per-host connection limit, timeouts and retries. 429s are
+# retried for any method (after Retry-After); 5xx responses and connection
+# errors only for idempotent methods, unless max_attempts is given.
+# The session is created on first use, since it must belong to the loop
+# that uses it.
+class HTTPClient:
+    def __init__(self, *, limit: int = 100, limit_per_host: int = 8,
+                 timeout: float = 30, dns_ttl: int = 300,
+                 max_attempts: int = 3):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.dns_ttl = dns_ttl
+        self.max_attempts = max_attempts
+
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.retries = metrics.counter('http.retries')
+        self.errors = metrics.counter('http.errors')
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            try:
+                # resolves without a thread per lookup; needs aiodns
+                resolver: Any = aiohttp.AsyncResolver()
+            except RuntimeError:
+                resolver = aiohttp.DefaultResolver()
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl, resolver=resolver
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method: str, url: str, *,
+                      max_attempts: Optional[int] = None,
+                      raise_for_status: bool = True, **kwargs
+                      ) -> HTTPResponse:
+        method = method.upper()
+        if max_attempts is None:
+            max_attempts = self.max_attempts \
+                if method in IDEMPOTENT_METHODS else 1
+        host = URL(url).host
+        attempt = 0 # failed attempts
+        rate_limited = 0 # 429s, which are safe to retry for any method
+
+        while True:
+            if attempt or rate_limited:
+                self.retries.inc()
+
+            bef = time.perf_counter()
+            try:
+                async with self.session.request(method, url, **kwargs) as r:
+                    body = await r.read()
+                    response = HTTPResponse(r.status, r.headers, body, r.url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                attempt += 1
+                logger.warning(f"{method} {url} failed: {e!r}")
+                if attempt >= max_attempts:
+                    self.errors.inc()
+                    raise HTTPError(None, f"{method} {url} failed after "
+                                    f"{attempt} attempts: {e!r}")
+                await asyncio.sleep(0.5 * 2**attempt)
+                continue
+            finally:
+                metrics.histogram(f'http.{host}.seconds').observe(
+                    time.perf_counter() - bef)
+
+            if response.status == 429 and rate_limited < self.max_attempts:
+                rate_limited += 1
+                retry_after = float(response.headers.get('Retry-After', 1))
+                logger.warning(f"{method} {url} was rate limited; retrying "
+                               f"in {retry_after:.2f}s")
+                await asyncio.sleep(retry_after)
+                continue
+
+            if response.status in RETRY_STATUSES:
+                attempt += 1
+                if attempt < max_attempts:
+                    logger.warning(f"{method} {url} returned "
+                                   f"{response.status}; retrying")
+                    await asyncio.sleep(0.5 * 2**attempt)
+                    continue
+
+            if raise_for_status and not response.ok:
+                self.errors.inc()
+                raise HTTPError(response.status, f"{method} {url} returned "
+                                f"{response.status}")
+            return response
+
+    async def get(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request('PUT', url, **kwargs)
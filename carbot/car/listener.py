@@ -10,17 +10,93 @@ __all__ = [
 ]
 
 
+ListenerFilter = Callable[[tuple[Any, ...]], bool]
+
+
+# Filters look at the first argument of an event (the message, member,
+# reaction, etc.). Attributes that the subject doesn't have never match.
+def _guild_of(subject: Any) -> Any:
+    guild = getattr(subject, 'guild', None)
+    if guild is None and hasattr(subject, 'message'):
+        guild = getattr(subject.message, 'guild', None)
+    return guild
+
+def _author_of(subject: Any) -> Any:
+    if hasattr(subject, 'author'):
+        return subject.author
+    if hasattr(subject, 'message'):
+        return getattr(subject.message, 'author', None)
+    return subject
+
+
 class Listener:
-    def __init__(self, event: str, func: Callable[..., Awaitable[Any]]):
+    def __init__(self, event: str, func: Callable[..., Awaitable[Any]], *,
+                 filters: tuple[ListenerFilter, ...] = (),
+                 loads_lazy_cog: bool = True):
         self.event = event
         self.func = func
+        self.filters = filters
+        self.loads_lazy_cog = loads_lazy_cog
         self.parent: Optional['Cog'] = None # set by Cog
 
+    @property
+    def gateway_event(self) -> str:
+        return self.event[3:] if self.event.startswith('on_') else self.event
+
+    def accepts(self, args: tuple[Any, ...]) -> bool:
+        for f in self.filters:
+            if not f(args):
+                return False
+        return True
+
     async def run(self, args: tuple[Any, ...], kwargs: dict[str, Any]):
         if self.parent is None:
             raise CogError("This listener was not initialized properly")
         await self.func(self.parent, *args, **kwargs)
 
-def listener(func):
-    return Listener(func.__name__, func)
+def listener(
+    func: Optional[Callable[..., Awaitable[Any]]] = None,
+    *,
+    event: Optional[str] = None,
+    guild_only: bool = False,
+    ignore_bots: bool = False,
+    guild_ids: Optional[set[int]] = None,
+    author_ids: Optional[set[int]] = None,
+    channel_types: Optional[tuple[type, ...]] = None,
+    predicate: Optional[ListenerFilter] = None,
+    loads_lazy_cog: bool = True
+):
+    # loads_lazy_cog=False is for listeners that only act on state the
+    # cog's commands create: the event then doesn't import a deferred cog,
+    # and the listener only runs once something else has loaded it
+    filters: list[ListenerFilter] = []
+
+    if guild_only:
+        filters.append(lambda args: _guild_of(args[0]) is not None)
+
+    if ignore_bots:
+        filters.append(
+            lambda args: not getattr(_author_of(args[0]), 'bot', False))
+
+    if guild_ids is not None:
+        filters.append(
+            lambda args: getattr(_guild_of(args[0]), 'id', None) in guild_ids)
+
+    if author_ids is not None:
+        filters.append(
+            lambda args: getattr(_author_of(args[0]), 'id', None) in author_ids)
+
+    if channel_types is not None:
+        filters.append(lambda args: isinstance(
+            getattr(args[0], 'channel', None), channel_types))
+
+    if predicate is not None:
+        filters.append(predicate)
+
+    def decorator(func):
+        return Listener(event or func.__name__, func, filters=tuple(filters),
+                        loads_lazy_cog=loads_lazy_cog)
 
+    if func is not None: # used as @listener
+        return decorator(func)
+    return decorator
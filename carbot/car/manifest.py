@@ -0,0 +1,222 @@
+import ast
+import importlib
+import importlib.util
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from . import check as check_module
+from .exception import CogError
+if TYPE_CHECKING:
+    from .check import Check
+    from .context import Context
+
+
+__all__ = [
+    'ManifestCommand',
+    'CogManifest'
+]
+
+
+CHECK_DECORATORS = ('requires_permissions', 'guild_only', 'guild_must_be_id',
+                    'requires_clearance')
+
+
+def _decorator_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+def _decorator_kwargs(node: ast.expr) -> dict[str, Any]:
+    if not isinstance(node, ast.Call):
+        return {}
+    try:
+        return {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords
+                if kw.arg in ('name', 'text_name', 'slash_name', 'aliases',
+                              'event', 'desc', 'category', 'hidden',
+                              'loads_lazy_cog')}
+    except ValueError:
+        raise CogError("Command names, aliases, descriptions, categories and "
+                       "listener events must be literals for a cog to be "
+                       "loaded lazily")
+
+# a literal, or something reached through the car package (e.g.
+# car.ClearanceLevel.ADMIN)
+def _check_arg(node: ast.expr) -> Any:
+    attrs = []
+    while isinstance(node, ast.Attribute):
+        attrs.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name) and node.id == 'car' and attrs:
+        obj = importlib.import_module(__package__)
+        for attr in reversed(attrs):
+            obj = getattr(obj, attr)
+        return obj
+    return ast.literal_eval(node)
+
+# the check decorator (e.g. car.requires_clearance(...)) node makes
+def _check_decorator(node: ast.expr) -> Callable:
+    assert isinstance(node, ast.Call)
+    try:
+        return getattr(check_module, _decorator_name(node))(
+            *(_check_arg(arg) for arg in node.args),
+            **{kw.arg: _check_arg(kw.value) for kw in node.keywords}
+        )
+    except (ValueError, AttributeError, TypeError):
+        raise CogError("Check arguments must be literals or attributes of "
+                       "car for a cog to be loaded lazily")
+
+
+# What help needs of a command whose cog hasn't been imported yet; it stands
+# in for the Command in the help listings
+class ManifestCommand:
+    def __init__(self, *, name: str, cog_name: str, desc: str,
+                 category: str, hidden: bool,
+                 aliases: tuple[str, ...] = ()):
+        self.name = name
+        self.cog_name = cog_name
+        self.desc = desc
+        self.category = category
+        self.hidden = hidden
+        self.aliases = aliases
+        self.guild_id: Optional[int] = None
+        self.checks: list['Check'] = []
+
+    # applies a check decorator the way it would be applied to the command's
+    # function
+    def add_check_decorator(self, deco: Callable) -> None:
+        def func(): pass
+        deco(func)
+        self.checks.extend(func._car_checks) # type: ignore[attr-defined]
+        self.guild_id = getattr(func, '_car_guild_id', self.guild_id)
+
+    # raises CheckError if checks fail
+    def run_checks(self, ctx: 'Context') -> None:
+        for check in self.checks:
+            check.check(ctx)
+
+
+# The names a cog registers, and what help shows of its commands, read from
+# its source without importing it
+class CogManifest:
+    def __init__(self, module_name: str, class_name: str):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.category = "Uncategorized"
+        self.text_names: set[str] = set() # includes aliases
+        self.slash_roots: set[str] = set()
+        self.events: set[str] = set() # gateway event names
+        self.text_commands: dict[str, ManifestCommand] = {}
+        # includes subcommands, by full name
+        self.slash_commands: dict[str, ManifestCommand] = {}
+
+        # check decorators applied to every command (Cog.checks)
+        self._cog_checks: list[Callable] = []
+
+    @classmethod
+    def from_module(cls, module_name: str, class_name: str):
+        spec = importlib.util.find_spec(module_name)
+        if spec is None or spec.origin is None:
+            raise CogError(f"Cog module {module_name} not found")
+
+        with open(spec.origin, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name == class_name:
+                break
+        else:
+            raise CogError(f"Cog class {class_name} not found in "
+                           f"{module_name}")
+
+        manifest = cls(module_name, class_name)
+        for item in node.body:
+            if isinstance(item, ast.Assign):
+                manifest._add_attribute(item)
+
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                checks = [_check_decorator(deco)
+                          for deco in reversed(item.decorator_list)
+                          if _decorator_name(deco) in CHECK_DECORATORS]
+                for deco in item.decorator_list:
+                    manifest._add(item, deco, checks)
+
+        return manifest
+
+    def _add_attribute(self, item: ast.Assign) -> None:
+        for target in item.targets:
+            if not isinstance(target, ast.Name):
+                continue
+            if target.id == 'category':
+                self.category = ast.literal_eval(item.value)
+            elif target.id == 'checks':
+                if not isinstance(item.value, (ast.Tuple, ast.List)):
+                    raise CogError("Cog checks must be a tuple for a cog to "
+                                   "be loaded lazily")
+                self._cog_checks = [_check_decorator(deco)
+                                    for deco in item.value.elts]
+
+    def _command(self, name: str, item: ast.AST, kwargs: dict[str, Any],
+                 checks: list[Callable], **overrides: Any
+                 ) -> ManifestCommand:
+        attrs: dict[str, Any] = {
+            'desc': (kwargs.get('desc') or ast.get_docstring(item)
+                     or "No description"),
+            'category': kwargs.get('category', "Uncategorized"),
+            'hidden': kwargs.get('hidden', False),
+        }
+        attrs.update(overrides)
+        if attrs['category'] == "Uncategorized":
+            attrs['category'] = self.category
+
+        cmd = ManifestCommand(name=name, cog_name=self.class_name, **attrs)
+        for deco in checks:
+            cmd.add_check_decorator(deco)
+        # Cog._add_command adds the cog's checks after the command's own
+        for deco in self._cog_checks:
+            cmd.checks.append(deco())
+        return cmd
+
+    def _add_text(self, name: str, item: ast.AST, kwargs: dict[str, Any],
+                  checks: list[Callable]) -> None:
+        aliases = tuple(kwargs.get('aliases', ()))
+        self.text_names.add(name)
+        self.text_names.update(aliases)
+        self.text_commands[name] = self._command(name, item, kwargs, checks,
+                                                 aliases=aliases)
+
+    def _add_slash(self, name: str, item: ast.AST, kwargs: dict[str, Any],
+                   checks: list[Callable], **overrides: Any) -> None:
+        self.slash_roots.add(name.split()[0])
+        self.slash_commands[name] = self._command(name, item, kwargs, checks,
+                                                  **overrides)
+
+    def _add(self, item: ast.FunctionDef | ast.AsyncFunctionDef,
+             deco: ast.expr, checks: list[Callable]) -> None:
+        kwargs = _decorator_kwargs(deco)
+
+        match _decorator_name(deco):
+            case 'text_command':
+                self._add_text(kwargs.get('name', item.name), item, kwargs,
+                               checks)
+            case 'slash_command':
+                self._add_slash(kwargs.get('name', item.name), item, kwargs,
+                                checks)
+            case 'slash_command_group':
+                self._add_slash(kwargs['name'], item, kwargs, checks,
+                                desc=kwargs.get('desc', "Command Group"),
+                                hidden=True)
+            case 'mixed_command':
+                self._add_text(kwargs.get('text_name', item.name), item,
+                               kwargs, checks)
+                self._add_slash(kwargs.get('slash_name', item.name), item,
+                                kwargs, checks)
+            case 'listener':
+                if not kwargs.get('loads_lazy_cog', True):
+                    return
+                event = kwargs.get('event', item.name)
+                self.events.add(event[3:] if event.startswith('on_')
+                                else event)
@@ -0,0 +1,213 @@
+import asyncio
+import functools
+from typing import Any, Iterable, Optional
+import discord
+from loguru import logger
+
+from carpp import FuzzyIndex
+from .metric import metrics
+
+
+__all__ = [
+    'GuildMemberIndex',
+    'MemberIndex',
+    'fold'
+]
+
+
+# members added to an index between yields to the event loop; about 8ms of
+# work each
+BUILD_BATCH = 2000
+
+
+# names are stored folded, and queries are folded the same way before being
+# matched against them
+def fold(s: str) -> str:
+    return s.lower()
+
+
+# The members of one guild by name#discrim, discriminator and (folded) name
+# and nickname; names and nicknames are kept in carpp FuzzyIndexes, so fuzzy
+# matching them doesn't build anything or compare every member per lookup.
+# It starts out empty; see fill()
+class GuildMemberIndex:
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self.names = FuzzyIndex()
+        self.nicks = FuzzyIndex()
+        self.tags: dict[tuple[str, str], int] = {} # (name, discrim) -> id
+        self.discrims: dict[str, set[int]] = {}
+        self._tag_of: dict[int, tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tag_of)
+
+    # adds member, or updates it if it's already in the index
+    def add(self, member: discord.Member) -> None:
+        tag = (member.name, member.discriminator)
+        old_tag = self._tag_of.get(member.id)
+        if tag != old_tag:
+            if old_tag is not None:
+                self._remove_tag(member.id, old_tag)
+            self._tag_of[member.id] = tag
+            self.tags[tag] = member.id
+            self.discrims.setdefault(tag[1], set()).add(member.id)
+            self.names.set(member.id, fold(member.name))
+
+        if member.nick is None:
+            self.nicks.remove(member.id)
+        else:
+            self.nicks.set(member.id, fold(member.nick))
+
+    # adds the guild's current members BUILD_BATCH at a time, yielding to
+    # the loop in between, so that large guilds don't stall it; members that
+    # leave meanwhile are skipped
+    async def fill(self) -> None:
+        members = list(self.guild._members.values())
+        for i in range(0, len(members), BUILD_BATCH):
+            for member in members[i : i+BUILD_BATCH]:
+                if member.id in self.guild._members:
+                    self.add(member)
+            await asyncio.sleep(0)
+
+    def remove(self, member_id: int) -> None:
+        tag = self._tag_of.pop(member_id, None)
+        if tag is None:
+            return
+        self._remove_tag(member_id, tag)
+        self.names.remove(member_id)
+        self.nicks.remove(member_id)
+
+    def _remove_tag(self, member_id: int, tag: tuple[str, str]) -> None:
+        if self.tags.get(tag) == member_id:
+            del self.tags[tag]
+        ids = self.discrims[tag[1]]
+        ids.discard(member_id)
+        if not ids:
+            del self.discrims[tag[1]]
+
+    def get_by_tag(self, name: str, discrim: str
+                   ) -> Optional[discord.Member]:
+        member_id = self.tags.get((name, discrim))
+        if member_id is None:
+            return None
+        return self.guild.get_member(member_id)
+
+    def with_discrim(self, discrim: str) -> list[discord.Member]:
+        members = (self.guild.get_member(member_id)
+                   for member_id in self.discrims.get(discrim, ()))
+        return [m for m in members if m is not None]
+
+    # (weighted levenshtein dist., id) of the member whose name or nickname
+    # is closest to query, or (INF, -1) if there are no members; names win
+    # ties. Doesn't hold the GIL while matching, so it can run in a thread
+    def match(self, query: str) -> tuple[int, int]:
+        folded = fold(query)
+        by_name = self.names.match_one(folded)
+        by_nick = self.nicks.match_one(folded)
+        return by_name if by_name[0] <= by_nick[0] else by_nick
+
+
+# A GuildMemberIndex for every guild, filled in the background when the
+# guild becomes available (or is first looked up) and kept current from
+# member and user events, which Bot passes to handle(), and from member
+# chunks (see install())
+class MemberIndex:
+    def __init__(self):
+        self.guilds: dict[int, GuildMemberIndex] = {}
+        # guild id -> task filling the guild's index
+        self._builds: dict[int, asyncio.Task] = {}
+        self.builds = metrics.counter('member_index.builds')
+
+    # the guild's index, once it's been filled
+    async def get(self, guild: discord.Guild) -> GuildMemberIndex:
+        index = self.guilds.get(guild.id)
+        # a guild that becomes available again is a new object
+        if index is None or index.guild is not guild:
+            index = self._start_build(guild)
+        task = self._builds.get(guild.id)
+        if task is not None:
+            # a lookup that gives up doesn't cancel the build
+            await asyncio.shield(task)
+        return index
+
+    # starts filling the indexes of guilds that don't have a current one
+    def build(self, guilds: Iterable[discord.Guild]) -> None:
+        for guild in guilds:
+            index = self.guilds.get(guild.id)
+            if index is None or index.guild is not guild:
+                self._start_build(guild)
+
+    def _start_build(self, guild: discord.Guild) -> GuildMemberIndex:
+        self._cancel_build(guild.id)
+        # the index is reachable while it's filled, so that member events
+        # and chunks received meanwhile are applied to it
+        index = self.guilds[guild.id] = GuildMemberIndex(guild)
+        self._builds[guild.id] = asyncio.create_task(self._build(index))
+        return index
+
+    def _cancel_build(self, guild_id: int) -> None:
+        task = self._builds.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def _build(self, index: GuildMemberIndex) -> None:
+        guild_id = index.guild.id
+        try:
+            await index.fill()
+            self.builds.inc()
+            logger.debug(f"Member index built for guild {guild_id} "
+                         f"({len(index)} members)")
+        finally:
+            if self._builds.get(guild_id) is asyncio.current_task():
+                del self._builds[guild_id]
+
+    # chunking a guild adds its members without dispatching member events,
+    # so this wraps the chunk parser to add them as they arrive
+    def install(self, client: discord.Client) -> None:
+        parsers: dict[str, Any] = client._connection.parsers
+        parser = parsers['GUILD_MEMBERS_CHUNK']
+
+        @functools.wraps(parser)
+        def wrapper(data):
+            parser(data)
+            self._add_chunk(client.get_guild(int(data['guild_id'])), data)
+
+        parsers['GUILD_MEMBERS_CHUNK'] = wrapper
+
+    def _add_chunk(self, guild: Optional[discord.Guild],
+                   data: dict[str, Any]) -> None:
+        if guild is None:
+            return
+        index = self.guilds.get(guild.id)
+        # a stale index is rebuilt, with these members, when it's looked up
+        if index is None or index.guild is not guild:
+            return
+        for member_data in data.get('members', ()):
+            member = guild.get_member(int(member_data['user']['id']))
+            if member is not None:
+                index.add(member)
+
+    def handle(self, event: str, args: tuple[Any, ...]) -> None:
+        match event:
+            case 'member_join' | 'member_update':
+                member = args[-1]
+                index = self.guilds.get(member.guild.id)
+                if index is not None:
+                    index.add(member)
+            case 'member_remove':
+                member = args[0]
+                index = self.guilds.get(member.guild.id)
+                if index is not None:
+                    index.remove(member.id)
+            case 'user_update': # name or discriminator changed
+                user = args[-1]
+                for index in self.guilds.values():
+                    member = index.guild.get_member(user.id)
+                    if member is not None:
+                        index.add(member)
+            case 'guild_join' | 'guild_available':
+                self.build(args)
+            case 'guild_remove' | 'guild_unavailable':
+                self._cancel_build(args[0].id)
+                self.guilds.pop(args[0].id, None)
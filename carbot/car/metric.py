@@ -0,0 +1,120 @@
+from collections import deque
+import math
+from typing import Any, Union
+
+
+__all__ = [
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricRegistry',
+    'metrics'
+]
+
+
+def _percentile(ordered: list[float], p: float) -> float:
+    return ordered[max(0, math.ceil(p/100 * len(ordered)) - 1)]
+
+
+class Counter:
+    def __init__(self, name: str):
+        self.name = name
+        self.value: int = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Gauge:
+    def __init__(self, name: str):
+        self.name = name
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Histogram:
+    def __init__(self, name: str, window: int = 1024):
+        self.name = name
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count: int = 0
+        self.total: float = 0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p: float) -> float:
+        if len(self.samples) == 0:
+            return 0
+        return _percentile(sorted(self.samples), p)
+
+    def snapshot(self) -> dict[str, float]:
+        if len(self.samples) == 0:
+            return {'count': self.count}
+
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean': self.total / self.count,
+            'p50': _percentile(ordered, 50),
+            'p90': _percentile(ordered, 90),
+            'p99': _percentile(ordered, 99),
+            'max': ordered[-1]
+        }
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _get(self, name: str, cls: type, *args) -> Any:
+        if name not in self._metrics:
+            self._metrics[name] = cls(name, *args)
+        metric = self._metrics[name]
+        assert isinstance(metric, cls), f"{name} is not a {cls.__name__}"
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(name, Gauge)
+
+    def histogram(self, name: str, window: int = 1024) -> Histogram:
+        return self._get(name, Histogram, window)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {name: metric.snapshot()
+                for name, metric in sorted(self._metrics.items())}
+
+    def render(self) -> str:
+        lines = []
+        for name, value in self.snapshot().items():
+            if isinstance(value, dict):
+                value = ', '.join(
+                    f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                    for k, v in value.items()
+                )
+            lines.append(f"{name}: {value}")
+        return '\n'.join(lines)
+
+
+metrics = MetricRegistry()
@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from types import CodeType, FrameType
+from typing import Optional, TYPE_CHECKING
+from loguru import logger
+
+from .metric import metrics
+if TYPE_CHECKING:
+    from .cog_handler import CogHandler
+
+
+__all__ = [
+    'LoopMonitor'
+]
+
+
+class LoopMonitor:
+    def __init__(self, cog_handler: 'CogHandler', *, interval: float = 0.1,
+                 threshold: float = 0.25):
+        self.cog_handler = cog_handler
+        self.interval = interval
+        self.threshold = threshold
+
+        self.lag = metrics.histogram('loop.lag_seconds', window=4096)
+        self.stalls = metrics.counter('loop.stalls')
+
+        self._heartbeat: float = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(target=self._watch,
+                                        name="car-loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Loop monitor started; {self.interval=}, "
+                    f"{self.threshold=}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self) -> None:
+        while True:
+            bef = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self.lag.observe(max(0.0, self._heartbeat - bef - self.interval))
+
+    # runs in the watchdog thread
+    def _watch(self) -> None:
+        reported = False
+
+        while not self._stop.wait(self.interval):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.threshold:
+                reported = False
+            elif not reported:
+                # only report each stall once, while it is still happening
+                reported = True
+                self._report(blocked)
+
+    def _report(self, blocked: float) -> None:
+        assert self._loop_thread_id is not None
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+
+        self.stalls.inc()
+        stack = ''.join(traceback.format_stack(frame))
+        logger.warning(f"Event loop blocked for {blocked*1000:.0f}ms "
+                       f"(running: {self._find_running(frame)})\n{stack}")
+
+    def _callback_codes(self) -> dict[CodeType, str]:
+        codes: dict[CodeType, str] = {}
+
+        for cmds in (self.cog_handler.text_commands,
+                     self.cog_handler.slash_commands):
+            for cmd in cmds.values():
+                codes[cmd.func.__code__] = f"command '{cmd.name}'"
+
+        for event, dct in self.cog_handler.listeners.items():
+            for cog_name, listener in dct.items():
+                codes[listener.func.__code__] = f"listener {cog_name}.{event}"
+
+        return codes
+
+    def _find_running(self, frame: Optional[FrameType]) -> str:
+        # a running coroutine's frames are linked through the coroutines
+        # awaiting it, so the command or listener is somewhere up the stack
+        codes = self._callback_codes()
+        while frame is not None:
+            if frame.f_code in codes:
+                return codes[frame.f_code]
+            frame = frame.f_back
+        return "unknown"
@@ -0,0 +1,186 @@
+import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+import functools
+import importlib
+import multiprocessing
+import time
+from typing import Any, Callable, Generic, Optional, ParamSpec, TypeVar
+from loguru import logger
+
+from .exception import CommandError
+from .metric import metrics
+
+
+__all__ = [
+    'Offloader',
+    'CpuBoundFunction',
+    'cpu_bound',
+    'offloader'
+]
+
+
+P = ParamSpec('P')
+T = TypeVar('T')
+
+
+# Process pool workers look the function up by name instead of unpickling
+# it, since @cpu_bound replaces the module attribute with a CpuBoundFunction
+def _call_by_name(module_name: str, qualname: str, args: tuple[Any, ...]
+                  ) -> Any:
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+    if isinstance(obj, CpuBoundFunction):
+        obj = obj.func
+    return obj(*args)
+
+
+# Runs blocking functions off the event loop, either in a process pool (for
+# pure python code, which holds the GIL) or a thread pool (for code that
+# releases the GIL, like carpp). Each guild (None for DMs) may only have
+# per_guild calls running or queued in the pools at once; the rest wait
+# their turn on the loop.
+class Offloader:
+    def __init__(self, *, processes: Optional[int] = None,
+                 threads: Optional[int] = None, per_guild: int = 2,
+                 timeout: float = 30):
+        self.processes = processes
+        self.threads = threads
+        self.per_guild = per_guild
+        self.timeout = timeout
+
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._guild_limits: dict[Optional[int], asyncio.Semaphore] = {}
+
+        self.waiting = metrics.gauge('offload.waiting')
+        self.in_pool = metrics.gauge('offload.in_pool')
+        self.timeouts = metrics.counter('offload.timeouts')
+
+    # pools are created on first use so that importing car stays cheap
+    def _pool(self, threads: bool) -> Executor:
+        if threads:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    self.threads, thread_name_prefix="car-offload")
+            return self._thread_pool
+
+        if self._process_pool is None:
+            # forking a process with a running event loop and helper
+            # threads is unsafe
+            self._process_pool = ProcessPoolExecutor(
+                self.processes,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._process_pool
+
+    def _guild_limit(self, guild_id: Optional[int]) -> asyncio.Semaphore:
+        sem = self._guild_limits.get(guild_id)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_guild)
+            self._guild_limits[guild_id] = sem
+        return sem
+
+    async def run(self, func: Callable[..., T], *args: Any,
+                  guild_id: Optional[int] = None, threads: bool = False,
+                  timeout: Optional[float] = None, name: Optional[str] = None
+                  ) -> T:
+        name = name or getattr(func, '__name__', repr(func))
+        timeout = self.timeout if timeout is None else timeout
+
+        try:
+            return await asyncio.wait_for(
+                self._run(func, args, guild_id, threads, name), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts.inc()
+            logger.warning(f"Offloaded call to {name} timed out after "
+                           f"{timeout}s; {guild_id=}")
+            raise CommandError("This is taking too long! Please try again "
+                               "later.")
+
+    async def _run(self, func: Callable[..., T], args: tuple[Any, ...],
+                   guild_id: Optional[int], threads: bool, name: str) -> T:
+        loop = asyncio.get_running_loop()
+        sem = self._guild_limit(guild_id)
+
+        bef = time.perf_counter()
+        self.waiting.inc()
+        try:
+            await sem.acquire()
+        finally:
+            self.waiting.dec()
+        metrics.histogram(f'offload.{name}.wait_seconds').observe(
+            time.perf_counter() - bef)
+
+        try:
+            cfut = self._pool(threads).submit(func, *args)
+        except BaseException:
+            sem.release()
+            raise
+        self.in_pool.inc()
+        started = time.perf_counter()
+
+        # the guild's slot is held until the work actually finishes, even if
+        # the caller timed out, so that abandoned calls can't pile up
+        def done(_: Future) -> None:
+            sem.release()
+            self.in_pool.dec()
+            metrics.histogram(f'offload.{name}.run_seconds').observe(
+                time.perf_counter() - started)
+
+        def on_done(f: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(done, f)
+            except RuntimeError: # the loop was closed in the meantime
+                pass
+        cfut.add_done_callback(on_done)
+
+        return await asyncio.wrap_future(cfut)
+
+    def shutdown(self) -> None:
+        for pool in (self._process_pool, self._thread_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._process_pool = None
+        self._thread_pool = None
+
+
+offloader = Offloader()
+
+
+class CpuBoundFunction(Generic[P, T]):
+    def __init__(self, func: Callable[P, T], *, threads: bool = False,
+                 timeout: Optional[float] = None):
+        self.func = func
+        self.threads = threads
+        self.timeout = timeout
+        functools.update_wrapper(self, func)
+
+    # calling it directly still runs inline
+    def __call__(self, *args: P.args, **kwargs: P.kwargs) -> T:
+        return self.func(*args, **kwargs)
+
+    async def run(self, *args: Any, guild_id: Optional[int] = None) -> T:
+        if self.threads:
+            return await offloader.run(
+                self.func, *args, guild_id=guild_id, threads=True,
+                timeout=self.timeout, name=self.func.__qualname__)
+
+        return await offloader.run(
+            _call_by_name, self.func.__module__, self.func.__qualname__, args,
+            guild_id=guild_id, timeout=self.timeout,
+            name=self.func.__qualname__)
+
+# Marks a pure function as CPU-heavy; `await f.run(*args, guild_id=...)`
+# runs it in a process pool (or a thread pool, if threads=True because it
+# releases the GIL). The function must be defined at module level (or as a
+# staticmethod), and its arguments and result must be picklable.
+def cpu_bound(func: Optional[Callable] = None, *, threads: bool = False,
+              timeout: Optional[float] = None):
+    def decorator(func):
+        return CpuBoundFunction(func, threads=threads, timeout=timeout)
+
+    if func is not None: # used as @cpu_bound
+        return decorator(func)
+    return decorator
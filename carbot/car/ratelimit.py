@@ -0,0 +1,73 @@
+import functools
+import sys
+import time
+from typing import Any, Callable
+import discord
+
+
+__all__ = [
+    'RateLimitTracker',
+    'rate_limits'
+]
+
+
+# The rate limit bucket a request path belongs to, by its major parameter,
+# e.g. for /api/v9/channels/1/messages/2 -> ('channels', '1'). Webhook
+# tokens are left out, since keys outlive the interactions they belong to.
+def route_key(path: str) -> tuple[str, ...]:
+    parts = path.strip('/').split('/')
+    if len(parts) >= 2 and parts[0] == 'api' and parts[1].startswith('v'):
+        parts = parts[2:]
+    return tuple(parts[:2])
+
+
+# Remembers the X-RateLimit-* headers of every API response, so that
+# outgoing work (see EditScheduler) can be held back until its route's
+# bucket has room instead of queueing inside discord.py's HTTP client
+class RateLimitTracker:
+    def __init__(self):
+        # route key -> monotonic time at which the bucket resets
+        self.exhausted_until: dict[tuple[str, ...], float] = {}
+        self._installed = False
+
+    def observe(self, path: str, headers: Any) -> None:
+        key = route_key(path)
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+
+        if remaining == '0' and reset_after is not None:
+            self.exhausted_until[key] = time.monotonic() + float(reset_after)
+        else:
+            self.exhausted_until.pop(key, None)
+
+    # seconds until a request on this route can be made without waiting
+    def delay(self, key: tuple[str, ...]) -> float:
+        until = self.exhausted_until.get(key)
+        if until is None:
+            return 0
+        delay = until - time.monotonic()
+        if delay <= 0:
+            del self.exhausted_until[key]
+            return 0
+        return delay
+
+    # discord.py doesn't expose response headers, so this wraps the helper
+    # that its HTTP client passes every response through. Webhook requests
+    # (including interaction responses) don't go through it; discord.py's
+    # webhook adapter waits out those buckets itself.
+    def install(self) -> None:
+        if self._installed:
+            return
+        http = sys.modules[discord.http.HTTPClient.__module__]
+        json_or_text: Callable = http.json_or_text # type: ignore[attr-defined]
+
+        @functools.wraps(json_or_text)
+        async def wrapper(response):
+            self.observe(response.url.path, response.headers)
+            return await json_or_text(response)
+
+        http.json_or_text = wrapper # type: ignore[attr-defined]
+        self._installed = True
+
+
+rate_limits = RateLimitTracker()
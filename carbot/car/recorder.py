@@ -0,0 +1,213 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Callable, Iterator, Optional, TextIO
+import discord
+from loguru import logger
+
+from .metric import metrics
+
+
+__all__ = [
+    'EventRecorder',
+    'Redactor',
+    'read_events'
+]
+
+
+# noisy events that don't exercise the bot's own code
+DEFAULT_EXCLUDE = frozenset(('PRESENCE_UPDATE', 'TYPING_START'))
+
+# string fields written by (or identifying) users, including the names of
+# guilds, channels, roles and emojis
+REDACTED_KEYS = frozenset((
+    'content', 'topic', 'username', 'global_name', 'nick', 'filename',
+    'url', 'proxy_url', 'avatar', 'banner', 'value', 'name'
+))
+DROPPED_KEYS = frozenset(('email', 'phone', 'embeds'))
+
+WORD_REGEX = re.compile(r'[^\W\d_]+')
+LEADING_TOKEN_REGEX = re.compile(r'\S+')
+
+
+# Replaces every word in user text with a pseudonym of the same length and
+# case pattern, so that text keeps its shape (quotes, spacing, numbers and
+# mentions are kept as is) without being readable. Pseudonyms are derived
+# from the word (case-insensitively) and a random salt, so the same name
+# maps to the same pseudonym everywhere in one recording, e.g. a member's
+# username and a command argument naming them, and arguments still resolve
+# when replayed. A message's leading token is kept if it starts with the
+# command prefix of the message's guild (prefix_of(guild_id), guild_id being
+# None in DMs), e.g. ']wpm'; so are the command and option names of
+# interactions.
+class Redactor:
+    def __init__(self, salt: Optional[bytes] = None, *,
+                 prefix_of: Callable[[Optional[int]], str] = lambda _: "]",
+                 max_cached: int = 100000):
+        self.salt = os.urandom(16) if salt is None else salt
+        self.prefix_of = prefix_of
+        self.max_cached = max_cached
+        self._pseudonyms: dict[str, str] = {}
+
+    def pseudonym(self, word: str) -> str:
+        folded = word.lower()
+        fake = self._pseudonyms.get(folded)
+        if fake is None:
+            digest = hashlib.blake2b(folded.encode(), key=self.salt,
+                                     digest_size=64).digest()
+            while len(digest) < len(folded):
+                digest += hashlib.blake2b(digest, key=self.salt).digest()
+            fake = ''.join(chr(97 + b%26) for b in digest[:len(folded)])
+            if len(self._pseudonyms) >= self.max_cached:
+                self._pseudonyms.clear()
+            self._pseudonyms[folded] = fake
+
+        return ''.join(f.upper() if c.isupper() else f
+                       for c, f in zip(word, fake))
+
+    def text(self, text: str) -> str:
+        return WORD_REGEX.sub(lambda m: self.pseudonym(m[0]), text)
+
+    def content(self, content: str, guild_id: Optional[int] = None) -> str:
+        prefix = self.prefix_of(guild_id)
+        m = LEADING_TOKEN_REGEX.match(content)
+        if m is None or not prefix or not m[0].startswith(prefix):
+            return self.text(content)
+        return content[:m.end()] + self.text(content[m.end():])
+
+    # guild_id is that of the enclosing payload, for nested messages
+    def redact(self, obj: Any, guild_id: Optional[int] = None) -> Any:
+        if isinstance(obj, list):
+            return [self.redact(v, guild_id) for v in obj]
+        if not isinstance(obj, dict):
+            return obj
+
+        if obj.get('guild_id') is not None:
+            guild_id = int(obj['guild_id'])
+        return {k: self._redact_field(k, v, guild_id) for k, v in obj.items()}
+
+    def _redact_field(self, key: str, val: Any, guild_id: Optional[int]
+                      ) -> Any:
+        if key in DROPPED_KEYS:
+            return [] if isinstance(val, list) else None
+        if key == 'content' and isinstance(val, str):
+            return self.content(val, guild_id)
+        if key in REDACTED_KEYS and isinstance(val, str):
+            return self.text(val)
+        return self.redact(val, guild_id)
+
+    def redact_event(self, event: str, data: Any) -> Any:
+        if event != 'INTERACTION_CREATE' or not isinstance(data, dict) \
+                or not isinstance(data.get('data'), dict):
+            return self.redact(data)
+
+        guild_id = data.get('guild_id')
+        redacted = self.redact(data)
+        redacted['data'] = self._command_data(
+            data['data'], None if guild_id is None else int(guild_id))
+        return redacted
+
+    # an interaction's data, keeping the (command, subcommand and option)
+    # names the bot matches on; values and resolved objects are redacted
+    def _command_data(self, data: dict[str, Any], guild_id: Optional[int]
+                      ) -> dict[str, Any]:
+        redacted = {}
+        for k, v in data.items():
+            if k == 'name':
+                redacted[k] = v
+            elif k == 'options' and isinstance(v, list):
+                redacted[k] = [self._command_data(o, guild_id)
+                               if isinstance(o, dict) else o for o in v]
+            else:
+                redacted[k] = self._redact_field(k, v, guild_id)
+        return redacted
+
+
+# Writes the raw payload of every gateway event the bot receives to a JSONL
+# file, one {"ts": seconds since recording started, "t": event name,
+# "d": payload} object per line, for car.testing.replay. The payloads are
+# captured by wrapping discord.py's parsers, so they are recorded exactly as
+# they were handed to the bot (after decompression and JSON decoding).
+# prefix_of is passed to the Redactor.
+class EventRecorder:
+    def __init__(self, path: str, *, redact: bool = True,
+                 prefix_of: Callable[[Optional[int]], str] = lambda _: "]",
+                 exclude: frozenset[str] = DEFAULT_EXCLUDE,
+                 max_events: Optional[int] = None, flush_every: int = 100):
+        self.path = path
+        self.redactor: Optional[Redactor] = \
+            Redactor(prefix_of=prefix_of) if redact else None
+        self.exclude = exclude
+        self.max_events = max_events
+        self.flush_every = flush_every
+
+        self.count = 0
+        self._file: Optional[TextIO] = None
+        self._started = time.monotonic()
+
+        self.recorded = metrics.counter('recorder.events')
+        self.failed = metrics.counter('recorder.failed')
+
+    def install(self, client: discord.Client) -> None:
+        # the gateway looks parsers up in this dict on every event, so they
+        # can be wrapped in place, before or after connecting
+        parsers: dict[str, Callable] = client._connection.parsers
+        for event, parser in parsers.items():
+            if event not in self.exclude:
+                parsers[event] = self._wrap(event, parser)
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._started = time.monotonic()
+        logger.info(f"Recording gateway events to {self.path}; "
+                    f"redact={self.redactor is not None}")
+
+    def _wrap(self, event: str, parser: Callable) -> Callable:
+        @functools.wraps(parser)
+        def wrapper(data):
+            self.record(event, data)
+            return parser(data)
+        return wrapper
+
+    def record(self, event: str, data: Any) -> None:
+        if self._file is None:
+            return
+        if self.max_events is not None and self.count >= self.max_events:
+            self.close()
+            return
+
+        # the bot must never fail to handle an event because of this
+        try:
+            if self.redactor is not None:
+                data = self.redactor.redact_event(event, data)
+            line = json.dumps({
+                'ts': round(time.monotonic() - self._started, 6),
+                't': event,
+                'd': data
+            }, separators=(',', ':'))
+            self._file.write(line + '\n')
+        except Exception as e:
+            self.failed.inc()
+            logger.warning(f"Failed to record {event}: {e!r}")
+            return
+
+        self.count += 1
+        self.recorded.inc()
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f"Recorded {self.count} gateway events to "
+                        f"{self.path}")
+
+
+def read_events(path: str) -> Iterator[dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,180 @@
+import glob
+import hashlib
+import os
+import pickle
+import sys
+from typing import Any, Callable, Iterable, Optional, TYPE_CHECKING
+import discord
+from loguru import logger
+
+from .metric import metrics
+if TYPE_CHECKING:
+    from .argument import Argument
+
+
+__all__ = [
+    'RegistryCache',
+    'registry_cache'
+]
+
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Caches what Command.__init__ derives from type hints (Argument objects) and
+# the output of CogHandler.slash_commands_json(), keyed by the hash of the
+# source files they were derived from. Entries for a module are only used if
+# the module's source is byte-for-byte unchanged, and the whole cache is
+# dropped if car itself, python or discord.py changed.
+class RegistryCache:
+    def __init__(self, path: str = "registry_cache.pickle"):
+        self.path = path
+        self.enabled = False
+
+        self._framework_hash: Optional[str] = None
+        self._file_hashes: dict[str, tuple[int, int, str]] = {}
+        # module name -> (source hash, {func qualname: pickled args})
+        self._modules: dict[str, tuple[str, dict[str, bytes]]] = {}
+        # hash of all loaded cog modules -> slash_commands_json() output
+        self._slash_json: dict[str, bytes] = {}
+        self._dirty = False
+
+        self.hits = metrics.counter('registry_cache.hits')
+        self.misses = metrics.counter('registry_cache.misses')
+
+    @property
+    def framework_hash(self) -> str:
+        if self._framework_hash is None:
+            h = hashlib.sha256(f"{sys.version}|{discord.__version__}".encode())
+            car_dir = os.path.dirname(os.path.abspath(__file__))
+            for path in sorted(glob.glob(os.path.join(car_dir, '*.py'))):
+                h.update(_file_hash(path).encode())
+            self._framework_hash = h.hexdigest()
+        return self._framework_hash
+
+    def module_hash(self, module_name: str) -> Optional[str]:
+        module = sys.modules.get(module_name)
+        path = getattr(module, '__file__', None)
+        if path is None:
+            return None
+
+        st = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached is None or cached[:2] != (st.st_mtime_ns, st.st_size):
+            cached = (st.st_mtime_ns, st.st_size, _file_hash(path))
+            self._file_hashes[path] = cached
+        return cached[2]
+
+    def load(self) -> None:
+        self.enabled = True
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            logger.info("No registry cache found; it will be created")
+            return
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+                ImportError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable registry cache: {e}")
+            return
+
+        if not isinstance(data, dict) \
+                or data.get('framework') != self.framework_hash:
+            logger.info("Registry cache is stale; rebuilding it")
+            self._dirty = True
+            return
+
+        self._modules = data['modules']
+        self._slash_json = data['slash_json']
+        logger.info(f"Registry cache loaded ({len(self._modules)} modules)")
+
+    def save(self) -> None:
+        if not self.enabled or not self._dirty:
+            return
+
+        data = {
+            'framework': self.framework_hash,
+            'modules': self._modules,
+            'slash_json': self._slash_json
+        }
+        # pid-unique so that shard processes starting together don't clobber
+        # each other's partially written file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        logger.debug(f"Registry cache saved to {self.path}")
+
+    def get_args(self, func: Callable) -> Optional[dict[str, 'Argument']]:
+        if not self.enabled:
+            return None
+
+        entry = self._modules.get(func.__module__)
+        if entry is None or entry[0] != self.module_hash(func.__module__) \
+                or func.__qualname__ not in entry[1]:
+            self.misses.inc()
+            return None
+
+        self.hits.inc()
+        return pickle.loads(entry[1][func.__qualname__])
+
+    def put_args(self, func: Callable, args: dict[str, 'Argument']) -> None:
+        if not self.enabled:
+            return
+
+        source_hash = self.module_hash(func.__module__)
+        if source_hash is None:
+            return
+
+        try:
+            pickled = pickle.dumps(args)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            # e.g. a converter holding a lambda; introspect it every time
+            return
+
+        entry = self._modules.get(func.__module__)
+        if entry is None or entry[0] != source_hash:
+            entry = (source_hash, {})
+            self._modules[func.__module__] = entry
+        entry[1][func.__qualname__] = pickled
+        self._dirty = True
+
+    def _modules_key(self, module_names: Iterable[str]) -> Optional[str]:
+        h = hashlib.sha256()
+        for name in sorted(set(module_names)):
+            source_hash = self.module_hash(name)
+            if source_hash is None:
+                return None
+            h.update(f"{name}:{source_hash}|".encode())
+        return h.hexdigest()
+
+    def get_slash_json(self, module_names: Iterable[str]
+                       ) -> Optional[list[dict[str, Any]]]:
+        if not self.enabled:
+            return None
+
+        key = self._modules_key(module_names)
+        if key is None or key not in self._slash_json:
+            self.misses.inc()
+            return None
+
+        self.hits.inc()
+        return pickle.loads(self._slash_json[key])
+
+    def put_slash_json(self, module_names: Iterable[str],
+                       cmd_list: list[dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+
+        key = self._modules_key(module_names)
+        if key is None:
+            return
+        # only the latest set of cogs is worth keeping
+        self._slash_json = {key: pickle.dumps(cmd_list)}
+        self._dirty = True
+
+
+registry_cache = RegistryCache()
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional, TYPE_CHECKING
+import discord
+from loguru import logger
+
+from .metric import metrics
+if TYPE_CHECKING:
+    from .command import Command
+    from .context import Context
+
+
+__all__ = [
+    'RenderCache',
+    'render_cache'
+]
+
+
+# Caches help embeds and command usage strings, which only change when the
+# set of loaded commands or a guild's settings do. Help embeds are keyed by
+# the prefix, guild and the caller's signature: one value per check class
+# (see Check.signature) among the commands, so that callers that every check
+# treats the same share an entry. Everything is dropped by invalidate(),
+# which CogHandler calls whenever a cog is (un)loaded.
+class RenderCache:
+    def __init__(self, max_embeds: int = 1024):
+        self.max_embeds = max_embeds
+        # bumped by invalidate()
+        self.version = 0
+
+        self._embeds: OrderedDict[Hashable, discord.Embed] = OrderedDict()
+        # (command, prefix) -> usage
+        self._usages: dict[tuple['Command', str], str] = {}
+        # embed key -> one check of each check class among its commands
+        self._checks: dict[Hashable, tuple[Any, ...]] = {}
+
+        self.hits = metrics.counter('render_cache.hits')
+        self.misses = metrics.counter('render_cache.misses')
+
+    def invalidate(self, reason: str = "") -> None:
+        self.version += 1
+        self._embeds.clear()
+        self._usages.clear()
+        self._checks.clear()
+        logger.debug(f"Render cache invalidated ({reason}); "
+                     f"version={self.version}")
+
+    def usage(self, cmd: 'Command', prefix: str) -> str:
+        key = (cmd, prefix)
+        usage = self._usages.get(key)
+        if usage is None:
+            usage = self._usages[key] = cmd.usage(prefix=prefix)
+        return usage
+
+    # one check per check class used by commands, in a stable order
+    def _distinct_checks(self, commands: Iterable['Command']
+                         ) -> tuple[Any, ...]:
+        by_class: dict[type, Any] = {}
+        for cmd in commands:
+            for check in cmd.checks:
+                by_class.setdefault(type(check), check)
+        return tuple(check for _, check in sorted(
+            by_class.items(), key=lambda x: x[0].__qualname__))
+
+    def caller_signature(self, ctx: 'Context',
+                         commands: Iterable['Command'],
+                         key: Optional[Hashable] = None
+                         ) -> Optional[tuple[Hashable, ...]]:
+        if key is not None and key in self._checks:
+            checks = self._checks[key]
+        else:
+            checks = self._distinct_checks(commands)
+            if key is not None:
+                if len(self._checks) >= self.max_embeds:
+                    self._checks.clear()
+                self._checks[key] = checks
+
+        sig = []
+        for check in checks:
+            s = check.signature(ctx)
+            if s is None:
+                return None
+            sig.append(s)
+        return tuple(sig)
+
+    # Returns the embed build() makes for the caller, building it only if no
+    # caller with the same signature has seen it since the last invalidation;
+    # key identifies what is rendered (and how). The embed is shared, so it
+    # must not be modified
+    def embed(self, ctx: 'Context', commands: Iterable['Command'],
+              build: Callable[[], discord.Embed], *key: Hashable
+              ) -> discord.Embed:
+        sig = self.caller_signature(ctx, commands, key=key)
+        if sig is None:
+            self.misses.inc()
+            return build()
+
+        full_key = (key, ctx.prefix, ctx.guild_id, sig)
+        e = self._embeds.get(full_key)
+        if e is not None:
+            self._embeds.move_to_end(full_key)
+            self.hits.inc()
+            return e
+
+        self.misses.inc()
+        e = build()
+        self._embeds[full_key] = e
+        if len(self._embeds) > self.max_embeds:
+            self._embeds.popitem(last=False)
+        return e
+
+
+render_cache = RenderCache()
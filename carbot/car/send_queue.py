@@ -0,0 +1,162 @@
+import asyncio
+from collections import deque
+import time
+from typing import Optional
+import discord
+from loguru import logger
+
+from .metric import metrics
+from .ratelimit import rate_limits
+
+
+__all__ = [
+    'QueuedEmbed',
+    'SendQueue'
+]
+
+
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000 # across all embeds of a message
+
+
+class QueuedEmbed:
+    def __init__(self, embed: discord.Embed):
+        self.embed = embed
+        self.queued_at = time.monotonic()
+        self.flushed = False
+        # (message, index of the embed in message.embeds)
+        self.sent: asyncio.Future[tuple[discord.Message, int]] \
+            = asyncio.get_running_loop().create_future()
+        self.sent.add_done_callback(_retrieve)
+
+    # Swaps the embed if it hasn't been sent yet; returns whether it did
+    def replace(self, embed: discord.Embed) -> bool:
+        if self.flushed:
+            return False
+        self.embed = embed
+        return True
+
+
+def _retrieve(fut: asyncio.Future) -> None:
+    if not fut.cancelled():
+        fut.exception()
+
+
+class _ChannelQueue:
+    def __init__(self):
+        self.entries: deque[QueuedEmbed] = deque()
+        self.chars = 0
+        self.wakeup = asyncio.Event()
+
+    def full(self) -> bool:
+        return len(self.entries) >= MAX_EMBEDS \
+            or self.chars >= MAX_EMBED_CHARS
+
+
+# Batches embeds sent to the same channel (e.g. log channels) into messages
+# of up to 10 embeds. A batch is sent once it is full or max_delay seconds
+# after its first embed was queued, whichever comes first, and not before
+# the channel's rate limit bucket has room. If more than max_queued embeds
+# are waiting for a channel, the oldest are dropped.
+class SendQueue:
+    def __init__(self, *, max_delay: float = 1.0, max_queued: int = 200):
+        self.max_delay = max_delay
+        self.max_queued = max_queued
+        self._queues: dict[int, _ChannelQueue] = {}
+
+        self.depth = metrics.gauge('send_queue.depth')
+        self.dropped = metrics.counter('send_queue.dropped')
+        self.failed = metrics.counter('send_queue.failed')
+        self.messages = metrics.counter('send_queue.messages')
+        self.embeds = metrics.counter('send_queue.embeds')
+        self.latency = metrics.histogram('send_queue.latency_seconds')
+
+    def enqueue(self, channel: discord.abc.Messageable,
+                embed: discord.Embed) -> QueuedEmbed:
+        channel_id: int = channel.id # type: ignore[attr-defined]
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = _ChannelQueue()
+            self._queues[channel_id] = queue
+            asyncio.create_task(self._run(channel, channel_id, queue))
+
+        entry = QueuedEmbed(embed)
+        queue.entries.append(entry)
+        queue.chars += len(embed)
+        self.depth.inc()
+
+        while len(queue.entries) > self.max_queued:
+            dropped = queue.entries.popleft()
+            queue.chars -= len(dropped.embed)
+            dropped.sent.cancel()
+            self.depth.dec()
+            self.dropped.inc()
+
+        if queue.full():
+            queue.wakeup.set()
+        return entry
+
+    def _take_batch(self, queue: _ChannelQueue) -> list[QueuedEmbed]:
+        batch: list[QueuedEmbed] = []
+        chars = 0
+        while queue.entries and len(batch) < MAX_EMBEDS:
+            # embeds may have been replaced since they were counted
+            size = len(queue.entries[0].embed)
+            if batch and chars + size > MAX_EMBED_CHARS:
+                break
+            entry = queue.entries.popleft()
+            entry.flushed = True
+            batch.append(entry)
+            chars += size
+        queue.chars = sum(len(e.embed) for e in queue.entries)
+        self.depth.dec(len(batch))
+        return batch
+
+    async def _run(self, channel: discord.abc.Messageable, channel_id: int,
+                   queue: _ChannelQueue) -> None:
+        route = ('channels', str(channel_id))
+        try:
+            while queue.entries:
+                deadline = queue.entries[0].queued_at + self.max_delay
+                while not queue.full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    queue.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(queue.wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+                delay = rate_limits.delay(route)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                batch = self._take_batch(queue)
+                if not batch:
+                    continue
+                await self._send(channel, batch)
+        finally:
+            del self._queues[channel_id]
+            for entry in queue.entries:
+                entry.sent.cancel()
+            self.depth.dec(len(queue.entries))
+
+    async def _send(self, channel: discord.abc.Messageable,
+                    batch: list[QueuedEmbed]) -> None:
+        try:
+            msg = await channel.send(embeds=[e.embed for e in batch])
+        except Exception as e:
+            self.failed.inc(len(batch))
+            logger.warning(f"Sending {len(batch)} queued embeds to {channel}"
+                           f" failed: {e!r}")
+            for entry in batch:
+                entry.sent.set_exception(e)
+            return
+
+        now = time.monotonic()
+        self.messages.inc()
+        self.embeds.inc(len(batch))
+        for i, entry in enumerate(batch):
+            self.latency.observe(now - entry.queued_at)
+            entry.sent.set_result((msg, i))
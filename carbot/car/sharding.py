@@ -0,0 +1,275 @@
+import asyncio
+import inspect
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import threading
+import time
+from typing import Any, Callable, Optional
+from loguru import logger
+
+
+__all__ = [
+    'QUERY_TIMEOUT',
+    'ShardIPC',
+    'ShardSupervisor'
+]
+
+
+# how long a query waits for shards by default, in seconds
+QUERY_TIMEOUT = 10
+# how much longer a shard waits for a query's results than the supervisor
+# waits for answers, so that partial results arrive in time
+RESULT_GRACE = 5
+
+# IPC messages are dicts with an 'op' key:
+#   worker -> supervisor: query    {id, name, args, timeout}
+#                         response {id, result}
+#   supervisor -> worker: request  {id, name, args}
+#                         result   {id, results}
+# A query is sent to every live shard (including the one that asked);
+# results are ordered by shard id, with None for shards that failed to
+# answer within the query's timeout.
+
+class ShardIPC:
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.handlers: dict[str, Callable[[Any], Any]] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._next_id: int = 0
+        self._send_lock = threading.Lock()
+
+    def add_handler(self, name: str, func: Callable[[Any], Any]) -> None:
+        self.handlers[name] = func
+
+    def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._read, name="car-ipc-reader",
+                         daemon=True).start()
+
+    def _send(self, msg: dict[str, Any]) -> None:
+        with self._send_lock:
+            self.conn.send(msg)
+
+    # runs in the reader thread
+    def _read(self) -> None:
+        assert self._loop is not None
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                logger.warning("IPC channel to the shard supervisor closed")
+                return
+            self._loop.call_soon_threadsafe(self._handle, msg)
+
+    def _handle(self, msg: dict[str, Any]) -> None:
+        match msg['op']:
+            case 'request':
+                asyncio.create_task(self._respond(msg))
+            case 'result':
+                fut = self._pending.pop(msg['id'], None)
+                if fut is not None and not fut.done():
+                    fut.set_result(msg['results'])
+
+    async def _respond(self, msg: dict[str, Any]) -> None:
+        result = None
+        handler = self.handlers.get(msg['name'])
+
+        if handler is None:
+            logger.error(f"No IPC handler for '{msg['name']}'")
+        else:
+            try:
+                result = handler(msg['args'])
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception:
+                logger.exception(f"IPC handler '{msg['name']}' failed")
+                result = None
+
+        self._send({'op': 'response', 'id': msg['id'], 'result': result})
+
+    # Shards get timeout seconds to answer. Raises asyncio.TimeoutError only
+    # if the supervisor doesn't send the (partial) results RESULT_GRACE
+    # seconds after that
+    async def query_all(self, name: str, args: Any = None, *,
+                        timeout: float = QUERY_TIMEOUT) -> list[Any]:
+        qid = self._next_id
+        self._next_id += 1
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[qid] = fut
+        self._send({'op': 'query', 'id': qid, 'name': name, 'args': args,
+                    'timeout': timeout})
+
+        try:
+            return await asyncio.wait_for(fut, timeout + RESULT_GRACE)
+        finally:
+            self._pending.pop(qid, None)
+
+
+class _Worker:
+    def __init__(self, process: multiprocessing.process.BaseProcess,
+                 conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.started = time.monotonic()
+
+
+class _Query:
+    def __init__(self, origin: int, qid: int, waiting: set[int],
+                 deadline: float):
+        self.origin = origin
+        self.qid = qid
+        self.waiting = waiting
+        self.deadline = deadline
+        self.results: dict[int, Any] = {}
+
+
+# Runs target(shard_id, shard_count, conn, *args) in one process per shard,
+# restarts shards that crash, and routes IPC queries between them.
+# query_timeout is for queries that don't give their own
+class ShardSupervisor:
+    def __init__(self, target: Callable[..., None], shard_count: int, *,
+                 args: tuple[Any, ...] = (),
+                 query_timeout: float = QUERY_TIMEOUT,
+                 max_backoff: float = 60, stable_after: float = 60):
+        self.target = target
+        self.shard_count = shard_count
+        self.args = args
+        self.query_timeout = query_timeout
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+
+        self.workers: dict[int, _Worker] = {}
+        self.failures: dict[int, int] = {}
+        self.restart_at: dict[int, float] = {}
+        self.queries: dict[tuple[int, int], _Query] = {}
+
+        self._mp = multiprocessing.get_context('spawn')
+
+    def _spawn(self, shard_id: int) -> None:
+        parent_conn, child_conn = self._mp.Pipe()
+        process = self._mp.Process(
+            target=self.target, name=f"shard-{shard_id}",
+            args=(shard_id, self.shard_count, child_conn, *self.args)
+        )
+        process.start()
+        child_conn.close()
+
+        self.workers[shard_id] = _Worker(process, parent_conn)
+        logger.info(f"Started shard {shard_id}/{self.shard_count} "
+                    f"(pid {process.pid})")
+
+    def run(self) -> None:
+        logger.info(f"Starting {self.shard_count} shards")
+        for shard_id in range(self.shard_count):
+            self._spawn(shard_id)
+
+        try:
+            while self.workers or self.restart_at:
+                self._poll()
+        except KeyboardInterrupt:
+            logger.info("Stopping shards")
+        finally:
+            for worker in self.workers.values():
+                worker.process.terminate()
+            for worker in self.workers.values():
+                worker.process.join()
+
+    def _poll(self) -> None:
+        now = time.monotonic()
+        deadlines = [*self.restart_at.values(),
+                     *(q.deadline for q in self.queries.values())]
+        timeout = max(0, min(deadlines, default=now+1) - now)
+
+        by_conn = {w.conn: i for i, w in self.workers.items()}
+        by_sentinel = {w.process.sentinel: i
+                       for i, w in self.workers.items()}
+
+        for obj in wait([*by_conn, *by_sentinel], timeout=min(timeout, 1)):
+            if obj in by_conn:
+                shard_id = by_conn[obj]
+                try:
+                    msg = obj.recv() # type: ignore[union-attr]
+                except (EOFError, OSError):
+                    continue # the process sentinel handles this
+                self._route(shard_id, msg)
+            else:
+                self._on_exit(by_sentinel[obj]) # type: ignore[index]
+
+        now = time.monotonic()
+        for shard_id, at in list(self.restart_at.items()):
+            if at <= now:
+                del self.restart_at[shard_id]
+                self._spawn(shard_id)
+
+        for key, query in list(self.queries.items()):
+            if query.deadline <= now:
+                logger.warning(f"IPC query {key} timed out waiting for "
+                               f"shards {sorted(query.waiting)}")
+                self._finish(key)
+
+    def _send(self, shard_id: int, msg: dict[str, Any]) -> None:
+        worker = self.workers.get(shard_id)
+        if worker is None:
+            return
+        try:
+            worker.conn.send(msg)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def _route(self, shard_id: int, msg: dict[str, Any]) -> None:
+        match msg['op']:
+            case 'query':
+                key = (shard_id, msg['id'])
+                self.queries[key] = _Query(
+                    shard_id, msg['id'], set(self.workers),
+                    time.monotonic()
+                    + msg.get('timeout', self.query_timeout)
+                )
+                for target in self.workers:
+                    self._send(target, {'op': 'request', 'id': key,
+                                        'name': msg['name'],
+                                        'args': msg['args']})
+            case 'response':
+                key = msg['id']
+                query = self.queries.get(key)
+                if query is None:
+                    return
+                query.results[shard_id] = msg['result']
+                query.waiting.discard(shard_id)
+                if not query.waiting:
+                    self._finish(key)
+
+    def _finish(self, key: tuple[int, int]) -> None:
+        query = self.queries.pop(key)
+        results = [query.results.get(i) for i in range(self.shard_count)]
+        self._send(query.origin, {'op': 'result', 'id': query.qid,
+                                  'results': results})
+
+    def _on_exit(self, shard_id: int) -> None:
+        worker = self.workers.pop(shard_id)
+        worker.process.join()
+        worker.conn.close()
+        code = worker.process.exitcode
+
+        for key, query in list(self.queries.items()):
+            query.waiting.discard(shard_id)
+            if not query.waiting:
+                self._finish(key)
+
+        if code == 0:
+            logger.info(f"Shard {shard_id} stopped")
+            return
+
+        if time.monotonic() - worker.started >= self.stable_after:
+            self.failures[shard_id] = 0
+        self.failures[shard_id] = self.failures.get(shard_id, 0) + 1
+
+        backoff = min(self.max_backoff, 2 ** (self.failures[shard_id]-1))
+        logger.error(f"Shard {shard_id} exited with code {code}; restarting "
+                     f"in {backoff}s")
+        self.restart_at[shard_id] = time.monotonic() + backoff
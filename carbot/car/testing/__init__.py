@@ -0,0 +1,2 @@
+from .gateway import *
+from .fakes import *
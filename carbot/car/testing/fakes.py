@@ -0,0 +1,379 @@
+from datetime import datetime, timezone
+import itertools
+import json
+import random
+import sys
+from typing import Any, Iterable, Optional, Union
+import discord
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+from .gateway import message_payload
+
+
+__all__ = [
+    'FakeDiscord',
+    'FakeHTTP',
+    'FakeWebhookAdapter'
+]
+
+
+DISCORD_EPOCH = 1420070400000
+EVERYONE_PERMISSIONS = 104324673 # discord's default for @everyone
+ADMINISTRATOR = 8
+
+# discord.state doesn't re-export everything, but the client's module
+# imports the state class it uses
+ConnectionState = sys.modules[discord.Client.__module__].ConnectionState
+
+SYLLABLES = (
+    'ka', 'ri', 'to', 'mu', 'sen', 'zo', 'lin', 'ar', 'el', 'qua', 'vy',
+    'dra', 'ne', 'po', 'shi', 'ta', 'ro', 'xe', 'jo', 'mi', 'car', 'bun',
+    'fox', 'ney', 'ul', 'gri', 'op', 'wen', 'ha', 'do'
+)
+
+
+def _route_path(route: discord.http.Route) -> str:
+    return route.url[len(route.BASE):].split('?')[0]
+
+
+# the JSON part of a (possibly multipart) request
+def _json_body(payload: Optional[dict[str, Any]],
+               form: Optional[Iterable[dict[str, Any]]]) -> Any:
+    if payload is not None:
+        return payload
+    for part in form or ():
+        if part.get('name') == 'payload_json':
+            return json.loads(part['value'])
+    return None
+
+
+# Stands in for discord.py's HTTP client: records every request (as
+# (method, path, JSON body), like FakeGateway) and answers sends and edits
+# with the message they would have created, without touching the network
+class FakeHTTP(discord.http.HTTPClient):
+    def __init__(self, fake: 'FakeDiscord', **kwargs):
+        super().__init__(**kwargs)
+        self.fake = fake
+
+    async def request(self, route: discord.http.Route, *,
+                      files: Any = None, form: Any = None, **kwargs) -> Any:
+        path = _route_path(route)
+        body = _json_body(kwargs.get('json'), form)
+        self.fake.requests.append((route.method, path, body))
+
+        parts = path.strip('/').split('/')
+        if parts[0] == 'channels' and len(parts) >= 3 \
+                and parts[2] == 'messages':
+            if route.method == 'POST' and len(parts) == 3:
+                return self.fake.message_payload(body or {},
+                                                 channel_id=int(parts[1]))
+            if route.method == 'PATCH' and len(parts) == 4:
+                return self.fake.message_payload(
+                    body or {}, channel_id=int(parts[1]),
+                    message_id=int(parts[3]))
+            if route.method == 'GET' and len(parts) == 3:
+                return [] # history
+        if route.method == 'DELETE':
+            return None
+        return {}
+
+
+# Stands in for the adapter discord.py sends interaction responses and
+# webhook messages through (which bypasses its HTTP client)
+class FakeWebhookAdapter(AsyncWebhookAdapter):
+    def __init__(self, fake: 'FakeDiscord'):
+        super().__init__()
+        self.fake = fake
+
+    async def request(self, route: discord.http.Route, session: Any, *,
+                      payload: Optional[dict[str, Any]] = None,
+                      multipart: Optional[list[dict[str, Any]]] = None,
+                      files: Any = None, reason: Optional[str] = None,
+                      auth_token: Optional[str] = None,
+                      params: Optional[dict[str, Any]] = None) -> Any:
+        path = _route_path(route)
+        body = _json_body(payload, multipart)
+        self.fake.requests.append((route.method, path, body))
+
+        parts = path.strip('/').split('/')
+        if parts[0] != 'webhooks' or route.method == 'DELETE':
+            return None # interaction callbacks
+        if route.method == 'POST' and len(parts) == 3: # followups
+            return self.fake.message_payload(body or {})
+        if len(parts) == 5: # messages/@original or messages/<id>
+            return self.fake.message_payload(body or {})
+        return {}
+
+
+# Builds real discord.py objects (guilds, members, roles, channels, emojis,
+# messages and interactions) from generated payloads, at any scale, e.g.
+# fake.guild(members=250000, roles=500), so that converters, checks and
+# command dispatch can be exercised and benchmarked without a gateway.
+# Everything the objects send goes through FakeHTTP/FakeWebhookAdapter and
+# is recorded in `requests`; `sent` has the bodies of sent messages.
+# Given a bot, its connection state and HTTP client are taken over (so
+# bot.user, bot.guilds etc. reflect the fakes); names and ids only depend on
+# the seed.
+class FakeDiscord:
+    def __init__(self, bot: Optional[discord.Client] = None, *,
+                 seed: int = 0, bot_id: int = 1000):
+        self.rng = random.Random(seed)
+        self.requests: list[tuple[str, str, Any]] = []
+
+        start = (1600000000000 - DISCORD_EPOCH) << 22
+        self._ids = itertools.count(start + (seed << 12), 1 << 12)
+        self._message_ids = itertools.count(start + (1 << 50))
+        self._names_used: set[str] = set()
+
+        self.http = FakeHTTP(self, loop=None if bot is None else bot.loop)
+        self.webhook_adapter = FakeWebhookAdapter(self)
+        # tasks created from here on inherit this
+        async_context.set(self.webhook_adapter)
+
+        intents = discord.Intents.default()
+        intents.members = True
+        if bot is None:
+            self.state = ConnectionState(
+                dispatch=lambda *args, **kwargs: None, handlers={},
+                hooks={}, http=self.http, loop=self.http.loop,
+                intents=intents
+            )
+            self.state._get_client = lambda: None
+        else:
+            self.state = bot._connection
+            bot.http = self.http
+            self.state.http = self.http
+
+        self.user_payload = {'id': str(bot_id), 'username': "car",
+                             'discriminator': "0000", 'avatar': None,
+                             'bot': True}
+        self.user = discord.ClientUser(state=self.state,
+                                       data=self.user_payload) # type: ignore
+        self.state.user = self.user
+        self.state.store_user(self.user_payload) # type: ignore[arg-type]
+
+    def snowflake(self) -> int:
+        return next(self._ids)
+
+    def name(self, min_syllables: int = 1, max_syllables: int = 4) -> str:
+        rng = self.rng
+        while True:
+            name = ''.join(rng.choices(
+                SYLLABLES, k=rng.randrange(min_syllables, max_syllables+1)))
+            # ~30% capitalized, ~20% with a number, ~10% with a suffix
+            r = rng.random()
+            if r < 0.3:
+                name = name.capitalize()
+            if 0.25 <= r < 0.45:
+                name += str(rng.randrange(1000))
+            if r >= 0.9:
+                name = f"{name}_{rng.choice(SYLLABLES)}"
+            # mostly unique, like real names; collisions are allowed once
+            # the space is exhausted
+            if name not in self._names_used \
+                    or len(self._names_used) > 100000:
+                self._names_used.add(name)
+                return name
+
+    def user_data(self, name: Optional[str] = None) -> dict[str, Any]:
+        return {'id': str(self.snowflake()), 'username': name or self.name(),
+                'discriminator': f"{self.rng.randrange(1, 10000):04}",
+                'avatar': None, 'bot': False}
+
+    def member_data(self, role_ids: Iterable[int] = (),
+                    user: Optional[dict[str, Any]] = None, *,
+                    nick: Optional[str] = None) -> dict[str, Any]:
+        return {
+            'user': user or self.user_data(),
+            'roles': [str(r) for r in role_ids],
+            'nick': nick,
+            'joined_at': f"20{self.rng.randrange(16, 23)}-01-01T00:00:00"
+                         "+00:00",
+            'deaf': False,
+            'mute': False
+        }
+
+    def guild(self, *, members: int = 100, roles: int = 10,
+              text_channels: int = 5, voice_channels: int = 2,
+              emojis: int = 0, roles_per_member: int = 3,
+              nick_chance: float = 0.3, name: Optional[str] = None
+              ) -> discord.Guild:
+        rng = self.rng
+        guild_id = self.snowflake()
+
+        role_data = [{
+            'id': str(guild_id), 'name': "@everyone",
+            'permissions': str(EVERYONE_PERMISSIONS), 'position': 0,
+            'color': 0, 'hoist': False, 'managed': False,
+            'mentionable': False
+        }]
+        for i in range(roles):
+            role_data.append({
+                'id': str(self.snowflake()), 'name': self.name(1, 3),
+                'permissions': str(rng.choice((0, 0, 0, 8192, ADMINISTRATOR))),
+                'position': i + 1, 'color': rng.randrange(1 << 24),
+                'hoist': rng.random() < 0.1, 'managed': False,
+                'mentionable': rng.random() < 0.5
+            })
+        bot_role = str(self.snowflake())
+        role_data.append({
+            'id': bot_role, 'name': "car", 'permissions': str(ADMINISTRATOR),
+            'position': roles + 1, 'color': 0, 'hoist': False,
+            'managed': True, 'mentionable': False
+        })
+        role_ids = [int(r['id']) for r in role_data[1:-1]]
+
+        member_data = [self.member_data(
+            rng.sample(role_ids, rng.randint(0, min(roles_per_member,
+                                                    len(role_ids)))),
+            nick=self.name() if rng.random() < nick_chance else None
+        ) for _ in range(members)]
+        member_data.append(self.member_data([bot_role],
+                                            user=self.user_payload))
+
+        channel_data = []
+        for i in range(text_channels):
+            channel_data.append({
+                'id': str(self.snowflake()), 'type': 0, 'guild_id':
+                str(guild_id), 'name': self.name(1, 3).lower(),
+                'position': i, 'permission_overwrites': [], 'nsfw': False
+            })
+        for i in range(voice_channels):
+            channel_data.append({
+                'id': str(self.snowflake()), 'type': 2, 'guild_id':
+                str(guild_id), 'name': self.name(1, 3), 'position': i,
+                'permission_overwrites': [], 'bitrate': 64000,
+                'user_limit': 0
+            })
+
+        emoji_data = [{
+            'id': str(self.snowflake()), 'name': self.name(1, 3),
+            'animated': False, 'require_colons': True, 'managed': False,
+            'available': True, 'roles': []
+        } for _ in range(emojis)]
+
+        guild = discord.Guild(state=self.state, data={ # type: ignore
+            'id': str(guild_id),
+            'name': name or self.name(),
+            'owner_id': member_data[0]['user']['id'],
+            'member_count': len(member_data),
+            'unavailable': False,
+            'large': len(member_data) > 250,
+            'premium_tier': 0,
+            'roles': role_data,
+            'channels': channel_data,
+            'members': member_data,
+            'emojis': emoji_data,
+            'stickers': [],
+            'features': [],
+            'voice_states': [],
+            'presences': [],
+            'threads': [],
+            'stage_instances': []
+        })
+        self.state._add_guild(guild)
+        return guild
+
+    def member(self, guild: discord.Guild, *, name: Optional[str] = None,
+               nick: Optional[str] = None,
+               roles: Iterable[discord.abc.Snowflake] = ()
+               ) -> discord.Member:
+        data = self.member_data([r.id for r in roles],
+                                self.user_data(name), nick=nick)
+        member = discord.Member(data=data, guild=guild, # type: ignore
+                                state=self.state)
+        guild._add_member(member)
+        guild._member_count = (guild._member_count or 0) + 1
+        return member
+
+    def message_payload(self, body: dict[str, Any], *, channel_id: int = 0,
+                        message_id: Optional[int] = None) -> dict[str, Any]:
+        return message_payload(
+            self.user_payload, body, channel_id=channel_id,
+            message_id=next(self._message_ids) if message_id is None
+                else message_id
+        )
+
+    # A message received in channel; author is a member of the channel's
+    # guild (or a user, in DMs)
+    def message(self, channel: Union[discord.TextChannel,
+                                     discord.DMChannel],
+                author: Union[discord.Member, discord.User], content: str
+                ) -> discord.Message:
+        data = message_payload(
+            {'id': str(author.id), 'username': author.name,
+             'discriminator': author.discriminator, 'avatar': None,
+             'bot': author.bot},
+            {'content': content},
+            message_id=next(self._message_ids), channel_id=channel.id
+        )
+        if isinstance(channel, discord.TextChannel):
+            data['guild_id'] = str(channel.guild.id)
+        msg = discord.Message(state=self.state, channel=channel, # type: ignore
+                              data=data) # type: ignore[arg-type]
+        # share the cached member rather than a copy
+        msg.author = author
+        return msg
+
+    def dm_channel(self, user: discord.abc.User) -> discord.DMChannel:
+        return self.state.add_dm_channel({ # type: ignore[arg-type]
+            'id': str(self.snowflake()), 'type': 1,
+            'recipients': [{'id': str(user.id), 'username': user.name,
+                            'discriminator': user.discriminator,
+                            'avatar': None}]
+        })
+
+    # A slash command invocation; options are the raw option payloads
+    # ({'name', 'type', 'value'}), as sent by discord. In a DM channel,
+    # author is a user
+    def interaction(self, channel: Union[discord.TextChannel,
+                                         discord.DMChannel],
+                    author: Union[discord.Member, discord.User], name: str,
+                    options: Iterable[dict[str, Any]] = ()
+                    ) -> discord.Interaction:
+        user = {'id': str(author.id), 'username': author.name,
+                'discriminator': author.discriminator, 'avatar': None}
+        data: dict[str, Any] = {
+            'id': str(self.snowflake()),
+            'application_id': self.user_payload['id'],
+            'type': 2,
+            'data': {'id': str(self.snowflake()), 'name': name, 'type': 1,
+                     'options': list(options)},
+            'channel_id': str(channel.id),
+            'token': f"fake-token-{self.rng.getrandbits(64):x}",
+            'version': 1
+        }
+        if isinstance(channel, discord.DMChannel):
+            data['user'] = user
+        else:
+            assert isinstance(author, discord.Member)
+            data['guild_id'] = str(channel.guild.id)
+            data['member'] = {
+                'user': user,
+                'roles': [str(r.id) for r in author.roles[1:]],
+                'nick': author.nick,
+                'joined_at': (author.joined_at or datetime.now(timezone.utc)
+                              ).isoformat(),
+                'deaf': False,
+                'mute': False,
+                'permissions': str(channel.permissions_for(author).value)
+            }
+        return discord.Interaction(data=data, # type: ignore[arg-type]
+                                   state=self.state)
+
+    # bodies of the messages sent to channels, webhooks and interaction
+    # responses, in order
+    @property
+    def sent(self) -> list[dict[str, Any]]:
+        sent = []
+        for method, path, body in self.requests:
+            if method != 'POST' or body is None:
+                continue
+            if path.endswith('/messages') or path.startswith('/webhooks/'):
+                sent.append(body)
+            elif path.endswith('/callback') and body.get('type') == 4:
+                sent.append(body.get('data') or {})
+        return sent
+
+    def clear(self) -> None:
+        self.requests.clear()
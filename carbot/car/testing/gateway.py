@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import itertools
+import json
+import re
+from typing import Any, Optional
+from aiohttp import web, WSMsgType
+from loguru import logger
+
+
+__all__ = [
+    'FakeGateway',
+    'message_payload',
+    'shard_of'
+]
+
+
+API_PREFIX = '/api/v9'
+
+OP_DISPATCH = 0
+OP_HEARTBEAT = 1
+OP_IDENTIFY = 2
+OP_REQUEST_MEMBERS = 8
+OP_HELLO = 10
+OP_HEARTBEAT_ACK = 11
+
+# REST routes that return a message: (method, path regex)
+MESSAGE_ROUTES = (
+    ('POST', re.compile(r'/channels/(?P<channel>\d+)/messages')),
+    ('PATCH', re.compile(r'/channels/(?P<channel>\d+)/messages/'
+                         r'(?P<message>\d+)')),
+    ('POST', re.compile(r'/webhooks/\d+/[^/]+')),
+    ('PATCH', re.compile(r'/webhooks/\d+/[^/]+/messages/'
+                         r'(?P<message>[^/]+)')),
+    ('GET', re.compile(r'/webhooks/\d+/[^/]+/messages/'
+                       r'(?P<message>[^/]+)')),
+)
+
+
+def shard_of(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def _guild_payload(guild_id: int) -> dict[str, Any]:
+    return {
+        'id': str(guild_id),
+        'name': f"guild {guild_id}",
+        'owner_id': str(guild_id),
+        'member_count': 0,
+        'unavailable': False,
+        'large': False,
+        'roles': [{
+            'id': str(guild_id), 'name': "@everyone", 'permissions': "0",
+            'position': 0, 'color': 0, 'hoist': False, 'managed': False,
+            'mentionable': False
+        }],
+        'channels': [],
+        'members': [],
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'voice_states': [],
+        'presences': [],
+        'threads': [],
+        'stage_instances': []
+    }
+
+
+# The message a send or edit with this (JSON) body would create
+def message_payload(author: dict[str, Any], body: dict[str, Any], *,
+                    message_id: int, channel_id: int = 0) -> dict[str, Any]:
+    return {
+        'id': str(message_id),
+        'channel_id': str(channel_id),
+        'author': author,
+        'content': body.get('content') or "",
+        'embeds': body.get('embeds') or [],
+        'components': body.get('components') or [],
+        'attachments': [],
+        'mentions': [],
+        'mention_roles': [],
+        'mention_everyone': False,
+        'pinned': False,
+        'tts': False,
+        'type': 0,
+        'flags': body.get('flags') or 0,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'edited_timestamp': None
+    }
+
+
+# discord.py only decodes bodies whose content type is exactly
+# 'application/json', without the charset web.json_response adds
+def _json_response(data: Any) -> web.Response:
+    return web.Response(body=json.dumps(data).encode(),
+                        content_type='application/json')
+
+
+class _Session:
+    def __init__(self, ws: web.WebSocketResponse):
+        self.ws = ws
+        self.shard: Optional[tuple[int, int]] = None
+        self.seq = 0
+
+    async def send(self, op: int, data: Any, event: Optional[str] = None
+                   ) -> None:
+        payload: dict[str, Any] = {'op': op, 'd': data}
+        if op == OP_DISPATCH:
+            self.seq += 1
+            payload['s'] = self.seq
+            payload['t'] = event
+        await self.ws.send_str(json.dumps(payload))
+
+
+# A local stand-in for Discord's REST API and gateway, enough for
+# discord.Client to log in, identify (optionally as a shard) and receive
+# events, and to send and edit messages. Point the client at it by setting
+# discord.http.Route.BASE to api_base before logging in.
+class FakeGateway:
+    def __init__(self, *, host: str = '127.0.0.1', port: int = 0,
+                 guild_ids: tuple[int, ...] = (), shard_count: int = 1,
+                 bot_id: int = 1000):
+        self.host = host
+        self.port = port
+        self.guild_ids = guild_ids
+        self.shard_count = shard_count
+        self.bot_id = bot_id
+
+        self.sessions: list[_Session] = []
+        self.identifies: list[dict[str, Any]] = []
+        # (method, path, json body) of every other REST request
+        self.requests: list[tuple[str, str, Any]] = []
+
+        self._runner: Optional[web.AppRunner] = None
+        self._session_ids = itertools.count()
+        self._message_ids = itertools.count(1 << 40)
+
+    @property
+    def api_base(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    def _user(self) -> dict[str, Any]:
+        return {'id': str(self.bot_id), 'username': "car", 'bot': True,
+                'discriminator': "0000", 'avatar': None}
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get(f'{API_PREFIX}/users/@me', self._users_me)
+        app.router.add_get(f'{API_PREFIX}/gateway', self._gateway)
+        app.router.add_get(f'{API_PREFIX}/gateway/bot', self._gateway_bot)
+        app.router.add_get('/ws', self._websocket)
+        app.router.add_route('*', f'{API_PREFIX}/{{tail:.*}}', self._other)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # resolve port 0 to the one actually bound
+        self.port = site._server.sockets[0].getsockname()[1] # type: ignore
+        logger.info(f"Fake gateway listening on {self.api_base}")
+
+    async def stop(self) -> None:
+        for session in self.sessions:
+            await session.ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _users_me(self, request: web.Request) -> web.Response:
+        return _json_response(self._user())
+
+    async def _gateway(self, request: web.Request) -> web.Response:
+        return _json_response(
+            {'url': f"ws://{self.host}:{self.port}/ws"})
+
+    async def _gateway_bot(self, request: web.Request) -> web.Response:
+        return _json_response({'url': f"ws://{self.host}:{self.port}/ws",
+                                  'shards': self.shard_count})
+
+    # Sends and edits are answered with the message they would have
+    # created, so that callers can keep using it; everything else with {}
+    async def _other(self, request: web.Request) -> web.Response:
+        body = None
+        if request.can_read_body and request.content_type \
+                == 'application/json':
+            body = await request.json()
+        self.requests.append((request.method, request.path, body))
+
+        path = request.path[len(API_PREFIX):]
+        for method, regex in MESSAGE_ROUTES:
+            if method == request.method and (m := regex.fullmatch(path)):
+                return _json_response(
+                    self._message(m.groupdict(), body or {}))
+        return _json_response({})
+
+    def _message(self, ids: dict[str, str], body: dict[str, Any]
+                 ) -> dict[str, Any]:
+        message_id = ids.get('message')
+        return message_payload(
+            self._user(), body,
+            message_id=int(message_id) if message_id and message_id.isdigit()
+                else next(self._message_ids),
+            channel_id=int(ids.get('channel') or 0)
+        )
+
+    async def _websocket(self, request: web.Request
+                         ) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        session = _Session(ws)
+        self.sessions.append(session)
+
+        # messages are sent uncompressed, which the client accepts even
+        # when it asked for zlib-stream
+        await session.send(OP_HELLO, {'heartbeat_interval': 41250})
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                await self._on_message(session, json.loads(msg.data))
+        finally:
+            self.sessions.remove(session)
+        return ws
+
+    def _session_guilds(self, session: _Session) -> list[int]:
+        if session.shard is None:
+            return list(self.guild_ids)
+        shard_id, shard_count = session.shard
+        return [g for g in self.guild_ids
+                if shard_of(g, shard_count) == shard_id]
+
+    async def _on_message(self, session: _Session, msg: dict[str, Any]
+                          ) -> None:
+        op = msg['op']
+        if op == OP_HEARTBEAT:
+            await session.send(OP_HEARTBEAT_ACK, None)
+
+        elif op == OP_IDENTIFY:
+            self.identifies.append(msg['d'])
+            if 'shard' in msg['d']:
+                session.shard = tuple(msg['d']['shard']) # type: ignore
+            guilds = self._session_guilds(session)
+            await session.send(OP_DISPATCH, {
+                'v': 9,
+                'user': self._user(),
+                'guilds': [{'id': str(g), 'unavailable': True}
+                           for g in guilds],
+                'session_id': f"fake-{next(self._session_ids)}",
+                'application': {'id': str(self.bot_id), 'flags': 0},
+                **({'shard': list(session.shard)} if session.shard
+                   else {})
+            }, 'READY')
+            for g in guilds:
+                await session.send(OP_DISPATCH, _guild_payload(g),
+                                   'GUILD_CREATE')
+
+        elif op == OP_REQUEST_MEMBERS:
+            await session.send(OP_DISPATCH, {
+                'guild_id': msg['d']['guild_id'],
+                'members': [],
+                'chunk_index': 0,
+                'chunk_count': 1,
+                'nonce': msg['d'].get('nonce')
+            }, 'GUILD_MEMBERS_CHUNK')
+
+    # Sends a gateway event to the shard that owns guild_id (or to every
+    # session if guild_id is None)
+    async def dispatch(self, event: str, data: dict[str, Any], *,
+                       guild_id: Optional[int] = None) -> None:
+        for session in list(self.sessions):
+            if guild_id is not None and session.shard is not None \
+                    and shard_of(guild_id, session.shard[1]) \
+                    != session.shard[0]:
+                continue
+            await session.send(OP_DISPATCH, data, event)
+
+
+async def _serve(gateway: FakeGateway) -> None:
+    await gateway.start()
+    await asyncio.Event().wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Runs a fake Discord API/gateway for local testing")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--guilds', type=int, default=10,
+                        help="number of guilds to spread across shards")
+    parser.add_argument('--shards', type=int, default=1)
+    args = parser.parse_args()
+
+    gateway = FakeGateway(
+        port=args.port, shard_count=args.shards,
+        guild_ids=tuple((i+1) << 22 for i in range(args.guilds))
+    )
+    try:
+        asyncio.run(_serve(gateway))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+from collections import Counter
+import contextvars
+import importlib
+import itertools
+import threading
+import time
+from typing import Any, Iterable, Optional
+import discord
+from loguru import logger
+
+from ..bot import Bot
+from ..metric import Histogram
+from ..ratelimit import route_key
+from ..recorder import read_events
+from ..registry_cache import registry_cache
+from .gateway import FakeGateway
+
+
+__all__ = [
+    'ReplayReport',
+    'replay',
+    'run_replay'
+]
+
+
+# events sent while connecting, which are replayed (unmeasured) before the
+# rest to build up the bot's cache
+SETUP_EVENTS = frozenset(('READY', 'GUILD_CREATE', 'GUILD_MEMBERS_CHUNK'))
+
+
+class _Tracked:
+    def __init__(self, index: int):
+        self.index = index
+        self.fed_at = 0.0
+        self.finished_at: Optional[float] = None
+        self.tasks = 0
+        self.feeding = True
+
+    def task_done(self, _: asyncio.Task) -> None:
+        self.tasks -= 1
+        self._check()
+
+    def fed(self) -> None:
+        self.feeding = False
+        self._check()
+
+    def _check(self) -> None:
+        if self.tasks == 0 and not self.feeding:
+            self.finished_at = time.perf_counter()
+
+
+# the replayed event whose handling is running; tasks copy it when they are
+# created, so every task an event spawns (and the tasks those spawn, ...)
+# can be attributed to it
+_current: contextvars.ContextVar[Optional[_Tracked]] = \
+    contextvars.ContextVar('replayed_event', default=None)
+
+
+def _task_factory(loop: asyncio.AbstractEventLoop, coro, **kwargs
+                  ) -> asyncio.Task:
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    tracked = _current.get()
+    if tracked is not None:
+        tracked.tasks += 1
+        task.add_done_callback(tracked.task_done)
+    return task
+
+
+class ReplayReport:
+    def __init__(self, events: int, seconds: float, cpu_seconds: float,
+                 latency: Histogram, unfinished: int, skipped: int,
+                 requests: Counter):
+        self.events = events
+        self.seconds = seconds
+        self.cpu_seconds = cpu_seconds
+        self.latency = latency
+        self.unfinished = unfinished
+        self.skipped = skipped
+        # (method, route key) -> count of REST requests the bot made
+        self.requests = requests
+
+    @property
+    def throughput(self) -> float:
+        return self.events / self.seconds if self.seconds else 0
+
+    @property
+    def cpu_per_event(self) -> float:
+        return self.cpu_seconds / self.events if self.events else 0
+
+    def render(self) -> str:
+        lat = self.latency.snapshot()
+        lines = [
+            f"events: {self.events} ({self.unfinished} unfinished, "
+            f"{self.skipped} skipped)",
+            f"wall time: {self.seconds:.3f}s",
+            f"throughput: {self.throughput:.1f} events/s",
+            f"cpu per event: {self.cpu_per_event*1e6:.1f}us",
+        ]
+        if 'p50' in lat:
+            lines.append(
+                "latency: " + ', '.join(
+                    f"{k}={lat[k]*1000:.2f}ms"
+                    for k in ('p50', 'p90', 'p99', 'max'))
+            )
+        lines.append(f"REST requests: {sum(self.requests.values())}")
+        for (method, route), n in self.requests.most_common():
+            lines.append(f"  {method} /{'/'.join(route)}...: {n}")
+        return '\n'.join(lines)
+
+
+def _ready_payload(bot: Bot) -> dict[str, Any]:
+    assert bot.user is not None
+    return {
+        'v': 9,
+        'user': {'id': str(bot.user.id), 'username': bot.user.name,
+                 'discriminator': bot.user.discriminator, 'avatar': None,
+                 'bot': True},
+        'guilds': [],
+        'session_id': "replay",
+        'application': {'id': str(bot.user.id), 'flags': 0}
+    }
+
+
+# Feeds recorded gateway events (see car.EventRecorder) to a logged in bot
+# through discord.py's parsers, i.e. exactly the way the gateway would, so
+# they end up in Bot.dispatch. Events are fed at `rate` per second (as fast
+# as possible if 0) regardless of how long they take to handle, so a bot
+# that can't keep up shows it in the latencies. An event's latency is the
+# time from feeding it until every task it spawned has finished; its CPU
+# time is this thread's, so the stand-in for Discord should be run on
+# another thread.
+async def replay(bot: Bot, events: Iterable[dict[str, Any]], *,
+                 rate: float = 0, timeout: float = 30) -> ReplayReport:
+    parsers = bot._connection.parsers
+    events = iter(events)
+
+    # setup events are replayed before any others
+    ready = False
+    first: Optional[dict[str, Any]] = None
+    for event in events:
+        if event['t'] not in SETUP_EVENTS:
+            first = event
+            break
+        if event['t'] == 'READY':
+            ready = True
+        elif not ready:
+            parsers['READY'](_ready_payload(bot))
+            ready = True
+        parsers[event['t']](event['d'])
+    if not ready:
+        parsers['READY'](_ready_payload(bot))
+    await bot.wait_until_ready()
+
+    loop = asyncio.get_running_loop()
+    old_factory = loop.get_task_factory()
+    loop.set_task_factory(_task_factory) # type: ignore[arg-type]
+
+    tracked: list[_Tracked] = []
+    skipped = 0
+    interval = 1/rate if rate > 0 else 0
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    try:
+        rest = events if first is None else itertools.chain((first,), events)
+        for i, event in enumerate(rest):
+            parser = parsers.get(event['t'])
+            # a READY would reset the cache mid-replay
+            if parser is None or event['t'] == 'READY':
+                skipped += 1
+                continue
+
+            delay = started + len(tracked)*interval - time.perf_counter()
+            # yield even when behind, so handlers get to run
+            await asyncio.sleep(max(0, delay))
+
+            t = _Tracked(i)
+            tracked.append(t)
+            token = _current.set(t)
+            t.fed_at = time.perf_counter()
+            try:
+                parser(event['d'])
+            except Exception as e:
+                logger.warning(f"Replaying event {i} ({event['t']}) "
+                               f"failed: {e!r}")
+            finally:
+                _current.reset(token)
+                t.fed()
+
+        deadline = time.perf_counter() + timeout
+        while any(t.finished_at is None for t in tracked) \
+                and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+    finally:
+        loop.set_task_factory(old_factory)
+    cpu_seconds = time.thread_time() - cpu_started
+
+    finished = [t.finished_at for t in tracked if t.finished_at is not None]
+    latency = Histogram('replay.latency_seconds', window=max(1, len(tracked)))
+    for t in tracked:
+        if t.finished_at is not None:
+            latency.observe(t.finished_at - t.fed_at)
+
+    return ReplayReport(
+        events=len(tracked),
+        seconds=(max(finished) if finished else time.perf_counter())
+            - started,
+        cpu_seconds=cpu_seconds,
+        latency=latency,
+        unfinished=len(tracked) - len(finished),
+        skipped=skipped,
+        requests=Counter()
+    )
+
+
+def _start_in_thread(gateway: FakeGateway
+                     ) -> tuple[asyncio.AbstractEventLoop, threading.Thread]:
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(gateway.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, name="car-replay-standin",
+                              daemon=True)
+    thread.start()
+    started.wait()
+    return loop, thread
+
+
+# Replays a recording against a bot with the given cogs, logged in to a
+# FakeGateway (on its own thread) that stands in for Discord's REST API and
+# answers the bot's sends and edits. Edits and queued embeds are sent
+# without delay, so that they don't count towards latencies.
+async def run_replay(path: str, *, rate: float = 0,
+                     cogs: Iterable[tuple[str, str, bool]] = (),
+                     limit: Optional[int] = None, timeout: float = 30,
+                     **bot_kwargs) -> ReplayReport:
+    gateway = FakeGateway()
+    gateway_loop, thread = _start_in_thread(gateway)
+    old_base = discord.http.Route.BASE
+    discord.http.Route.BASE = gateway.api_base
+
+    bot_kwargs = {
+        'db_path': ':memory:', 'edit_interval': 0, 'send_queue_delay': 0,
+        'chunk_guilds_at_startup': False, 'guild_ready_timeout': 0.1,
+        **bot_kwargs
+    }
+    bot = Bot(**bot_kwargs)
+    try:
+        for module_name, cog_name, lazy in cogs:
+            bot.cog_handler.add_cog(module_name, cog_name, lazy=lazy)
+        await bot.login("replay")
+
+        events = read_events(path)
+        if limit is not None:
+            events = itertools.islice(events, limit)
+        report = await replay(bot, events, rate=rate, timeout=timeout)
+    finally:
+        await bot.close()
+        discord.http.Route.BASE = old_base
+        asyncio.run_coroutine_threadsafe(gateway.stop(), gateway_loop
+                                         ).result()
+        gateway_loop.call_soon_threadsafe(gateway_loop.stop)
+        thread.join()
+        gateway_loop.close()
+
+    report.requests = Counter(
+        (method, route_key(path)) for method, path, _ in gateway.requests)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=("Replays gateway events recorded with --record-events "
+                     "against a local stand-in for Discord"))
+    parser.add_argument('path')
+    parser.add_argument('--rate', type=float, default=0,
+                        help="events per second (default: as fast as "
+                             "possible)")
+    parser.add_argument('--limit', type=int, default=None,
+                        help="only replay the first LIMIT events")
+    parser.add_argument('--timeout', type=float, default=30,
+                        help="seconds to wait for handlers after the last "
+                             "event")
+    parser.add_argument('--cogs', default='cogs',
+                        help="module with the to_load list of cogs to add, "
+                             "or '' for none")
+    args = parser.parse_args()
+
+    cogs = importlib.import_module(args.cogs).to_load if args.cogs else ()
+    registry_cache.load()
+    report = asyncio.run(run_replay(args.path, rate=args.rate, cogs=cogs,
+                                    limit=args.limit, timeout=args.timeout))
+    print(report.render())
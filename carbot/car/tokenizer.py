@@ -1,69 +1,86 @@
+from bisect import bisect_right
+import re
 from typing import Generator, Optional
 from .exception import CheckError
 
 
 __all__ = [
+    'ArgumentLexer',
     'Tokenizer',
-    'filter_kwargs'
+    'filter_kwargs',
+    'scan_token'
 ]
 
+_SPACES = re.compile(r' *')
+# leading spaces, then a token: plain characters, with escapes and quoted
+# parts (which may contain spaces, and are closed by the end of the text if
+# nothing else) in between; a backslash at the very end is kept as it is
+_TOKEN = re.compile(
+    r' *'
+    r'([^ "\\]*(?:(?:\\.|"[^"\\]*(?:\\.[^"\\]*)*"?|\\)[^ "\\]*)*)',
+    re.DOTALL)
+_UNESCAPE = re.compile(r'\\(.)|"|\\', re.DOTALL)
+_ESCAPES = {'\\': '\\', '"': '"', 'n': '\n'}
+# a quote, or a dash that starts a word (and so maybe a -name value pair)
+_QUOTE_OR_KWARG = re.compile(r'"|(?<![^ ])-')
+_WHITESPACE = re.compile(r'\s*')
+
+
+def _skip_spaces(text: str, index: int) -> int:
+    return _SPACES.match(text, index).end() # type: ignore[union-attr]
+
+def _unescape(m: re.Match) -> str:
+    escaped = m.group(1)
+    if escaped is not None:
+        return _ESCAPES.get(escaped, '\\' + escaped)
+    return '' if m.group() == '"' else '\\'
+
+# Resolves the quotes and escapes of a token as written
+def _resolve(token: str) -> str:
+    if '\\' in token:
+        return _UNESCAPE.sub(_unescape, token)
+    elif '"' in token:
+        return token.replace('"', '')
+    return token
+
+# Scans the token starting at (or after the spaces following) index, and
+# returns (start, end, token): text[start:end] is the token as written, and
+# token is it with quotes and escapes resolved. Tokens without quotes or
+# escapes are sliced out of text as they are
+def scan_token(text: str, index: int = 0) -> tuple[int, int, str]:
+    m = _TOKEN.match(text, index)
+    assert m is not None # the pattern also matches the empty string
+    return m.start(1), m.end(), _resolve(m.group(1))
+
+
 class Tokenizer:
     def __init__(self, text: str):
         self.text = text
         self.index: int = 0
-        self.word: list[str] = []
-
-    def _add_char(self) -> None:
-        if self.text[self.index] == '\\' and self.index < len(self.text)-1:
-            match self.text[self.index + 1]:
-                case '\\' | '"' as escaped:
-                    self.word.append(escaped)
-                case 'n':
-                    self.word.append('\n')
-                case _ as escaped:
-                    self.word.append('\\' + escaped)
-
-            # c = self.text[self.index+1]
-            # if c == '\\' or c == '"':
-                # self.word.append(c)
-            # elif c == 'n':
-                # self.word.append('\n')
-            # else:
-                # self.word.append('\\' + c)
-
-            self.index += 1
 
-        else:
-            self.word.append(self.text[self.index])
-
-    def _skip_spaces(self) -> None:
-        while self.index < len(self.text) and self.text[self.index] == ' ':
-            self.index += 1
+    # returns (start, end, token); see scan_token
+    def next_span(self, index: Optional[int] = None) -> tuple[int, int, str]:
+        if index is not None:
+            self.index = index
+        span = scan_token(self.text, self.index)
+        self.index = span[1]
+        return span
 
     def next_token(self, index: Optional[int] = None) -> str:
         if index is not None:
             self.index = index
-        quoted: bool = False
-
-        self._skip_spaces()
-
-        while self.index < len(self.text) and \
-                (quoted or self.text[self.index] != ' '):
-
-            if self.text[self.index] == '"':
-                quoted = not quoted
-            else:
-                self._add_char()
-
-            self.index += 1
-
-        res = ''.join(self.word)
-        self.word = []
-
-        return res
+        m = _TOKEN.match(self.text, self.index)
+        assert m is not None
+        self.index = m.end()
+        token = m.group(1)
+        if '\\' in token or '"' in token:
+            return _resolve(token)
+        return token
 
     def is_eof(self) -> bool:
-        self._skip_spaces()
+        if self.index < len(self.text) and self.text[self.index] != ' ':
+            return False
+        self.index = _skip_spaces(self.text, self.index)
         return self.index >= len(self.text)
 
     def get_remaining(self) -> str:
@@ -72,32 +89,104 @@ class Tokenizer:
     def reset(self) -> None:
         self.index = 0
 
+    # the tokens from the current index on; doesn't move the tokenizer
     def tokens(self) -> Generator[str, None, None]:
-        while not self.is_eof():
-            yield self.next_token()
-        self.reset()
-
-def filter_kwargs(content: str) -> tuple[str, dict[str, str]]:
-    spl = []
-    kwargs: dict[str, str] = {}
-    quoted = False
-    content = " " + content
-    tok = Tokenizer(content)
-
-    i = 0
-    while i < len(content):
-        if content[i] == '"':
-            quoted = not quoted
-
-        if (not quoted) and i < len(content)-3 and content[i:i+2] == ' -':
-            name = tok.next_token(i+2)
-            if tok.is_eof():
+        i = self.index
+        while True:
+            start, i, token = scan_token(self.text, i)
+            if start >= len(self.text):
+                return
+            yield token
+
+# Splits the arguments of a text command into -name value pairs (kwargs) and
+# the text of the positional arguments around them (text), which is then
+# tokenized like with a Tokenizer. A dash only starts a kwarg outside of
+# quotes; quotes are only counted here, without regard to escapes.
+# Positions in text map back to content with source_span(), for pointing
+# at the argument as it was written
+class ArgumentLexer(Tokenizer):
+    def __init__(self, content: str):
+        self.content = content
+        self.kwargs: dict[str, str] = {}
+        # kwarg name -> (start, end) of its value in content
+        self.kwarg_spans: dict[str, tuple[int, int]] = {}
+
+        # the parts of content that aren't kwargs
+        segments: list[tuple[int, int]] = []
+        kept_start = 0
+        quoted = False
+        i = 0
+        while True:
+            if quoted:
+                j = content.find('"', i)
+                if j == -1:
+                    break
+                quoted = False
+                i = j + 1
+                continue
+
+            m = _QUOTE_OR_KWARG.search(content, i)
+            if m is None:
+                break
+            j = m.start()
+            if m.group() == '"':
+                quoted = True
+                i = j + 1
+                continue
+            # a dash without at least two characters after it isn't a kwarg
+            if j >= len(content)-2:
+                i = j + 1
+                continue
+
+            _, name_end, name = scan_token(content, j+1)
+            value_start = _skip_spaces(content, name_end)
+            if value_start >= len(content):
                 raise CheckError(f"You didn't give kwarg `-{name}` a value!")
-            kwargs[name] = tok.next_token()
-            i = tok.index
+            start, end, self.kwargs[name] = scan_token(content, value_start)
+            self.kwarg_spans[name] = (start, end)
+
+            # the kwarg takes the space before it along with it
+            segments.append((kept_start, max(j-1, 0)))
+            kept_start = i = end
+        segments.append((kept_start, len(content)))
+
+        if len(segments) == 1:
+            text = content
         else:
-            spl.append(content[i])
-            i += 1
+            text = ''.join(content[start:end] for start, end in segments)
+        m = _WHITESPACE.match(text)
+        assert m is not None
+        lead = m.end()
+
+        # (index in text, index in content) of the start of every segment
+        self._text_starts: list[int] = []
+        self._content_starts: list[int] = []
+        offset = -lead
+        for start, end in segments:
+            self._text_starts.append(offset)
+            self._content_starts.append(start)
+            offset += end - start
+
+        super().__init__(text.strip())
+
+    def source_index(self, index: int) -> int:
+        k = max(bisect_right(self._text_starts, index) - 1, 0)
+        return self._content_starts[k] + index - self._text_starts[k]
+
+    # (start, end) in content of text[start:end]
+    def source_span(self, start: int, end: int) -> tuple[int, int]:
+        if end <= start:
+            return (self.source_index(start),) * 2
+        return self.source_index(start), self.source_index(end-1) + 1
+
+    # (start, end) in content of get_remaining()
+    def remaining_span(self) -> tuple[int, int]:
+        m = _WHITESPACE.match(self.text, self.index)
+        assert m is not None
+        start = m.end()
+        return self.source_span(start, len(self.text))
 
-    return (''.join(spl).strip(), kwargs)
 
+def filter_kwargs(content: str) -> tuple[str, dict[str, str]]:
+    lexer = ArgumentLexer(content)
+    return lexer.text, lexer.kwargs
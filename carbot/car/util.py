@@ -8,7 +8,8 @@ __all__ = [
     'zwsp',
     'zwsp_md',
     'without_md_formatting',
-    's_to_sexagesimal'
+    's_to_sexagesimal',
+    'rss_bytes'
 ]
 
 
@@ -43,3 +44,6 @@ def s_to_sexagesimal(s: int | float) -> str:
     else:
         return f"{s//3600}:{s//60%60:02}:{s%60:02}"
 
+def rss_bytes() -> int:
+    import psutil # imported here to keep it out of startup
+    return psutil.Process().memory_info().rss
@@ -1,22 +1,109 @@
+import argparse
+import inspect
+from multiprocessing.connection import Connection
 import sys
+from typing import Optional
+
+from startup_profiler import StartupProfiler
+
+# parsed before the other imports so that their cost can be profiled
+parser = argparse.ArgumentParser()
+parser.add_argument('--profile-startup', action='store_true',
+                    help=("write a startup timeline and import breakdown to "
+                          "startup_profile.txt/.json"))
+parser.add_argument('--shards', type=int, default=1,
+                    help="number of shards, each run in its own process")
+parser.add_argument('--api-base', default=None,
+                    help=("Discord API base URL (e.g. a car.testing "
+                          "FakeGateway's api_base)"))
+parser.add_argument('--record-events', default=None, metavar='PATH',
+                    help=("append redacted gateway events to this JSONL "
+                          "file (suffixed with the shard id when sharded), "
+                          "for python -m car.testing.replay"))
+args = parser.parse_args()
+# shard processes re-run this module; only the single-process mode profiles
+profiler = StartupProfiler(enabled=args.profile_startup and args.shards == 1)
+
+with profiler.phase("import car"):
+    import car
+with profiler.phase("import cogs, config"):
+    import cogs
+    import config
+import discord
 from loguru import logger
 
-import car
-import cogs
-import config
 
+def setup_logging(shard_id: Optional[int] = None) -> None:
+    logger.remove()
+    level = "DEBUG" if config.DEBUG else "INFO"
+    if shard_id is None:
+        logger.add(sys.stderr, level=level)
+    else:
+        logger.add(sys.stderr, level=level, format=(
+            "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+            f"<cyan>shard {shard_id}</cyan> | "
+            "<level>{level: <8}</level> | <level>{message}</level>"
+        ))
+
+def create_bot(**kwargs) -> car.Bot:
+    if args.api_base is not None:
+        discord.http.Route.BASE = args.api_base
+    if args.record_events is not None:
+        kwargs['record_events'] = args.record_events
+        if 'shard_id' in kwargs:
+            kwargs['record_events'] += f".{kwargs['shard_id']}"
+
+    profiler.instrument(car.command, 'get_type_hints',
+                        "get_type_hints (Command.__init__)")
+    profiler.instrument(inspect, 'signature',
+                        "inspect.signature (Command.__init__)")
+    profiler.instrument(inspect, 'getmembers', "inspect.getmembers (Cog)")
+    profiler.instrument(car.DBTable, '__init__', "DBTable (CREATE TABLE)")
+
+    with profiler.phase("create bot"):
+        bot = car.Bot(debug=config.DEBUG, **kwargs)
+
+    with profiler.phase("load registry cache"):
+        car.registry_cache.load()
+
+    for module_name, cog_name, lazy in cogs.to_load:
+        with profiler.phase(f"add cog {cog_name}"):
+            bot.cog_handler.add_cog(module_name, cog_name, lazy=lazy)
+    bot.cog_handler.startup_report()
+    car.registry_cache.save()
+
+    return bot
+
+# entry point of each shard process started by car.ShardSupervisor
+def run_shard(shard_id: int, shard_count: int, conn: Connection) -> None:
+    setup_logging(shard_id)
+    bot = create_bot(shard_id=shard_id, shard_count=shard_count,
+                     ipc=car.ShardIPC(conn))
+    bot.run(config.TOKEN)
 
 def main():
-    logger.remove()
-    logger.add(sys.stderr, level="DEBUG" if config.DEBUG else "INFO")
-    bot = car.Bot(debug=config.DEBUG)
+    if args.shards > 1:
+        setup_logging()
+        if args.profile_startup:
+            logger.warning("--profile-startup is ignored with --shards")
+        car.ShardSupervisor(run_shard, args.shards).run()
+        return
+
+    setup_logging()
+    bot = create_bot()
 
-    for cog_cls in cogs.to_load:
-        bot.cog_handler.add_cog_class(cog_cls)
-        bot.cog_handler.load_cog(cog_cls.__name__)
+    if profiler.enabled:
+        async def finish_profile():
+            await bot.wait_until_ready()
+            profiler.end("login")
+            profiler.finish()
+            logger.info(f"Startup profile written to {profiler.report_path}"
+                        f" and {profiler.json_path}")
+
+        profiler.begin("login")
+        bot.loop.create_task(finish_profile())
 
     bot.run(config.TOKEN)
 
 if __name__ == '__main__':
     main()
-
@@ -1,8 +1,27 @@
-def levenshtein(s1: str, s2: str, w_del: int, w_ins: int, w_sub: int
-                ) -> int: ...
+from typing import Optional, overload
+
+def levenshtein(s1: str, s2: str, w_del: int = 1, w_ins: int = 1,
+                w_sub: int = 1, max_dist: Optional[int] = None) -> int: ...
+def levenshtein_dp(s1: str, s2: str, w_del: int = 1, w_ins: int = 1,
+                   w_sub: int = 1) -> int: ...
 def fuzzy_match(query: str, against: list[str], amount: int
                 ) -> tuple[int, int]: ...
 def fuzzy_match_one(query: str, against: list[str]) -> tuple[int, int]: ...
 
+class FuzzyIndex:
+    @overload
+    def __init__(self) -> None: ...
+    @overload
+    def __init__(self, strings: list[str]) -> None: ...
+    def add(self, s: str) -> int: ...
+    def set(self, key: int, s: str) -> None: ...
+    def remove(self, key: int) -> bool: ...
+    def get(self, key: int) -> str: ...
+    def clear(self) -> None: ...
+    def __contains__(self, key: int) -> bool: ...
+    def __len__(self) -> int: ...
+    def match_one(self, query: str) -> tuple[int, int]: ...
+    def match(self, query: str, amount: int) -> list[tuple[int, int]]: ...
+
 def akpull(trials: int, amt_pulls: int, prob_rateup: int
            ) -> tuple[float, float, float, float, float]: ...
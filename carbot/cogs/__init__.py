@@ -1,30 +1,19 @@
-# from .test_cog import TestCog
-from .admin import Admin
-from .guild import Guild
-from .image import Image
-from .meta import Meta
-from .moderation import Moderation
-from .pinboard import Pinboard
-from .simulation import Simulation
-from .sound import Sound
-from .text import Text
-from .typing import Typing
-from .utility import Utility
-from .wab import Wab
-
+# Cogs are imported by CogHandler.add_cog so that lazily loaded cogs (and
+# their dependencies) aren't imported until they are used
 
+# (module, cog class, load lazily)
 to_load = (
-    Admin,
-    Guild,
-    Image,
-    Meta,
-    Moderation,
-    Pinboard,
-    Simulation,
-    Sound,
-    Text,
-    Typing,
-    Utility,
-    Wab,
+    # ('cogs.test_cog', 'TestCog', False),
+    ('cogs.admin', 'Admin', False),
+    ('cogs.guild', 'Guild', False),
+    ('cogs.image', 'Image', False),
+    ('cogs.meta', 'Meta', False),
+    ('cogs.moderation', 'Moderation', False),
+    ('cogs.pinboard', 'Pinboard', False),
+    ('cogs.simulation', 'Simulation', False),
+    ('cogs.sound', 'Sound', True),
+    ('cogs.text', 'Text', False),
+    ('cogs.typing', 'Typing', True),
+    ('cogs.utility', 'Utility', True),
+    ('cogs.wab', 'Wab', False),
 )
-
@@ -1,3 +1,5 @@
+import asyncio
+
 import discord
 from loguru import logger
 
@@ -21,3 +23,38 @@ class Admin(car.Cog):
         await self.bot.close()
         sys.exit()
 
+
+    @car.text_command(hidden=True)
+    async def reload(self, ctx, cog_name: str):
+        """Reloads a cog's module without restarting"""
+        if cog_name not in self.bot.cog_handler.cog_classes:
+            raise car.ArgumentError("I can't find a cog with this name!",
+                                    'cog_name')
+
+        if self.bot.ipc is not None:
+            # every shard reloads its own copy; failures are logged there
+            try:
+                results = await self.bot.ipc.query_all('reload_cog',
+                                                       cog_name)
+            except asyncio.TimeoutError:
+                # the supervisor never answered
+                results = [None] * self.bot.shard_count
+            ok = sum(1 for r in results if r)
+            responding = sum(1 for r in results if r is not None)
+            await ctx.respond(f"Reloaded cog `{cog_name}` on {ok}/"
+                              f"{len(results)} shards ({responding}/"
+                              f"{len(results)} shards responding)")
+            return
+
+        try:
+            self.bot.cog_handler.reload_cog(cog_name)
+        except Exception as e:
+            logger.exception(f"Reloading cog '{cog_name}' failed")
+            raise car.CommandError(f"Reload failed!\n\n```{e}```")
+
+        await ctx.respond(f"Reloaded cog `{cog_name}`")
+
+    @car.text_command(hidden=True)
+    async def metrics(self, ctx):
+        """Displays internal performance metrics"""
+        await ctx.respond(f"```{car.metrics.render() or 'No metrics yet'}```")
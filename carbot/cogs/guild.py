@@ -45,6 +45,7 @@ class Guild(car.Cog):
 
         if vals:
             self.bot.guild_settings.update(ctx.guild.id, **vals)
+            car.render_cache.invalidate(f"settings of guild {ctx.guild.id}")
 
         # for name, new_val in ctx.args.items():
             # if new_val is None:
@@ -180,11 +181,10 @@ class Guild(car.Cog):
         if msg.guild.id not in self.bot.guild_settings:
             self.bot.guild_settings.insert(guild_id=member.guild.id)
 
-    @car.listener
+    @car.listener(guild_ids={495327409487478785},
+                  author_ids={414848078244347904})
     async def on_member_update(self, before, after):
-        if before.guild.id != 495327409487478785 \
-                or before.id != 414848078244347904 \
-                or before.nick == after.nick:
+        if before.nick == after.nick:
             return
 
         logger.info(f"sparkl changed nick: {after.nick}")
@@ -1,7 +1,6 @@
 import io
 from typing import Annotated as A
 import discord
-import requests
 import car
 
 
@@ -28,12 +27,13 @@ class Image(car.Cog):
             "BackgroundColor_color": "#FFFFFF"
         }
         await ctx.defer()
-        r = requests.post(url, data=data)
-        if r.status_code != 200:
+        try:
+            r = await self.bot.web.post(url, data=data)
+            # blobyikes
+            content = (await self.bot.web.get(r.json()['renderLocation'],
+                                              ssl=False)).body
+        except car.HTTPError:
             raise car.CommandError("Request failed!")
-
-        # blobyikes
-        content = requests.get(r.json()['renderLocation'], verify=False).content
         f = discord.File(io.BytesIO(content), filename="burningtext.gif")
 
         await ctx.respond(file=f)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 from typing import Annotated as A, Optional, Union
@@ -13,15 +14,28 @@ class Meta(car.Cog):
     category = "Meta"
 
     def cmdlist_embed(self, ctx: car.Context,
-                      commands: Union[dict[str, car.SlashCommand],
-                                      dict[str, car.TextCommand]],
+                      commands: dict[str, Union[car.Command,
+                                                car.ManifestCommand]],
                       sep: bool = False,
                       view_hidden: bool = False,
                       **embed_kwargs) -> discord.Embed:
+        return car.render_cache.embed(
+            ctx, commands.values(),
+            lambda: self._cmdlist_embed(ctx, commands, sep, view_hidden,
+                                        **embed_kwargs),
+            'cmdlist', id(commands), sep, view_hidden,
+            tuple(sorted(embed_kwargs.items()))
+        )
+
+    def _cmdlist_embed(self, ctx: car.Context,
+                       commands: dict[str, Union[car.Command,
+                                                 car.ManifestCommand]],
+                       sep: bool, view_hidden: bool,
+                       **embed_kwargs) -> discord.Embed:
         categories: dict[str, list[str]] = {}
 
         for name, cmd in sorted(commands.items()):
-            if cmd.guild_id is not None and cmd.guild_id != ctx.guild.id:
+            if cmd.guild_id is not None and cmd.guild_id != ctx.guild_id:
                 continue
             if cmd.hidden:
                 if not view_hidden:
@@ -59,10 +73,18 @@ class Meta(car.Cog):
 
     def cmdhelp_embed(self, ctx: car.Context, cmd: car.Command,
                       embed_title: str) -> discord.Embed:
-        desc = cmd.desc
+        return car.render_cache.embed(
+            ctx, (cmd,),
+            lambda: self._cmdhelp_embed(ctx, cmd, embed_title),
+            'cmdhelp', cmd, embed_title
+        )
+
+    def _cmdhelp_embed(self, ctx: car.Context, cmd: car.Command,
+                       embed_title: str) -> discord.Embed:
         e = discord.Embed(title=embed_title, description=cmd.desc)
 
-        e.add_field(name="Usage", value=cmd.usage(prefix=ctx.prefix),
+        e.add_field(name="Usage",
+                    value=car.render_cache.usage(cmd, ctx.prefix),
                     inline=False)
 
         if isinstance(cmd, car.SlashCommand) and len(cmd.subcommands) > 0:
@@ -110,12 +132,13 @@ class Meta(car.Cog):
                 " command help"
             )
             await ctx.respond(embed=self.cmdlist_embed(
-                ctx, self.bot.cog_handler.text_commands,
+                ctx, self.bot.cog_handler.help_text_commands,
                 title=title, description=desc, view_hidden=view_hidden
             ))
             return
 
-        cmd = self.bot.cog_handler.text_commands.get(command)
+        # imports the command's cog if it's deferred
+        cmd = self.bot.cog_handler.get_text_command(command)
         if cmd is None:
             raise car.ArgumentError(f"Invalid command! Use `{ctx.prefix}help` "
                                 "to view the list of commands.", 'command')
@@ -144,13 +167,13 @@ class Meta(car.Cog):
                 "the list of text commands"
             )
             await ctx.respond(embed=self.cmdlist_embed(
-                ctx, self.bot.cog_handler.slash_commands,
+                ctx, self.bot.cog_handler.help_slash_commands,
                 sep=True, title=title, description=desc,
                 view_hidden=view_hidden
             ))
             return
 
-        cmd = self.bot.cog_handler.slash_commands.get(command)
+        cmd = self.bot.cog_handler.get_slash_command(command)
         if cmd is None:
             raise car.ArgumentError(f"Invalid command! Use `/help` to view the "
                                 "list of commands.", 'command')
@@ -193,5 +216,23 @@ class Meta(car.Cog):
         )
         mem_mb = psutil.Process(os.getpid()).memory_info().rss / 1024 ** 2
         e.add_field(name="Memory usage", value=f"{mem_mb:.2f}MB")
+
+        if self.bot.ipc is not None:
+            try:
+                stats = [s for s in await self.bot.ipc.query_all('stats')
+                         if s is not None]
+            except asyncio.TimeoutError:
+                # the supervisor never answered
+                stats = []
+            e.add_field(name="Servers", value=(
+                f"{sum(s['guilds'] for s in stats)} "
+                f"(shard {self.bot.shard_id}; {len(stats)}/"
+                f"{self.bot.shard_count} shards responding)"
+            ))
+            e.add_field(name="Members",
+                        value=str(sum(s['members'] for s in stats)))
+        else:
+            e.add_field(name="Servers", value=str(len(self.bot.guilds)))
+
         await ctx.respond(embed=e)
 
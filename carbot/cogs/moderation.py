@@ -24,15 +24,30 @@ class Moderation(car.Cog):
         self.vc_dq: deque[VCLogCooldownTuple] = deque()
         self.vc_count: dict[int, int] = {}
 
-        self.vc_prev_msg = None
+        # the last vclog entry, queued in bot.send_queue or already sent
+        self.vc_prev_entry = None
+        # the entry's embed as last edited; edits are sent later, so the
+        # sent message's embeds may be out of date
+        self.vc_prev_embed = None
         self.vc_prev_msg_uid = None
         self.vc_prev_msg_cnt = 0
 
-    @car.listener
+    def export_state(self):
+        return {
+            'vc_dq': self.vc_dq,
+            'vc_count': self.vc_count,
+            'vc_prev_entry': self.vc_prev_entry,
+            'vc_prev_embed': self.vc_prev_embed,
+            'vc_prev_msg_uid': self.vc_prev_msg_uid,
+            'vc_prev_msg_cnt': self.vc_prev_msg_cnt
+        }
+
+    def import_state(self, state):
+        for name, val in state.items():
+            setattr(self, name, val)
+
+    @car.listener(guild_only=True)
     async def on_message(self, msg):
-        if msg.guild is None:
-            return
-
         cfg = self.bot.guild_settings.select(
             'vclog_channel, vclog_enabled', 'WHERE guild_id=?', (msg.guild.id,)
         )
@@ -42,9 +57,9 @@ class Moderation(car.Cog):
         if msg.channel.id == cfg['vclog_channel']:
             self.vc_prev_msg_cnt += 1
 
-    @car.listener
+    @car.listener(ignore_bots=True)
     async def on_voice_state_update(self, member, bef, aft):
-        if member.bot or bef.channel == aft.channel:
+        if bef.channel == aft.channel:
             return
 
         cfg = self.bot.guild_settings.select(
@@ -81,28 +96,44 @@ class Moderation(car.Cog):
 
         status_msg = f"`{status}` <#{channel.id}>"
 
-        if self.vc_prev_msg is not None and self.vc_prev_msg_cnt <= 1 \
+        if self.vc_prev_entry is not None and self.vc_prev_msg_cnt <= 1 \
                 and member.id == self.vc_prev_msg_uid:
-            prev = self.vc_prev_msg.embeds[0]
+            prev = self.vc_prev_embed
 
             e = discord.Embed(description=f"{prev.description}\n{status_msg}")
             e.set_author(name=prev.author.name, icon_url=prev.author.icon_url)
-
-            self.vc_prev_msg = await self.vc_prev_msg.edit(embed=e)
+            self.vc_prev_embed = e
+
+            entry = self.vc_prev_entry
+            if not entry.replace(e):
+                # already sent (possibly batched with other entries). Other
+                # voice updates can run while this waits, so only e and
+                # entry are this member's from here on
+                await asyncio.wait([entry.sent])
+                if entry.sent.cancelled() or entry.sent.exception():
+                    # dropped or failed; e has the whole history anyway
+                    new_entry = self.bot.send_queue.enqueue(log_channel, e)
+                    if self.vc_prev_entry is entry:
+                        self.vc_prev_entry = new_entry
+                    return
+
+                msg, idx = entry.sent.result()
+                embeds = list(msg.embeds)
+                embeds[idx] = e
+                self.bot.edit_scheduler.edit_message(msg, embeds=embeds)
 
         else:
             e = discord.Embed(description=status_msg)
             e.set_author(name=member.name, icon_url=member.avatar.url)
 
-            msg = await log_channel.send(embed=e)
-
-            self.vc_prev_msg = msg
+            self.vc_prev_entry = self.bot.send_queue.enqueue(log_channel, e)
+            self.vc_prev_embed = e
             self.vc_prev_msg_uid = member.id
             self.vc_prev_msg_cnt = 0
 
-    @car.listener
+    @car.listener(guild_only=True, ignore_bots=True)
     async def on_message_edit(self, bef, aft):
-        if bef.author.bot or bef.content == aft.content:
+        if bef.content == aft.content:
             return
 
         cfg = self.bot.guild_settings.select(
@@ -114,6 +145,8 @@ class Moderation(car.Cog):
 
         channel = discord.utils.get(bef.guild.text_channels,
                                     id=cfg['modlog_channel'])
+        if channel is None:
+            return
 
         e = discord.Embed(description=(
             f"[[Jump]]({bef.jump_url}) {bef.author.mention} in"
@@ -133,13 +166,10 @@ class Moderation(car.Cog):
 
             e.add_field(name="After", value=ctn)
 
-        await channel.send(embed=e)
+        self.bot.send_queue.enqueue(channel, e)
 
-    @car.listener
+    @car.listener(guild_only=True, ignore_bots=True)
     async def on_message_delete(self, msg):
-        if msg.author.bot:
-            return
-
         cfg = self.bot.guild_settings.select(
             'modlog_channel, modlog_enabled', 'WHERE guild_id=?',
             (msg.guild.id,)
@@ -149,6 +179,8 @@ class Moderation(car.Cog):
 
         channel = discord.utils.get(msg.guild.text_channels,
                                     id=cfg['modlog_channel'])
+        if channel is None:
+            return
 
         e = discord.Embed(description=(
             f"{msg.author.mention} in {msg.channel.mention}"
@@ -159,7 +191,7 @@ class Moderation(car.Cog):
         if len(msg.content) > 0:
             e.add_field(name="Content", value=msg.content)
 
-        await channel.send(embed=e)
+        self.bot.send_queue.enqueue(channel, e)
 
     @car.slash_command_group(name="give")
     async def _give(self, ctx): pass
@@ -257,7 +289,9 @@ class Moderation(car.Cog):
                         f"in {int(round(countdown))}......."
                     )
                 )
-                await ctx.edit_response(embed=e)
+                # not awaited, so that a slow edit doesn't stretch the
+                # countdown; late ticks are coalesced
+                ctx.schedule_edit(embed=e)
                 await asyncio.sleep(1)
                 countdown -= 1
 
@@ -88,14 +88,21 @@ class Pinboard(car.Cog):
 
         # await ctx.send("scanning done")
 
+    def export_state(self):
+        return {'reacted_msgs': self.reacted_msgs}
+
+    def import_state(self, state):
+        self.reacted_msgs = state.get('reacted_msgs', self.reacted_msgs)
+
     async def pin_message(self, cfg, reaction, msg):
         if msg.id in self.reacted_msgs \
                 and not isinstance(self.reacted_msgs, bool):
             m = self.reacted_msgs[msg.id]
             if not m.content.split(' ')[-1] == f"**x{reaction.count}**":
-                await m.edit(
-                    content=f"{m.content.split(' ')[0]} **x{reaction.count}**"
-                )
+                # bursts of reactions only send the latest count
+                star = m.content.split(' ')[0]
+                self.bot.edit_scheduler.edit_message(
+                    m, content=f"{star} **x{reaction.count}**")
             return
 
         self.reacted_msgs[msg.id] = True # placeholder
@@ -127,7 +134,7 @@ class Pinboard(car.Cog):
                                embed=e)
         self.reacted_msgs[msg.id] = m
 
-    @car.listener
+    @car.listener(guild_only=True)
     async def on_reaction_add(self, reaction, user):
         msg = reaction.message
 
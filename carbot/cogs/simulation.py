@@ -7,6 +7,8 @@ import carpp
 class Simulation(car.Cog):
     category = "Simulation"
     @car.mixed_command()
+    @car.max_concurrency(1, per=car.ConcurrencyScope.USER)
+    @car.max_concurrency(4, max_wait=30)
     async def akpull(
         self,
         ctx: car.Context,
@@ -27,8 +29,11 @@ class Simulation(car.Cog):
         trials = int(min(1e6, int(2e7/amt_pulls)))
         await ctx.defer()
 
+        # carpp releases the GIL, so a thread is enough
         expected, no_rateup, any_rateup, specific_rateup, both_rateup \
-            = carpp.akpull(trials, amt_pulls, banner_type)
+            = await car.offloader.run(carpp.akpull, trials, amt_pulls,
+                                      banner_type, guild_id=ctx.guild_id,
+                                      threads=True)
 
         desc = (
             "```css\n[6* results]\n"
@@ -283,6 +283,12 @@ class Sound(car.Cog):
             car.DBColumn('verified', False)
         ))
 
+    def export_state(self) -> dict[str, Any]:
+        return {'sessions': self.sessions}
+
+    def import_state(self, state: dict[str, Any]) -> None:
+        self.sessions = state.get('sessions', self.sessions)
+
     @staticmethod
     def free_path(name: str, file_type: str) -> str:
         path = f"./sfx/{name}.{file_type}"
@@ -301,7 +307,8 @@ class Sound(car.Cog):
                                     "name!", 'name')
         return sound
 
-    @car.listener
+    # sessions only exist once a command has loaded the cog
+    @car.listener(loads_lazy_cog=False)
     async def on_voice_state_update(self, member, before, after):
         voice_state = member.guild.voice_client
         if voice_state is None:
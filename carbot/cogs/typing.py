@@ -7,7 +7,6 @@ from typing import Annotated as A, Optional
 from bs4 import BeautifulSoup
 import discord
 from loguru import logger
-import requests
 
 import car
 import carpp
@@ -234,19 +233,26 @@ class Typing(car.Cog):
 
         logger.info("Retrieving texts from typeracer")
 
-        r = requests.get("http://typeracerdata.com/texts?texts=full")
+        r = await self.bot.web.get("http://typeracerdata.com/texts?texts=full")
 
-        soup = BeautifulSoup(r.content, "html.parser")
+        soup = BeautifulSoup(r.body, "html.parser")
         rows = soup.find_all("tr")
 
+        texts = [row.find_all("td")[2].find("a").decode_contents()
+                 for row in rows[1:]]
+        diffs = await typing_diffs.run(texts, guild_id=ctx.guild_id)
+
         cur = self.bot.con.cursor()
-        for i in range(1, len(rows)):
-            text = rows[i].find_all("td")[2].find("a").decode_contents()
+        for text, diff in zip(texts, diffs):
             cur.execute(
                 "INSERT INTO typing_excerpts VALUES(NULL, ?, ?, ?, 1)",
-                (text, len(text), self.typing_diff(text))
+                (text, len(text), diff)
             )
         self.bot.con.commit()
 
         await ctx.respond("done")
 
+
+@car.cpu_bound(timeout=300)
+def typing_diffs(texts: list[str]) -> list[int]:
+    return [Typing.typing_diff(text) for text in texts]
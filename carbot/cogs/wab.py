@@ -6,20 +6,19 @@ import car
 class Wab(car.Cog):
     category = "Wab"
 
-    @car.listener
+    @car.listener(author_ids={852247774325243963, 153240776216805376})
     async def on_message(self, msg):
-        if msg.author.id == 852247774325243963 or msg.author.id == 153240776216805376:
-            tok = car.Tokenizer(msg.content)
+        tok = car.Tokenizer(msg.content)
 
-            ctx = car.TextContext.from_message(self.bot, msg)
+        ctx = car.TextContext.from_message(self.bot, msg)
 
-            pings = [
-                (await car.ToMember().convert(ctx, p[5:])).mention
-                for p in tok.tokens()
-                if p.startswith("ping:") and len(p) > 5
-            ]
+        pings = [
+            (await car.ToMember().convert(ctx, p[5:])).mention
+            for p in tok.tokens()
+            if p.startswith("ping:") and len(p) > 5
+        ]
 
-            if pings:
-                allowed = discord.AllowedMentions(everyone=False, users=True,
-                                                  roles=False)
-                await ctx.reply(' '.join(pings), allowed_mentions=allowed)
+        if pings:
+            allowed = discord.AllowedMentions(everyone=False, users=True,
+                                              roles=False)
+            await ctx.reply(' '.join(pings), allowed_mentions=allowed)
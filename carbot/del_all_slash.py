@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from loguru import logger
 
@@ -11,7 +12,17 @@ def main():
     logger.add(sys.stderr, level="DEBUG" if config.DEBUG else "INFO")
     bot = car.Bot()
 
-    bot.cog_handler.put_slash_commands(config.APPLICATION_ID, config.TOKEN)
+    async def sync():
+        try:
+            # no cogs are added, so this always clears the commands, even
+            # if the stored digest says they're unchanged
+            await bot.cog_handler.sync_slash_commands(config.APPLICATION_ID,
+                                                      config.TOKEN,
+                                                      force=True)
+        finally:
+            await bot.web.close()
+
+    asyncio.run(sync())
 
 if __name__ == '__main__':
     main()
@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import sys
 from loguru import logger
 
@@ -7,15 +9,32 @@ import config
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Syncs slash commands")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="only show what would change")
+    parser.add_argument('--force', action='store_true',
+                        help="upload even if nothing has changed")
+    args = parser.parse_args()
+
     logger.remove()
     logger.add(sys.stderr, level="DEBUG" if config.DEBUG else "INFO")
     bot = car.Bot()
 
-    for cog_cls in cogs.to_load:
-        bot.cog_handler.add_cog_class(cog_cls)
-        bot.cog_handler.load_cog(cog_cls.__name__)
+    car.registry_cache.load()
+    for module_name, cog_name, _ in cogs.to_load:
+        bot.cog_handler.add_cog(module_name, cog_name)
+
+    async def sync():
+        try:
+            await bot.cog_handler.sync_slash_commands(
+                config.APPLICATION_ID, config.TOKEN, dry_run=args.dry_run,
+                force=args.force
+            )
+        finally:
+            await bot.web.close()
 
-    bot.cog_handler.put_slash_commands(config.APPLICATION_ID, config.TOKEN)
+    asyncio.run(sync())
+    car.registry_cache.save()
 
 if __name__ == '__main__':
     main()
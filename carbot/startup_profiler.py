@@ -0,0 +1,176 @@
+# Imported before car so that it can time car's own imports; keep this
+# module free of non-stdlib imports
+import contextlib
+import functools
+import json
+import sys
+import time
+from typing import Any, Callable, Iterator
+
+
+# Meta path hook that times each module's execution (like
+# python -X importtime), separating self time from nested imports
+class ImportTimer:
+    def __init__(self):
+        self.self_seconds: dict[str, float] = {}
+        self.total_seconds: dict[str, float] = {}
+        self._nested: list[float] = []
+        self._finding = False
+
+    def install(self) -> None:
+        sys.meta_path.insert(0, self) # type: ignore[arg-type]
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self) # type: ignore[arg-type]
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                find = getattr(finder, 'find_spec', None)
+                if finder is self or find is None:
+                    continue
+                spec = find(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+
+        loader = spec.loader
+        # builtin/frozen importers are classes; only wrap loader instances
+        if loader is not None and not isinstance(loader, type) \
+                and hasattr(loader, 'exec_module'):
+            loader.exec_module = self._timed(fullname, loader.exec_module)
+        return spec
+
+    def _timed(self, name: str, exec_module: Callable) -> Callable:
+        @functools.wraps(exec_module)
+        def wrapper(module):
+            self._nested.append(0)
+            bef = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - bef
+                nested = self._nested.pop()
+                self.total_seconds[name] = total
+                self.self_seconds[name] = total - nested
+                if self._nested:
+                    self._nested[-1] += total
+        return wrapper
+
+
+class StartupProfiler:
+    def __init__(self, *, enabled: bool,
+                 report_path: str = "startup_profile.txt",
+                 json_path: str = "startup_profile.json"):
+        self.enabled = enabled
+        self.report_path = report_path
+        self.json_path = json_path
+
+        self.started_at = time.perf_counter()
+        self.phases: list[dict[str, Any]] = []
+        self.calls: dict[str, dict[str, float]] = {}
+        self._open: dict[str, float] = {}
+        self._restore: list[Callable[[], None]] = []
+
+        self.imports = ImportTimer()
+        if self.enabled:
+            self.imports.install()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def begin(self, name: str) -> None:
+        if self.enabled:
+            self._open[name] = self._now()
+
+    def end(self, name: str) -> None:
+        if not self.enabled:
+            return
+        start = self._open.pop(name)
+        self.phases.append({'name': name, 'start': start,
+                            'seconds': self._now() - start})
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    # Wraps owner.attr so that its calls are counted and timed until finish()
+    def instrument(self, owner: Any, attr: str, label: str) -> None:
+        if not self.enabled:
+            return
+
+        original = getattr(owner, attr)
+        stats = self.calls.setdefault(label, {'calls': 0, 'seconds': 0})
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            bef = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                stats['calls'] += 1
+                stats['seconds'] += time.perf_counter() - bef
+
+        setattr(owner, attr, wrapper)
+        self._restore.append(lambda: setattr(owner, attr, original))
+
+    def results(self) -> dict[str, Any]:
+        return {
+            'total_seconds': self._now(),
+            'phases': self.phases,
+            'calls': self.calls,
+            'imports': {
+                name: {'self_seconds': self.imports.self_seconds[name],
+                       'total_seconds': self.imports.total_seconds[name]}
+                for name in sorted(self.imports.self_seconds,
+                                   key=self.imports.self_seconds.get,
+                                   reverse=True)
+            }
+        }
+
+    def report(self, results: dict[str, Any], top_imports: int = 40) -> str:
+        lines = [f"Startup took {results['total_seconds']:.3f}s", "",
+                 "Phases (start, duration):"]
+        for p in results['phases']:
+            lines.append(f"  {p['start']:8.3f}s {p['seconds']:8.3f}s  "
+                         f"{p['name']}")
+
+        lines += ["", "Instrumented calls (total, calls):"]
+        for label, stats in sorted(results['calls'].items(),
+                                   key=lambda x: -x[1]['seconds']):
+            lines.append(f"  {stats['seconds']:8.3f}s {stats['calls']:8}  "
+                         f"{label}")
+
+        lines += ["", f"Slowest {top_imports} imports (self, cumulative):"]
+        for name, t in list(results['imports'].items())[:top_imports]:
+            lines.append(f"  {t['self_seconds']:8.3f}s "
+                         f"{t['total_seconds']:8.3f}s  {name}")
+
+        return '\n'.join(lines) + '\n'
+
+    def finish(self) -> None:
+        if not self.enabled:
+            return
+
+        self.imports.uninstall()
+        for restore in reversed(self._restore):
+            restore()
+        self._restore = []
+
+        results = self.results()
+        with open(self.json_path, 'w') as f:
+            json.dump(results, f, indent=4)
+        with open(self.report_path, 'w') as f:
+            f.write(self.report(results))
@@ -1,21 +1,320 @@
 #include <algorithm>
-#include <array>
+#include <cstdint>
+#include <cstdlib>
+#include <optional>
 #include <queue>
 #include <string>
+#include <string_view>
 #include <utility>
 #include <vector>
 
+#include "algorithm.h"
+
 #define INF 0x3f3f3f3f
 
 namespace carpp::algorithm {
 
-int levenshtein(const std::string& s1, const std::string& s2,
+namespace {
+
+// Buffers reused by every call on a thread. peq holds, for each character
+// and 64-character block of the pattern, the bits of the positions where
+// the character occurs; it's all zeros between calls.
+struct Scratch {
+    std::vector<uint64_t> peq;
+    std::vector<uint64_t> vp, vn;
+    std::vector<int> row;
+};
+
+thread_local Scratch scratch;
+
+size_t blocks_of(std::string_view pattern) {
+    return (pattern.size() + 63) / 64;
+}
+
+uint64_t* fill_peq(std::string_view pattern, size_t blocks) {
+    if (scratch.peq.size() < 256 * blocks) scratch.peq.resize(256 * blocks);
+    uint64_t* peq = scratch.peq.data();
+    for (size_t i = 0; i < pattern.size(); i++) {
+        peq[(unsigned char)pattern[i] * blocks + i / 64] |= 1ULL << (i % 64);
+    }
+    return peq;
+}
+
+void clear_peq(std::string_view pattern, size_t blocks) {
+    uint64_t* peq = scratch.peq.data();
+    for (size_t i = 0; i < pattern.size(); i++) {
+        peq[(unsigned char)pattern[i] * blocks + i / 64] = 0;
+    }
+}
+
+// drops the common prefix and suffix, which every optimal alignment (and
+// LCS) matches as is; returns how many characters were dropped
+size_t strip_affixes(std::string_view& s1, std::string_view& s2) {
+    size_t prefix = 0;
+    while (prefix < s1.size() && prefix < s2.size()
+            && s1[prefix] == s2[prefix]) prefix++;
+    s1.remove_prefix(prefix);
+    s2.remove_prefix(prefix);
+
+    size_t suffix = 0;
+    while (suffix < s1.size() && suffix < s2.size()
+            && s1[s1.size()-1-suffix] == s2[s2.size()-1-suffix]) suffix++;
+    s1.remove_suffix(suffix);
+    s2.remove_suffix(suffix);
+
+    return prefix + suffix;
+}
+
+// Unit-cost distance; Myers (1999), one 64-bit word per block of pattern.
+// The pattern should be the shorter string
+int myers(std::string_view pattern, std::string_view text) {
+    const size_t m = pattern.size();
+    if (m == 0) return text.size();
+
+    const size_t blocks = blocks_of(pattern);
+    const uint64_t* peq = fill_peq(pattern, blocks);
+    const uint64_t last = 1ULL << ((m - 1) % 64);
+    int score = m;
+
+    if (blocks == 1) {
+        uint64_t vp = ~0ULL, vn = 0;
+        for (unsigned char c : text) {
+            uint64_t eq = peq[c];
+            uint64_t xv = eq | vn;
+            uint64_t xh = (((eq & vp) + vp) ^ vp) | eq;
+            uint64_t hp = vn | ~(xh | vp);
+            uint64_t hn = vp & xh;
+            if (hp & last) score++;
+            else if (hn & last) score--;
+            hp = (hp << 1) | 1;
+            hn <<= 1;
+            vp = hn | ~(xv | hp);
+            vn = hp & xv;
+        }
+    } else {
+        scratch.vp.assign(blocks, ~0ULL);
+        scratch.vn.assign(blocks, 0);
+        uint64_t* vps = scratch.vp.data();
+        uint64_t* vns = scratch.vn.data();
+
+        for (unsigned char c : text) {
+            const uint64_t* eqs = peq + c * blocks;
+            // horizontal delta entering the top of the block: +1 for the
+            // first one, whose top row is the text's prefix length
+            int h = 1;
+            for (size_t b = 0; b < blocks; b++) {
+                uint64_t vp = vps[b], vn = vns[b], eq = eqs[b];
+                uint64_t xv = eq | vn;
+                if (h < 0) eq |= 1;
+                uint64_t xh = (((eq & vp) + vp) ^ vp) | eq;
+                uint64_t hp = vn | ~(xh | vp);
+                uint64_t hn = vp & xh;
+
+                uint64_t bit = b == blocks - 1 ? last : 1ULL << 63;
+                int h_out = (hp & bit) ? 1 : (hn & bit) ? -1 : 0;
+
+                hp <<= 1;
+                hn <<= 1;
+                if (h < 0) hn |= 1;
+                else if (h > 0) hp |= 1;
+                vps[b] = hn | ~(xv | hp);
+                vns[b] = hp & xv;
+                h = h_out;
+            }
+            score += h;
+        }
+    }
+
+    clear_peq(pattern, blocks);
+    return score;
+}
+
+// Unit-cost distance if it's at most k, and k + 1 otherwise; Ukkonen's
+// (1985) band of diagonals within k of the main one, stopping once a whole
+// row of it exceeds k
+int ukkonen(std::string_view s1, std::string_view s2, int k) {
+    const int n = s1.size(), m = s2.size();
+    if (std::abs(n - m) > k) return k + 1;
+    // the distance is at most max(n, m), so a wider band changes nothing;
+    // this also keeps i + k and k + 1 from overflowing
+    k = std::min(k, std::max(n, m));
+
+    std::vector<int>& row = scratch.row;
+    row.assign(m + 1, k + 1);
+    for (int j = 0; j <= std::min(m, k); j++) row[j] = j;
+
+    for (int i = 1; i <= n; i++) {
+        const int lo = std::max(1, i - k), hi = std::min(m, i + k);
+        int diag = row[lo-1];
+        row[lo-1] = lo == 1 ? std::min(i, k + 1) : k + 1;
+        int row_min = row[lo-1];
+
+        for (int j = lo; j <= hi; j++) {
+            int up = row[j];
+            int v = s1[i-1] == s2[j-1] ? diag
+                : 1 + std::min({diag, up, row[j-1]});
+            diag = up;
+            row[j] = std::min(v, k + 1);
+            row_min = std::min(row_min, v);
+        }
+        if (row_min > k) return k + 1;
+    }
+    return row[m];
+}
+
+// Length of the longest common subsequence, if it's at least `need` (and
+// something less than need otherwise); Hyyrö (2004), with the pattern's
+// blocks added with carries. The pattern should be the shorter string
+int lcs(std::string_view pattern, std::string_view text, int need = 0) {
+    const size_t m = pattern.size();
+    if (m == 0 || (int)std::min(m, text.size()) < need) return 0;
+
+    const size_t blocks = blocks_of(pattern);
+    const uint64_t* peq = fill_peq(pattern, blocks);
+    const uint64_t tail = m % 64 == 0 ? ~0ULL : (1ULL << (m % 64)) - 1;
+    int res = 0;
+
+    if (blocks == 1) {
+        uint64_t s = ~0ULL;
+        size_t left = text.size();
+        for (unsigned char c : text) {
+            uint64_t u = s & peq[c];
+            s = (s + u) | (s - u);
+            left--;
+            if (need > 0 && __builtin_popcountll(~s & tail) + (int)left
+                    < need) break;
+        }
+        res = __builtin_popcountll(~s & tail);
+    } else {
+        scratch.vp.assign(blocks, ~0ULL);
+        uint64_t* ss = scratch.vp.data();
+
+        size_t left = text.size();
+        for (unsigned char c : text) {
+            const uint64_t* eqs = peq + c * blocks;
+            uint64_t carry = 0;
+            for (size_t b = 0; b < blocks; b++) {
+                uint64_t s = ss[b], u = s & eqs[b];
+                uint64_t x = s + u;
+                uint64_t y = x + carry;
+                carry = (x < s) | (y < x);
+                ss[b] = y | (s - u);
+            }
+            left--;
+            // counting every block is as expensive as a step, so only
+            // check whether the LCS can still reach need once in a while
+            if (need > 0 && left % 64 == 0) {
+                int now = 0;
+                for (size_t b = 0; b < blocks; b++) {
+                    now += __builtin_popcountll(
+                        ~ss[b] & (b == blocks - 1 ? tail : ~0ULL));
+                }
+                if (now + (int)left < need) break;
+            }
+        }
+        for (size_t b = 0; b < blocks; b++) {
+            res += __builtin_popcountll(
+                ~ss[b] & (b == blocks - 1 ? tail : ~0ULL));
+        }
+    }
+
+    clear_peq(pattern, blocks);
+    return res;
+}
+
+// the DP, keeping one row in the scratch buffer; stops once a whole row
+// exceeds max_dist
+int dp(std::string_view s1, std::string_view s2,
+        int w_del, int w_ins, int w_sub, int max_dist = INF) {
+    std::vector<int>& row = scratch.row;
+    row.resize(s2.size() + 1);
+    for (size_t j = 0; j <= s2.size(); j++) row[j] = j * w_ins;
+
+    for (size_t i = 1; i <= s1.size(); i++) {
+        int diag = row[0];
+        row[0] = i * w_del;
+        int row_min = row[0];
+
+        for (size_t j = 1; j <= s2.size(); j++) {
+            int up = row[j];
+            row[j] = s1[i-1] == s2[j-1] ? diag : std::min({
+                w_del + up,
+                w_ins + row[j-1],
+                w_sub + diag
+            });
+            diag = up;
+            row_min = std::min(row_min, row[j]);
+        }
+        if (row_min > max_dist) return max_dist + 1;
+    }
+    return row[s2.size()];
+}
+
+}
+
+int levenshtein(std::string_view s1, std::string_view s2,
+        int w_del/* = 1*/, int w_ins/* = 1*/, int w_sub/* = 1*/) {
+
+    if (w_del == w_ins && w_ins == w_sub) {
+        strip_affixes(s1, s2);
+        if (s1.size() > s2.size()) std::swap(s1, s2);
+        return w_sub * myers(s1, s2);
+    }
+
+    if (w_sub >= w_del + w_ins) {
+        const int n = s1.size(), m = s2.size();
+        int common = strip_affixes(s1, s2);
+        if (s1.size() > s2.size()) std::swap(s1, s2);
+        common += lcs(s1, s2);
+        return w_del*n + w_ins*m - (w_del + w_ins)*common;
+    }
+
+    return dp(s1, s2, w_del, w_ins, w_sub);
+}
+
+int levenshtein_bounded(std::string_view s1, std::string_view s2,
+        int max_dist, int w_del/* = 1*/, int w_ins/* = 1*/,
+        int w_sub/* = 1*/) {
+
+    if (max_dist < 0) return max_dist + 1;
+    // no distance gets this far, and max_dist + 1 or the band below could
+    // overflow
+    if (max_dist >= INF) return levenshtein(s1, s2, w_del, w_ins, w_sub);
+
+    if (w_del == w_ins && w_ins == w_sub && w_sub > 0) {
+        const int k = max_dist / w_sub;
+        strip_affixes(s1, s2);
+        if (s1.size() > s2.size()) std::swap(s1, s2);
+        if ((int)(s2.size() - s1.size()) > k) return max_dist + 1;
+
+        // a step of Myers' algorithm costs about as much as three cells of
+        // the band, per block of the pattern
+        int dist = 2*(int64_t)k + 1 < 3 * (int64_t)blocks_of(s1)
+            ? ukkonen(s1, s2, k) : myers(s1, s2);
+        return dist > k ? max_dist + 1 : w_sub * dist;
+    }
+
+    if (w_sub >= w_del + w_ins && w_del + w_ins > 0) {
+        const int n = s1.size(), m = s2.size();
+        const int w = w_del + w_ins;
+        // dist <= max_dist iff the LCS is at least need
+        const int need = (w_del*n + w_ins*m - max_dist + w - 1) / w;
+        if (need > std::min(n, m)) return max_dist + 1;
+
+        int common = strip_affixes(s1, s2);
+        if (s1.size() > s2.size()) std::swap(s1, s2);
+        common += lcs(s1, s2, need - common);
+        int dist = w_del*n + w_ins*m - w*common;
+        return dist > max_dist ? max_dist + 1 : dist;
+    }
+
+    return std::min(dp(s1, s2, w_del, w_ins, w_sub, max_dist), max_dist + 1);
+}
+
+int levenshtein_dp(std::string_view s1, std::string_view s2,
         int w_del/* = 1*/, int w_ins/* = 1*/, int w_sub/* = 1*/) {
 
-    //int dp[2][s2.size()+1];
     std::vector<int> dp[2] = {std::vector<int>(s2.size()+1), std::vector<int>(s2.size()+1)};
-    //
-    //std::array<std::array<int, s2.size()+1>, 2> dp;
     bool row = 0;
 
     for (size_t i = 0; i <= s2.size(); i++) {
@@ -42,8 +341,11 @@ int levenshtein(const std::string& s1, const std::string& s2,
 }
 
 int func_levenshtein(const std::string& s1, const std::string& s2,
-        int w_del, int w_ins, int w_sub) {
+        int w_del, int w_ins, int w_sub, std::optional<int> max_dist) {
 
+    if (max_dist) {
+        return levenshtein_bounded(s1, s2, *max_dist, w_del, w_ins, w_sub);
+    }
     return levenshtein(s1, s2, w_del, w_ins, w_sub);
 }
 
@@ -55,7 +357,15 @@ std::vector<std::pair<int, int>> func_fuzzy_match(
     amount = std::min(amount, against.size());
 
     for (size_t i = 0; i < against.size(); i++) {
-        int dist = levenshtein(query, against[i], 9, 1, 10);
+        int dist;
+        if (amount > 0 && best_matches.size() == amount) {
+            // only a strictly closer string replaces the worst match
+            int worst = best_matches.top().first;
+            dist = levenshtein_bounded(query, against[i], worst - 1, 9, 1, 10);
+            if (dist >= worst) continue;
+        } else {
+            dist = levenshtein(query, against[i], 9, 1, 10);
+        }
         best_matches.push({dist, i});
         if (best_matches.size() > amount) best_matches.pop();
     }
@@ -77,7 +387,8 @@ std::pair<int, int> func_fuzzy_match_one(
     int min_dist=INF, idx=-1;
 
     for (size_t i = 0; i < against.size(); i++) {
-        int dist = levenshtein(query, against[i], 9, 1, 10);
+        int dist = levenshtein_bounded(
+            query, against[i], min_dist - 1, 9, 1, 10);
         if (dist < min_dist) {
             min_dist = dist;
             idx = i;
@@ -88,4 +399,3 @@ std::pair<int, int> func_fuzzy_match_one(
 }
 
 }
-
@@ -1,16 +1,33 @@
 #pragma once
 
+#include <optional>
 #include <string>
+#include <string_view>
 #include <vector>
 #include <utility>
 
 namespace carpp::algorithm {
 
-int levenshtein(const std::string& s1, const std::string& s2,
+// Cost of editing s1 into s2, where deleting a character of s1 costs w_del,
+// inserting one of s2 w_ins and substituting one w_sub. Equal weights use
+// Myers' bit-parallel algorithm, and weightings where substituting never
+// pays off (w_sub >= w_del + w_ins, like fuzzy matching's 9, 1, 10) a
+// bit-parallel LCS; others fall back to the DP.
+int levenshtein(std::string_view s1, std::string_view s2,
+        int w_del=1, int w_ins=1, int w_sub=1);
+
+// Same, but gives up as soon as the distance is known to exceed max_dist,
+// and then returns max_dist + 1. Used by top-k searches to drop candidates
+// that can't beat the current matches.
+int levenshtein_bounded(std::string_view s1, std::string_view s2,
+        int max_dist, int w_del=1, int w_ins=1, int w_sub=1);
+
+// The textbook O(|s1| |s2|) DP, which the kernels are checked against
+int levenshtein_dp(std::string_view s1, std::string_view s2,
         int w_del=1, int w_ins=1, int w_sub=1);
 
 int func_levenshtein(const std::string& s1, const std::string& s2,
-        int w_del, int w_ins, int w_sub);
+        int w_del, int w_ins, int w_sub, std::optional<int> max_dist);
 
 std::vector<std::pair<int, int>> func_fuzzy_match(
         const std::string& query, const std::vector<std::string>& against, size_t amount);
@@ -3,15 +3,33 @@
 namespace py = pybind11;
 
 #include "algorithm.h"
+#include "index.h"
 #include "simulation.h"
 
 PYBIND11_MODULE(carpp, m) {
     m.doc() = "Collection of functions to speed up carbot";
 
+    // Arguments are copied into C++ types before the GIL is released, so
+    // these can run in threads alongside the event loop
+
     m.def(
         "levenshtein",
         &carpp::algorithm::func_levenshtein,
-        "Returns the levenshtein distance of two strings",
+        "Returns the levenshtein distance of two strings, or max_dist + 1 "
+        "if it's greater than max_dist",
+        py::call_guard<py::gil_scoped_release>(),
+        py::arg("s1"),
+        py::arg("s2"),
+        py::arg("w_del") = 1,
+        py::arg("w_ins") = 1,
+        py::arg("w_sub") = 1,
+        py::arg("max_dist") = py::none()
+    );
+    m.def(
+        "levenshtein_dp",
+        &carpp::algorithm::levenshtein_dp,
+        "The reference DP levenshtein is checked and benchmarked against",
+        py::call_guard<py::gil_scoped_release>(),
         py::arg("s1"),
         py::arg("s2"),
         py::arg("w_del") = 1,
@@ -22,6 +40,7 @@ PYBIND11_MODULE(carpp, m) {
         "fuzzy_match",
         &carpp::algorithm::func_fuzzy_match,
         "Returns (levenshtein dist., index)s of the most similar strings",
+        py::call_guard<py::gil_scoped_release>(),
         py::arg("query"),
         py::arg("against"),
         py::arg("amount")
@@ -30,13 +49,44 @@ PYBIND11_MODULE(carpp, m) {
         "fuzzy_match_one",
         &carpp::algorithm::func_fuzzy_match_one,
         "Returns (levenshtein dist., index) of the most similar string",
+        py::call_guard<py::gil_scoped_release>(),
         py::arg("query"),
         py::arg("against")
     );
+
+    using carpp::index::FuzzyIndex;
+    py::class_<FuzzyIndex>(m, "FuzzyIndex",
+            "Strings keyed by integer ids, indexed for fuzzy matching")
+        .def(py::init<>())
+        .def(py::init<const std::vector<std::string>&>(),
+             "Indexes strings under their indices",
+             py::call_guard<py::gil_scoped_release>(), py::arg("strings"))
+        .def("add", &FuzzyIndex::add,
+             "Adds s under a new key, and returns the key",
+             py::call_guard<py::gil_scoped_release>(), py::arg("s"))
+        .def("set", &FuzzyIndex::set, "Adds or replaces the string of key",
+             py::call_guard<py::gil_scoped_release>(),
+             py::arg("key"), py::arg("s"))
+        .def("remove", &FuzzyIndex::remove,
+             "Removes key; returns whether it was in the index",
+             py::call_guard<py::gil_scoped_release>(), py::arg("key"))
+        .def("get", &FuzzyIndex::get, py::arg("key"))
+        .def("clear", &FuzzyIndex::clear)
+        .def("__contains__", &FuzzyIndex::contains, py::arg("key"))
+        .def("__len__", &FuzzyIndex::size)
+        .def("match_one", &FuzzyIndex::match_one,
+             "Returns (levenshtein dist., key) of the most similar string",
+             py::call_guard<py::gil_scoped_release>(), py::arg("query"))
+        .def("match", &FuzzyIndex::match,
+             "Returns (levenshtein dist., key)s of the most similar strings",
+             py::call_guard<py::gil_scoped_release>(),
+             py::arg("query"), py::arg("amount"));
+
     m.def(
         "akpull",
         &carpp::simulation::func_akpull,
         "Simulates Arknights pulls",
+        py::call_guard<py::gil_scoped_release>(),
         py::arg("trials"),
         py::arg("pulls"),
         py::arg("prob_rateup")
@@ -0,0 +1,281 @@
+#include <algorithm>
+#include <array>
+#include <iterator>
+#include <mutex>
+#include <queue>
+#include <stdexcept>
+#include <string_view>
+
+#include "algorithm.h"
+#include "index.h"
+
+#define INF 0x3f3f3f3f
+
+namespace carpp::index {
+
+FuzzyIndex::FuzzyIndex(const std::vector<std::string>& strings) {
+    for (const std::string& s : strings) {
+        insert(next_key++, s, next_seq++);
+    }
+}
+
+// the caller holds the lock
+void FuzzyIndex::insert(int64_t key, const std::string& s, uint64_t seq) {
+    Bucket& bucket = buckets[s.size()];
+    uint32_t slot = bucket.keys.size();
+    bucket.chars += s;
+    bucket.keys.push_back(key);
+    bucket.seqs.push_back(seq);
+    bucket.alive++;
+
+    std::array<uint32_t, 256> counts{};
+    for (unsigned char c : s) counts[c]++;
+    for (unsigned char c : s) {
+        if (counts[c] == 0) continue;
+        bucket.postings[c].push_back({slot, counts[c]});
+        counts[c] = 0;
+    }
+
+    entries[key] = {(uint32_t)s.size(), slot, seq};
+}
+
+// the caller holds the lock
+void FuzzyIndex::erase(std::unordered_map<int64_t, Entry>::iterator it) {
+    auto bucket_it = buckets.find(it->second.length);
+    Bucket& bucket = bucket_it->second;
+    bucket.keys[it->second.slot] = -1;
+    bucket.alive--;
+    entries.erase(it);
+
+    if (bucket.alive == 0) {
+        buckets.erase(bucket_it);
+    } else if (bucket.alive < bucket.keys.size() / 2) {
+        compact(bucket_it->first, bucket);
+    }
+}
+
+// drops removed strings from bucket; the caller holds the lock
+void FuzzyIndex::compact(uint32_t length, Bucket& bucket) {
+    Bucket new_bucket;
+    new_bucket.chars.reserve(bucket.alive * length);
+    new_bucket.keys.reserve(bucket.alive);
+    new_bucket.seqs.reserve(bucket.alive);
+
+    std::array<uint32_t, 256> counts{};
+    for (size_t i = 0; i < bucket.keys.size(); i++) {
+        if (bucket.keys[i] < 0) continue;
+        uint32_t slot = new_bucket.keys.size();
+        std::string_view s = std::string_view(bucket.chars).substr(
+            i * length, length);
+        new_bucket.chars += s;
+        new_bucket.keys.push_back(bucket.keys[i]);
+        new_bucket.seqs.push_back(bucket.seqs[i]);
+        entries[bucket.keys[i]].slot = slot;
+
+        for (unsigned char c : s) counts[c]++;
+        for (unsigned char c : s) {
+            if (counts[c] == 0) continue;
+            new_bucket.postings[c].push_back({slot, counts[c]});
+            counts[c] = 0;
+        }
+    }
+    new_bucket.alive = bucket.alive;
+
+    bucket = std::move(new_bucket);
+}
+
+int64_t FuzzyIndex::add(const std::string& s) {
+    std::unique_lock lock(mutex);
+
+    int64_t key = next_key++;
+    insert(key, s, next_seq++);
+    return key;
+}
+
+void FuzzyIndex::set(int64_t key, const std::string& s) {
+    std::unique_lock lock(mutex);
+
+    auto it = entries.find(key);
+    if (it == entries.end()) {
+        insert(key, s, next_seq++);
+        next_key = std::max(next_key, key + 1);
+        return;
+    }
+
+    // the key keeps its place when breaking ties
+    uint64_t seq = it->second.seq;
+    erase(it);
+    insert(key, s, seq);
+}
+
+bool FuzzyIndex::remove(int64_t key) {
+    std::unique_lock lock(mutex);
+
+    auto it = entries.find(key);
+    if (it == entries.end()) return false;
+    erase(it);
+    return true;
+}
+
+bool FuzzyIndex::contains(int64_t key) const {
+    std::shared_lock lock(mutex);
+    return entries.count(key) != 0;
+}
+
+std::string FuzzyIndex::get(int64_t key) const {
+    std::shared_lock lock(mutex);
+
+    auto it = entries.find(key);
+    if (it == entries.end()) throw std::out_of_range("key not in index");
+    const Entry& entry = it->second;
+    return buckets.at(entry.length).chars.substr(
+        (size_t)entry.slot * entry.length, entry.length);
+}
+
+void FuzzyIndex::clear() {
+    std::unique_lock lock(mutex);
+
+    buckets.clear();
+    entries.clear();
+    next_seq = 0;
+    next_key = 0;
+}
+
+size_t FuzzyIndex::size() const {
+    std::shared_lock lock(mutex);
+    return entries.size();
+}
+
+std::vector<FuzzyIndex::Match> FuzzyIndex::search(
+        const std::string& query, size_t amount) const {
+    if (amount == 0 || entries.empty()) return {};
+
+    const int q = query.size();
+    std::array<uint32_t, 256> counts{};
+    std::vector<unsigned char> distinct;
+    for (unsigned char c : query) {
+        if (counts[c]++ == 0) distinct.push_back(c);
+    }
+
+    // per string of the bucket being visited: characters in common with
+    // the query (an upper bound of the LCS)
+    thread_local std::vector<uint32_t> common;
+    thread_local std::vector<uint32_t> touched;
+    // touched strings by characters in common
+    thread_local std::vector<std::vector<uint32_t>> levels;
+
+    std::priority_queue<Match> best;
+
+    auto verify = [&](const Bucket& bucket, uint32_t length, uint32_t slot,
+                      int bound) {
+        int64_t key = bucket.keys[slot];
+        if (key < 0) return;
+        uint64_t seq = bucket.seqs[slot];
+        if (best.size() == amount) {
+            const auto& [worst_dist, worst_seq, _] = best.top();
+            if (bound > worst_dist
+                    || (bound == worst_dist && seq > worst_seq)) return;
+        }
+
+        std::string_view s = std::string_view(bucket.chars).substr(
+            (size_t)slot * length, length);
+        int dist = best.size() < amount
+            ? algorithm::levenshtein(query, s, 9, 1, 10)
+            : algorithm::levenshtein_bounded(
+                query, s, std::get<0>(best.top()), 9, 1, 10);
+        Match match{dist, seq, key};
+        if (best.size() < amount) {
+            best.push(match);
+        } else if (match < best.top()) {
+            best.pop();
+            best.push(match);
+        }
+    };
+
+    auto visit = [&](uint32_t length, const Bucket& bucket) {
+        size_t n = bucket.keys.size();
+        if (common.size() < n) common.resize(n);
+        touched.clear();
+        for (unsigned char c : distinct) {
+            for (const Posting& p : bucket.postings[c]) {
+                if (common[p.slot] == 0) touched.push_back(p.slot);
+                common[p.slot] += std::min(counts[c], p.count);
+            }
+        }
+
+        int top = std::min(q, (int)length);
+        if ((int)levels.size() <= top) levels.resize(top + 1);
+        for (int a = 1; a <= top; a++) levels[a].clear();
+        for (uint32_t slot : touched) levels[common[slot]].push_back(slot);
+
+        // most characters in common (lowest bound) first
+        for (int a = top; a >= 0; a--) {
+            int bound = 9*q + length - 10*a;
+            if (best.size() == amount && bound > std::get<0>(best.top()))
+                break;
+
+            if (a > 0) {
+                for (uint32_t slot : levels[a]) {
+                    verify(bucket, length, slot, bound);
+                }
+            } else {
+                for (uint32_t slot = 0; slot < n; slot++) {
+                    if (common[slot] == 0) {
+                        verify(bucket, length, slot, bound);
+                    }
+                }
+            }
+        }
+
+        for (uint32_t slot : touched) common[slot] = 0;
+    };
+
+    // lengths in order of their bound without looking at characters:
+    // |s| - |q| for longer strings and 9 (|q| - |s|) for shorter ones
+    auto up = buckets.lower_bound(q);
+    auto down = std::make_reverse_iterator(up);
+    while (up != buckets.end() || down != buckets.rend()) {
+        int bound_up = up != buckets.end() ? up->first - q : INF;
+        int bound_down = down != buckets.rend() ? 9*(q - down->first) : INF;
+        int bound = std::min(bound_up, bound_down);
+        if (best.size() == amount && bound > std::get<0>(best.top())) break;
+
+        if (bound_up <= bound_down) {
+            visit(up->first, up->second);
+            ++up;
+        } else {
+            visit(down->first, down->second);
+            ++down;
+        }
+    }
+
+    std::vector<Match> res;
+    res.reserve(best.size());
+    while (!best.empty()) {
+        res.push_back(best.top());
+        best.pop();
+    }
+    return res;
+}
+
+std::pair<int, int64_t> FuzzyIndex::match_one(
+        const std::string& query) const {
+    std::shared_lock lock(mutex);
+
+    std::vector<Match> res = search(query, 1);
+    if (res.empty()) return {INF, -1};
+    return {std::get<0>(res[0]), std::get<2>(res[0])};
+}
+
+std::vector<std::pair<int, int64_t>> FuzzyIndex::match(
+        const std::string& query, size_t amount) const {
+    std::shared_lock lock(mutex);
+
+    std::vector<std::pair<int, int64_t>> res;
+    for (const auto& [dist, _, key] : search(query, amount)) {
+        res.push_back({dist, key});
+    }
+    return res;
+}
+
+}
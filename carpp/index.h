@@ -0,0 +1,87 @@
+#pragma once
+
+#include <cstdint>
+#include <map>
+#include <shared_mutex>
+#include <string>
+#include <tuple>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+namespace carpp::index {
+
+// Strings keyed by integer ids (e.g. member names by user id), fuzzy matched
+// with the same weighting as fuzzy_match (9, 1, 10) without comparing the
+// query against every string.
+//
+// Since substituting costs as much as deleting and inserting, that distance
+// is exactly 9|q| + |s| - 10 LCS(q, s), and the LCS is at most the number of
+// characters the strings have in common. Strings are grouped by length, and
+// each group keeps, per character, the strings containing it; a query only
+// visits the lengths, and then only verifies the strings, whose bound can
+// still beat the current matches. Matching releases the GIL and only takes a
+// shared lock, so it can run in threads while the index is being updated.
+class FuzzyIndex {
+public:
+    FuzzyIndex() = default;
+    // keys are the strings' indices, as with fuzzy_match
+    explicit FuzzyIndex(const std::vector<std::string>& strings);
+
+    // adds s under one more than the largest key so far, and returns it
+    int64_t add(const std::string& s);
+    void set(int64_t key, const std::string& s);
+    bool remove(int64_t key);
+    bool contains(int64_t key) const;
+    std::string get(int64_t key) const;
+    void clear();
+    size_t size() const;
+
+    // (distance, key) of the best match, or (INF, -1) if the index is empty;
+    // ties go to the string that was added first
+    std::pair<int, int64_t> match_one(const std::string& query) const;
+    // (distance, key)s of the `amount` best matches, worst first
+    std::vector<std::pair<int, int64_t>> match(const std::string& query,
+                                               size_t amount) const;
+
+private:
+    struct Posting {
+        uint32_t slot;
+        uint32_t count;
+    };
+
+    // the strings of one length, back to back
+    struct Bucket {
+        std::string chars;
+        std::vector<int64_t> keys; // -1 where removed
+        std::vector<uint64_t> seqs;
+        // strings containing each (byte) character, and how many times
+        std::vector<std::vector<Posting>> postings =
+            std::vector<std::vector<Posting>>(256);
+        size_t alive = 0;
+    };
+
+    struct Entry {
+        uint32_t length;
+        uint32_t slot;
+        // order the key was first added in, for breaking ties
+        uint64_t seq;
+    };
+
+    // (distance, seq, key), ordered from best to worst
+    using Match = std::tuple<int, uint64_t, int64_t>;
+
+    // the `amount` best matches, worst first; the caller holds the lock
+    std::vector<Match> search(const std::string& query, size_t amount) const;
+    void insert(int64_t key, const std::string& s, uint64_t seq);
+    void erase(std::unordered_map<int64_t, Entry>::iterator it);
+    void compact(uint32_t length, Bucket& bucket);
+
+    std::map<uint32_t, Bucket> buckets;
+    std::unordered_map<int64_t, Entry> entries;
+    uint64_t next_seq = 0;
+    int64_t next_key = 0;
+    mutable std::shared_mutex mutex;
+};
+
+}